@@ -0,0 +1,175 @@
+"""End-to-end benchmark of entry creation against the in-process fake Notion
+backend (fake_notion.py); no workspace or token needed.
+
+    python bench.py
+    python bench.py --entries 50 --latency 0.2 --rate-limit-errors 0.05 --server-errors 0.02
+"""
+import argparse
+import builtins
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+
+import fake_notion
+import main
+import notion_api
+from profiling import percentile
+
+def summarize(name, entries, elapsed, latencies):
+    return {
+        "scenario": name,
+        "entries": entries,
+        "seconds": round(elapsed, 3),
+        "entries_per_second": round(entries / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+    }
+
+@contextlib.contextmanager
+def scripted(answers):
+    """Feed `answers` to input() and swallow everything printed."""
+    answers = iter(answers)
+    real_input = builtins.input
+    builtins.input = lambda prompt="": next(answers)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        builtins.input = real_input
+
+def timed(func, samples):
+    def wrapper(*args):
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            samples.append(time.perf_counter() - started)
+    return wrapper
+
+def add_entry(data_source_id, schema, title, date):
+    with scripted([title, date, "y"]):
+        main.interactive_add_task(data_source_id, schema, ["Task name", "Due date"], "Bench", True, main.ZoneInfo("UTC"))
+
+def bench_schema(fake, rounds):
+    database_id = next(iter(fake.databases))
+    cold, warm = [], []
+    for _ in range(rounds):
+        main.SCHEMA_CACHE.clear()
+        started = time.perf_counter()
+        main.resolve_data_source(database_id)
+        cold.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        main.resolve_data_source(database_id)
+        warm.append(time.perf_counter() - started)
+    return [
+        summarize("resolve_data_source (cold)", rounds, sum(cold), cold),
+        summarize("resolve_data_source (cached)", rounds, sum(warm), warm),
+    ]
+
+def bench_single(data_source_id, schema, entries, page_latencies):
+    calls = []
+    page_latencies.clear()
+    started = time.perf_counter()
+    for i in range(entries):
+        began = time.perf_counter()
+        add_entry(data_source_id, schema, f"Single {i}", "today")
+        calls.append(time.perf_counter() - began)
+    elapsed = time.perf_counter() - started
+    result = summarize("single entries", entries, elapsed, calls)
+    result["create_p50_ms"] = round(percentile(page_latencies, 50) * 1000, 1)
+    result["create_p99_ms"] = round(percentile(page_latencies, 99) * 1000, 1)
+    return result
+
+def bench_recurring(data_source_id, schema, entries, page_latencies):
+    page_latencies.clear()
+    started = time.perf_counter()
+    add_entry(data_source_id, schema, "Recurring", f"today 1200 {entries}d")
+    elapsed = time.perf_counter() - started
+    return summarize(f"recurring series ({entries}d)", len(page_latencies), elapsed, page_latencies)
+
+def bench_tasks(fake, cache_dir, entries):
+    """Sync a tasks file (one row recurring), then sync it again after losing
+    tasks.db: every page, each occurrence included, must be found again by
+    its key property rather than created twice."""
+    path = os.path.join(cache_dir, "tasks.csv")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("key,Task name,Due date\nlecture,Lecture,2026-03-02 1000 mwf2w\n")
+        for i in range(entries):
+            f.write(f"task-{i},Task {i},2026-03-{i % 28 + 1:02d}\n")
+    os.environ.update({"DATABASES": "bench", "DB_BENCH_LABEL": "Bench", "DB_BENCH_ID": "database_1", "DB_BENCH_PROPS": "Task name,Due date"})
+    args = argparse.Namespace(file=path, db="bench", format=None, map=None, key_column="key", key_prop="Series", tz="UTC", dry_run=False)
+    results = []
+    for name in ("tasks sync (first run)", "tasks sync (adopting)"):
+        before = dict(fake.calls)
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            main.run_sync_tasks(args)
+        elapsed = time.perf_counter() - started
+        created = fake.calls["pages.create"] - before.get("pages.create", 0)
+        writes = created + fake.calls["pages.update"] - before.get("pages.update", 0)
+        results.append(summarize(name, writes, elapsed, [elapsed]))
+        os.remove(os.path.join(cache_dir, "tasks.db"))
+    if created:
+        raise SystemExit(f"tasks sync created {created} page(s) it should have adopted")
+    return results
+
+def print_table(results):
+    print(f"{'scenario':<32} {'entries':>7} {'secs':>8} {'entries/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for r in results:
+        print(f"{r['scenario']:<32} {r['entries']:>7} {r['seconds']:>8.2f} {r['entries_per_second']:>10.2f} {r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f}")
+        if "create_p50_ms" in r:
+            print(f"{'  pages.create':<32} {'':>7} {'':>8} {'':>10} {r['create_p50_ms']:>8.1f} {r['create_p99_ms']:>8.1f}")
+
+def run(args):
+    fake = fake_notion.FakeNotion(
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_limit_rate=args.rate_limit_errors,
+        error_rate=args.server_errors,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    with tempfile.TemporaryDirectory() as cache_dir:
+        os.environ.update({
+            "CACHE_DIR": cache_dir,
+            "QUICK_ACCESS_TIMES": "",
+            "CREATE_CONCURRENCY": str(args.concurrency),
+            "NOTION_RATE_LIMIT": str(args.rate),
+        })
+        main.configure(argparse.Namespace(refresh_schemas=False, background=False), client=fake.http_client())
+        page_latencies = []
+        main.OUTBOX_WORKER.create_page = timed(main.create_page, page_latencies)
+        main.OUTBOX_WORKER.start()
+
+        results = bench_schema(fake, args.schema_rounds)
+        data_source_id, schema = main.resolve_data_source("database_1")
+        if args.entries:
+            results.append(bench_single(data_source_id, schema, args.entries, page_latencies))
+            results.append(bench_recurring(data_source_id, schema, args.entries, page_latencies))
+            results.extend(bench_tasks(fake, cache_dir, args.entries))
+        main.OUTBOX_WORKER.stop()
+
+    if args.json:
+        print(json.dumps({"results": results, "client": main.notion.stats(), "server": fake.stats()}, indent=2))
+    else:
+        print_table(results)
+        print(f"\nclient: {notion_api.format_stats(main.notion.stats())}")
+        print(f"server: {fake.stats()}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark entry creation against a fake Notion backend.")
+    parser.add_argument("--entries", type=int, default=20, help="single entries to add, length of the recurring series, and rows of the tasks file (default: 20)")
+    parser.add_argument("--schema-rounds", type=int, default=5, help="cold/cached schema lookups to time (default: 5)")
+    parser.add_argument("--latency", type=float, default=0.1, help="seconds each fake request takes (default: 0.1)")
+    parser.add_argument("--jitter", type=float, default=0.05, help="extra random latency, up to this many seconds (default: 0.05)")
+    parser.add_argument("--rate-limit-errors", type=float, default=0.0, help="fraction of requests answered with 429 (default: 0)")
+    parser.add_argument("--server-errors", type=float, default=0.0, help="fraction of requests answered with a 5xx (default: 0)")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After sent with injected 429s (default: 1)")
+    parser.add_argument("--concurrency", type=int, default=3, help="CREATE_CONCURRENCY to use (default: 3)")
+    parser.add_argument("--rate", type=float, default=3.0, help="NOTION_RATE_LIMIT to use, requests/s (default: 3)")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for latency and error injection (default: 1)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    run(parser.parse_args())
@@ -0,0 +1,219 @@
+"""Benchmark and regression check for the date grammar (dateparse.py).
+
+Every expression in CORPUS is parsed against a frozen date and timezone, and
+every series in LARGE is expanded in full. The outputs must match those
+saved in bench_dates.json. Timings are reported relative to a calibration
+loop timed in the same run, so they compare across machines; with
+--check-timing each must also stay within --threshold times its saved value.
+
+    python bench_dates.py                  # check outputs, report timings
+    python bench_dates.py --check-timing   # also fail on slower timings
+    python bench_dates.py --update         # save a new baseline after an intended change
+    python bench_dates.py --no-timing
+"""
+import argparse
+import gc
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import date, timedelta
+from zoneinfo import ZoneInfo
+
+import dateparse
+
+TODAY = date(2026, 1, 14)  # a Wednesday
+TZ = ZoneInfo("America/Los_Angeles")
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_dates.json")
+
+# (expression, QUICK_ACCESS_TIMES entry chosen or None)
+CORPUS = [
+    # numeric and ISO dates
+    ("817", None), ("0817", None), ("1225", None), ("0105", None),
+    ("011726", None), ("123199", None), ("01172026", None),
+    ("2026-08-17", None), ("08-17", None),
+    # shortcuts and weekday phrases
+    ("today", None), ("tomorrow", None), ("yesterday", None),
+    ("tuesday", None), ("tue", None), ("thurs", None), ("wed", None),
+    ("this fri", None), ("this wed", None), ("next wed", None), ("next sun", None),
+    # times
+    ("today 14:30", None), ("today 2:30 PM", None), ("0817 1159 PM", None),
+    ("0817 232", None), ("0817 1259", None), ("0817 9", None), ("0817 9 am", None),
+    ("next wed 232 pm", None), ("this fri 12 am", None),
+    ("0817", "11:59 PM"), ("tomorrow", "09:00"), ("tomorrow 8 am", "11:59 PM"),
+    # recurrences
+    ("today repeat", None), ("0901 r", None), ("0901 3w", None), ("0901 10d", None),
+    ("mwf3w", None), ("tr2w", None), ("today mwf3w", None), ("next mon 9 am tr4w", None),
+    ("0901 mwf 12-12", None), ("tr 12-20", None), ("0901 w 12-20", None), ("0901 d 0915", None),
+    ("0901 1159 PM w 12-20", None), ("mwf3w", "11:59 PM"),
+    ("0901 w 12-20 5x", None), ("0901 mwf 12-12 except 11-27, 12-25", None),
+    ("0901 d 0910 skip 0905", None), ("today 30d 10x except tomorrow", None),
+    # rejected input
+    ("foo", None), ("1332", None), ("0230", None), ("0817 2460", None), ("0817 13 pm", None),
+    ("0817 12345", None), ("today 0d", None), ("0901 d 0815", None), ("today 1000000d", None),
+    # skipped dates resolve against the series start, not today
+    ("1215 w 021527 except 0202", None),
+]
+
+# Long series whose expansion is timed separately, past the entry cap the
+# app applies.
+UNCAPPED = 10 ** 9
+LARGE = [
+    "today 1000d",
+    "today 1200 5000d",
+    "today d 12312035",
+    "today mtwrf520w",
+    "today 9 am mwf 12312040",
+    "today 1159 PM w 12312060 except 0704, 1225",
+]
+
+def key(text, default_time=None):
+    return f"{text} @ {default_time}" if default_time else text
+
+def evaluate(text, default_time=None, limit=dateparse.MAX_RECURRENCES):
+    """Parse and fully expand an expression into a JSON-friendly summary."""
+    try:
+        start, rest = dateparse.parse(text, TODAY, TZ, default_time, limit)
+    except ValueError as e:
+        return {"error": str(e)}
+    occurrences = [o if isinstance(o, str) else o.isoformat() for o in rest]
+    return {
+        "start": start,
+        "count": 1 + len(occurrences),
+        "len": 1 + len(rest),
+        "first": occurrences[:3],
+        "last": occurrences[-1] if occurrences else None,
+        "digest": hashlib.sha256("\n".join(occurrences).encode()).hexdigest()[:16],
+    }
+
+def best_of(func, repeat, rounds=5):
+    """Fastest mean time per call, in seconds, over `rounds` runs, with the
+    garbage collector off as timeit does."""
+    best = float("inf")
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            started = time.perf_counter()
+            for _ in range(repeat):
+                func()
+            best = min(best, (time.perf_counter() - started) / repeat)
+    finally:
+        if enabled:
+            gc.enable()
+    return best
+
+def calibration():
+    """A fixed pure-Python workload like the parser's (string splitting and
+    date arithmetic). Every timing is divided by its time, so a faster or
+    slower machine doesn't read as a change in the code."""
+    day = TODAY
+    for i in range(100):
+        day += timedelta(days=i % 7)
+        month, _, rest = day.isoformat()[5:].partition("-")
+        int(month) * 100 + int(rest)
+
+def parse_uncached(text, default_time):
+    dateparse.parse.cache_clear()
+    dateparse.resolve.cache_clear()
+    try:
+        dateparse.parse(text, TODAY, TZ, default_time)
+    except ValueError:
+        pass
+
+def measure(repeat, timing=True):
+    results = {"today": TODAY.isoformat(), "tz": TZ.key, "parse": {}, "expand": {}}
+    calibrated = best_of(calibration, repeat) if timing else None
+    for text, default_time in CORPUS:
+        entry = {"output": evaluate(text, default_time)}
+        if timing:
+            entry["us"] = round(best_of(lambda: parse_uncached(text, default_time), repeat) * 1e6, 2)
+        results["parse"][key(text, default_time)] = entry
+
+    for text in LARGE:
+        entry = {"output": evaluate(text, limit=UNCAPPED)}
+        if timing:
+            _, rest = dateparse.parse(text, TODAY, TZ, None, UNCAPPED)
+            entry["ms"] = round(best_of(lambda: sum(1 for _ in rest), max(1, repeat // 50)) * 1e3, 3)
+        results["expand"][text] = entry
+    if timing:
+        # Timed again at the end, as the machine may have sped up since.
+        results["calibration_us"] = round(min(calibrated, best_of(calibration, repeat)) * 1e6, 2)
+    return results
+
+def compare(current, baseline, threshold, timing=True, check_timing=False):
+    """Return a list of failure messages. Timing ratios are scaled by the
+    two runs' calibration times; they only fail with check_timing."""
+    failures = []
+    if (baseline.get("today"), baseline.get("tz")) != (current["today"], current["tz"]):
+        failures.append("Baseline was recorded for a different date or timezone; run with --update.")
+        return failures
+    speed = 1.0
+    if timing and baseline.get("calibration_us"):
+        speed = baseline["calibration_us"] / current["calibration_us"]
+        print(f"calibration: {current['calibration_us']}us vs {baseline['calibration_us']}us; timings scaled by {speed:.2f}")
+
+    for section, unit, floor in (("parse", "us", 2.0), ("expand", "ms", 0.5)):
+        print(f"\n{section:<48} {unit:>10} {'baseline':>10} {'ratio':>7}")
+        for name, entry in current[section].items():
+            base = baseline.get(section, {}).get(name)
+            out = entry["output"]
+            if "len" in out and out["len"] != out["count"]:
+                failures.append(f"{section} {name!r}: len() says {out['len']} but {out['count']} occurrences were produced")
+
+            status = ""
+            if base is None:
+                status = "new"
+            elif base["output"] != out:
+                status = "CHANGED"
+                failures.append(f"{section} {name!r}: output changed\n    was: {base['output']}\n    now: {out}")
+            if timing and base is not None and unit in entry and unit in base:
+                now, then = entry[unit], base[unit]
+                ratio = now * speed / then if then else 1.0
+                if ratio > threshold and now * speed - then > floor:
+                    status = status or "SLOWER"
+                    if check_timing:
+                        failures.append(f"{section} {name!r}: {now}{unit} vs {then}{unit} ({ratio:.1f}x after calibration)")
+                print(f"{name:<48} {now:>10} {then:>10} {ratio:>6.2f}x {status}")
+            elif unit in entry:
+                print(f"{name:<48} {entry[unit]:>10} {'-':>10} {'':>7} {status}")
+            else:
+                print(f"{name:<48} {status}")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark and regression-check the date grammar.")
+    parser.add_argument("--update", action="store_true", help="write the current outputs and timings as the new baseline")
+    parser.add_argument("--check-timing", action="store_true", help="fail when a calibrated timing exceeds --threshold times its baseline")
+    parser.add_argument("--threshold", type=float, default=2.0, help="multiple of its baseline at which a timing counts as slower (default: 2.0)")
+    parser.add_argument("--repeat", type=int, default=200, help="parses per timing round (default: 200)")
+    parser.add_argument("--no-timing", action="store_true", help="only check outputs")
+    args = parser.parse_args()
+
+    current = measure(args.repeat, timing=not args.no_timing)
+
+    if args.update:
+        with open(BASELINE, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=1, sort_keys=True)
+            f.write("\n")
+        print(f"Saved baseline for {len(current['parse'])} expressions and {len(current['expand'])} series to {BASELINE}")
+        return 0
+
+    if not os.path.exists(BASELINE):
+        print(f"No baseline at {BASELINE}; run with --update first.")
+        return 1
+    with open(BASELINE, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    failures = compare(current, baseline, args.threshold, timing=not args.no_timing, check_timing=args.check_timing)
+    if failures:
+        print(f"\n{len(failures)} failure(s):")
+        for message in failures:
+            print(f"  {message}")
+        return 1
+    print("\nAll outputs match the baseline" + (f" and no timing regressed beyond {args.threshold}x" if args.check_timing else "") + ".")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
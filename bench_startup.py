@@ -0,0 +1,99 @@
+"""Startup benchmark: how long `python main.py` takes to show its first
+prompt, and which imports that time goes to (from -X importtime).
+
+    python bench_startup.py
+    python bench_startup.py --runs 20 --max-ms 300   # exit 1 if the median is slower
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIRST_PROMPT = b"Enter number"
+
+def startup_env(cache_dir):
+    """A throwaway configuration with a timezone prompt, so the first
+    prompt is the one a real session sees first."""
+    env = dict(os.environ)
+    env.update({
+        "NOTION_SECRET": "secret_benchmark",
+        "DEFAULT_TIMEZONE": "UTC",
+        "TIMEZONE_CHOICES": "UTC,America/New_York",
+        "DATABASES": "bench",
+        "DB_BENCH_LABEL": "Bench",
+        "DB_BENCH_ID": "00000000000000000000000000000000",
+        "DB_BENCH_PROPS": "Name",
+        "CACHE_DIR": cache_dir,
+        # Keep the schema prefetch from reaching the network.
+        "HTTP_CONNECT_TIMEOUT": "0.001",
+        "NOTION_MAX_RETRIES": "0",
+    })
+    return env
+
+def time_to_first_prompt(env):
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-u", os.path.join(HERE, "main.py")],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=env, cwd=HERE,
+    )
+    seen = b""
+    try:
+        while FIRST_PROMPT not in seen:
+            chunk = proc.stdout.read1(4096)
+            if not chunk:
+                raise RuntimeError(f"main.py exited before its first prompt: {seen.decode(errors='replace')}")
+            seen += chunk
+        return time.perf_counter() - started
+    finally:
+        proc.kill()
+        proc.wait()
+
+def import_times(env, top):
+    """Return (total microseconds, [(cumulative us, module)]) for `import main`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        capture_output=True, env=env, cwd=HERE, text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            rows.append((int(cumulative), name.rstrip()))
+        except ValueError:
+            continue  # header row
+    total = next((us for us, name in reversed(rows) if name.strip() == "main"), 0)
+    heavy = sorted((r for r in rows if r[1].strip() != "main"), reverse=True)[:top]
+    return total, heavy
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure time to the first prompt of main.py.")
+    parser.add_argument("--runs", type=int, default=10, help="startups to time (default: 10)")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list (default: 10)")
+    parser.add_argument("--max-ms", type=float, help="exit 1 if the median time to first prompt is above this")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = startup_env(cache_dir)
+        time_to_first_prompt(env)  # warm the bytecode cache
+        samples = [time_to_first_prompt(env) * 1000 for _ in range(args.runs)]
+        total, heavy = import_times(env, args.top)
+
+    median = statistics.median(samples)
+    print(f"time to first prompt: median {median:.1f} ms, min {min(samples):.1f} ms, max {max(samples):.1f} ms ({args.runs} runs)")
+    print(f"import main: {total / 1000:.1f} ms")
+    for us, name in heavy:
+        print(f"  {us / 1000:>7.1f} ms {name}")
+
+    if args.max_ms is not None and median > args.max_ms:
+        print(f"Median time to first prompt {median:.1f} ms is above {args.max_ms} ms.")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+import json
+import os
+import socket
+import socketserver
+import threading
+
+class DaemonError(Exception):
+    """Something is listening on the socket but didn't answer: a hung
+    daemon, one that died mid-reply, or a stale socket file."""
+
+def request(path, message, timeout=120.0):
+    """Send one JSON message to the daemon listening on `path` and return
+    its reply, or None when no daemon is running there. Raises DaemonError
+    when the daemon times out or the socket misbehaves."""
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(path)
+            sock.sendall(json.dumps(message).encode() + b"\n")
+            with sock.makefile("rb") as f:
+                line = f.readline()
+    except (FileNotFoundError, ConnectionRefusedError):
+        return None
+    except TimeoutError as e:
+        raise DaemonError(f"The daemon at {path} didn't answer within {timeout:g}s") from e
+    except OSError as e:
+        raise DaemonError(f"Couldn't talk to the daemon at {path}: {e}") from e
+    try:
+        return json.loads(line) if line else None
+    except ValueError as e:
+        raise DaemonError(f"The daemon at {path} sent a malformed reply") from e
+
+def read_pid(path):
+    """The process ID the daemon on `path` recorded, or None."""
+    try:
+        with open(f"{path}.pid", encoding="utf-8") as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            reply = self.server.dispatch(json.loads(self.rfile.readline()))
+        except Exception as e:
+            reply = {"ok": False, "error": str(e)}
+        self.wfile.write(json.dumps(reply, default=str).encode() + b"\n")
+
+class Daemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix-socket server answering one JSON request per connection.
+
+    `handlers` maps a command name to a function taking the request and
+    returning a JSON-friendly reply. 'ping' and 'stop' are built in. The
+    socket is only accessible to the current user; the process ID is
+    written next to it (`<path>.pid`)."""
+
+    daemon_threads = True
+
+    def __init__(self, path, handlers):
+        if os.path.exists(path):
+            try:
+                running = request(path, {"command": "ping"}, timeout=2) is not None
+            except DaemonError:
+                running = False
+            if running:
+                raise RuntimeError(f"A daemon is already listening on {path}.")
+            os.unlink(path)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.handlers = handlers
+        old_umask = os.umask(0o077)
+        try:
+            super().__init__(path, _Handler)
+            with open(f"{path}.pid", "w", encoding="utf-8") as f:
+                f.write(str(os.getpid()))
+        finally:
+            os.umask(old_umask)
+
+    def dispatch(self, message):
+        command = message.get("command")
+        if command == "ping":
+            return {"ok": True, "pid": os.getpid()}
+        if command == "stop":
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {"ok": True}
+        if command not in self.handlers:
+            return {"ok": False, "error": f"Unknown command: {command}"}
+        return self.handlers[command](message)
+
+    def serve(self):
+        try:
+            self.serve_forever()
+        finally:
+            self.server_close()
+            for path in (self.path, f"{self.path}.pid"):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
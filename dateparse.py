@@ -0,0 +1,369 @@
+import calendar
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from recurrence import Series
+
+# Grammar tables, built once at import instead of on every call.
+COUNT_RE = re.compile(r"^(\d+)([dw])$")
+DOW_COUNT_RE = re.compile(r"^([mtwrfsu]+)(\d+)w$")
+DOW_RE = re.compile(r"^[mtwrfsu]+$")
+COUNT_LIMIT_RE = re.compile(r"^(\d+)x$")
+EXCLUDE_KEYWORDS = ("except", "skip")
+NUMERIC_TIME_RE = re.compile(r"^\s*(\d{1,4})\s*(am|pm|AM|PM)?\s*$")
+
+WEEKDAYS = {day.lower(): i for i, day in enumerate(calendar.day_name)}
+WEEKDAY_ALIASES = {
+    "mon": "monday",
+    "tue": "tuesday", "tues": "tuesday",
+    "wed": "wednesday", "weds": "wednesday",
+    "thu": "thursday", "thur": "thursday", "thurs": "thursday",
+    "fri": "friday",
+    "sat": "saturday",
+    "sun": "sunday",
+}
+DOW_LETTERS = {"m": 0, "t": 1, "w": 2, "r": 3, "f": 4, "s": 5, "u": 6}
+UNIT_DELTAS = {"d": timedelta(days=1), "w": timedelta(weeks=1)}
+TIME_FORMATS = ("%H:%M", "%I:%M %p")
+
+# Hard cap on the entries one expression may produce, so a typo such as
+# '1000000d' is an error instead of a million pages behind one "y".
+MAX_RECURRENCES = 200
+
+DATE_ERROR = "Invalid date. Examples: '2025-08-17', '08-17', '817', '0817', '011726', or '01172026'; also 'today', 'tuesday', 'this fri', 'next wed'."
+TIME_ERROR = "Invalid time. Examples: '14:30', '2:30 PM', '232', '1259', or '232 PM'."
+
+def split_limits(parts):
+    """Strip the trailing '<N>x' count limit and 'except <date>, <date>'
+    clause that can follow any recurrence."""
+    exclude_tokens = ()
+    for idx in range(len(parts) - 1, -1, -1):
+        if parts[idx].lower() in EXCLUDE_KEYWORDS:
+            exclude_tokens = tuple(parts[idx + 1:])
+            parts = parts[:idx]
+            break
+
+    max_count = None
+    if parts:
+        m = COUNT_LIMIT_RE.match(parts[-1].lower())
+        if m:
+            max_count = int(m.group(1))
+            parts = parts[:-1]
+    return parts, max_count, exclude_tokens
+
+def split_recurrence(parts):
+    if not parts:
+        return None, None, parts
+
+    last = parts[-1].lower()
+    if last in ("repeat", "r"):
+        return "repeat", 1, parts[:-1]
+
+    m = COUNT_RE.match(last)
+    if m:
+        return "count", (int(m.group(1)), UNIT_DELTAS[m.group(2)]), parts[:-1]
+
+    m = DOW_COUNT_RE.match(last)
+    if m:
+        return "dow", (m.group(1), int(m.group(2))), parts[:-1]
+
+    for idx in range(len(parts) - 1, -1, -1):
+        unit = parts[idx].lower()
+        if unit in UNIT_DELTAS:
+            return "until", (UNIT_DELTAS[unit], parts[idx + 1:]), parts[:idx]
+
+    for idx in range(len(parts) - 1, -1, -1):
+        if DOW_RE.match(parts[idx].lower()):
+            return "dow_until", (parts[idx].lower(), parts[idx + 1:]), parts[:idx]
+
+    return None, None, parts
+
+def norm_weekday(tok):
+    return WEEKDAY_ALIASES.get(tok, tok)
+
+def resolve_day(parts, today):
+    """Return (midnight datetime, remaining time text) for the date tokens,
+    relative to the reference date `today`."""
+    date_part = parts[0]
+    time_part = " ".join(parts[1:]) if len(parts) > 1 else None
+    tokens = [p.lower() for p in parts]
+    midnight = datetime.combine(today, datetime.min.time())
+    dt = None
+    consumed = 0
+
+    first = tokens[0]
+    if first == "today":
+        dt, consumed = midnight, 1
+    elif first == "tomorrow":
+        dt, consumed = midnight + timedelta(days=1), 1
+    elif first == "yesterday":
+        dt, consumed = midnight - timedelta(days=1), 1
+    elif first in ("this", "next") and len(tokens) >= 2:
+        wd_full = norm_weekday(tokens[1])
+        if wd_full in WEEKDAYS:
+            target = WEEKDAYS[wd_full]
+            start_of_week = midnight - timedelta(days=today.weekday())
+            if first == "this":
+                dt = start_of_week + timedelta(days=target)
+                if dt < midnight:
+                    dt += timedelta(weeks=1)
+            else:
+                dt = start_of_week + timedelta(weeks=1, days=target)
+            consumed = 2
+    elif norm_weekday(first) in WEEKDAYS:
+        days_ahead = (WEEKDAYS[norm_weekday(first)] - today.weekday()) % 7
+        dt, consumed = midnight + timedelta(days=days_ahead), 1
+
+    if dt is not None:
+        remainder = " ".join(parts[consumed:]).strip()
+        return dt, remainder or None
+
+    if date_part.isdigit():
+        year_explicit = False
+        n = len(date_part)
+        if n == 3:
+            month, day, year = int(date_part[0]), int(date_part[1:]), today.year
+        elif n == 4:
+            month, day, year = int(date_part[:2]), int(date_part[2:]), today.year
+        elif n == 6:
+            yy = int(date_part[4:])
+            month, day = int(date_part[:2]), int(date_part[2:4])
+            year = 2000 + yy if yy <= 69 else 1900 + yy
+            year_explicit = True
+        elif n == 8:
+            month, day, year = int(date_part[:2]), int(date_part[2:4]), int(date_part[4:])
+            year_explicit = True
+        else:
+            month = day = year = None
+
+        if month and day and year:
+            dt = datetime(year, month, day)
+            if not year_explicit and dt.date() < today:
+                dt = dt.replace(year=today.year + 1)
+            return dt, time_part
+
+    for fmt in ("%Y-%m-%d", "%m-%d"):
+        try:
+            dt = datetime.strptime(date_part, fmt)
+        except ValueError:
+            continue
+        if fmt == "%m-%d":
+            dt = dt.replace(year=today.year)
+            if dt.date() < today:
+                dt = dt.replace(year=today.year + 1)
+        return dt, time_part
+
+    raise ValueError(DATE_ERROR)
+
+def parse_clock(text):
+    """Parse a time like '14:30', '2:30 PM', '232', '1259' or '232 pm' into
+    (hour, minute)."""
+    for time_fmt in TIME_FORMATS:
+        try:
+            t = datetime.strptime(text, time_fmt)
+            return t.hour, t.minute
+        except ValueError:
+            pass
+
+    m = NUMERIC_TIME_RE.match(text)
+    if not m:
+        raise ValueError(TIME_ERROR)
+
+    digits = m.group(1)
+    ampm = (m.group(2) or "").lower()
+
+    if len(digits) in (3, 4):
+        hour = int(digits[:-2])
+        minute = int(digits[-2:])
+    elif len(digits) in (1, 2):
+        hour = int(digits)
+        minute = 0
+    else:
+        raise ValueError("Time too long. Use up to 4 digits, e.g. '232' or '1259'.")
+
+    if not (0 <= minute <= 59):
+        raise ValueError("Minute must be 00–59.")
+    if ampm:
+        if not (1 <= hour <= 12):
+            raise ValueError("Hour must be 1–12 when using AM/PM.")
+        if ampm == "am":
+            hour = 0 if hour == 12 else hour
+        else:
+            hour = 12 if hour == 12 else hour + 12
+    else:
+        if not (0 <= hour <= 23):
+            raise ValueError("Hour must be 00–23 for 24-hour times.")
+    return hour, minute
+
+def parse_quick_time(text):
+    """QUICK_ACCESS_TIMES entries only accept the two strptime forms."""
+    for time_fmt in TIME_FORMATS:
+        try:
+            t = datetime.strptime(text, time_fmt)
+            return t.hour, t.minute
+        except ValueError:
+            continue
+    return None
+
+@lru_cache(maxsize=1024)
+def resolve(text, today):
+    """Tokenize an expression into (day, (hour, minute) or None, recurrence
+    mode, recurrence info, count limit, exclusion tokens). Cached per
+    reference date."""
+    parts = text.strip().split()
+    parts, max_count, exclude_tokens = split_limits(parts)
+    mode, info, parts = split_recurrence(parts)
+    if not parts:
+        parts = ["today"]
+    dt, time_part = resolve_day(parts, today)
+    clock = parse_clock(time_part) if time_part else None
+    return dt, clock, mode, info, max_count, exclude_tokens
+
+def has_time(text, today):
+    return resolve(text, today)[1] is not None
+
+def end_date(tokens, today, tz):
+    if not tokens:
+        return None
+    start, _ = parse(" ".join(tokens), today, tz)
+    if "T" in start:
+        return datetime.fromisoformat(start)
+    return datetime.fromisoformat(start + "T00:00:00")
+
+def excluded_dates(tokens, today, tz):
+    chunks = " ".join(tokens).split(",")
+    return {end_date(chunk.split(), today, tz).date() for chunk in chunks if chunk.strip()}
+
+def weekdays_of(dow_str):
+    return {DOW_LETTERS[c] for c in dow_str if c in DOW_LETTERS}
+
+def expand(dt, mode, info, today, tz, max_count=None, exclude=(), limit=MAX_RECURRENCES):
+    """Describe the occurrences of an expression as a lazy Series. Raises
+    ValueError past `limit` entries."""
+    count = until = None
+    step_days = weekdays = None
+
+    if not mode:
+        count = 1
+    elif mode == "repeat":
+        step_days, count = 7, 2
+    elif mode == "count":
+        count, delta = info
+        step_days = delta.days
+    elif mode == "dow":
+        dow_str, weeks = info
+        weekdays = weekdays_of(dow_str)
+        until = dt.date() + timedelta(weeks=weeks, days=-1)
+    elif mode in ("dow_until", "until"):
+        unit, end_tokens = info
+        end_dt = end_date(end_tokens, today, tz)
+        if not end_dt:
+            count = 1
+        else:
+            until = end_dt.date()
+            if mode == "dow_until":
+                weekdays = weekdays_of(unit)
+            else:
+                step_days = unit.days
+
+    if max_count is not None:
+        count = max_count if count is None else min(count, max_count)
+
+    series = Series(dt, step_days=step_days, weekdays=weekdays, count=count, until=until, exclude=exclude)
+    if len(series) > limit:
+        raise ValueError(f"Recurrence exceeds {limit} entries.")
+    return series
+
+@lru_cache(maxsize=1024)
+def parse(text, today, tz=None, default_time=None, max_recurrences=MAX_RECURRENCES):
+    """Parse a date expression against the reference date `today`.
+
+    Returns (start, recurrences): the ISO start of the first entry and a lazy,
+    re-iterable view of the remaining occurrences (datetimes when a time
+    applies, ISO date strings otherwise) that supports len(). default_time is
+    a QUICK_ACCESS_TIMES entry to use when the expression has no time of its
+    own. More than max_recurrences entries is a ValueError."""
+    dt, clock, mode, info, max_count, exclude_tokens = resolve(text, today)
+
+    if clock is None and default_time:
+        clock = parse_quick_time(default_time)
+    if clock is not None:
+        dt = dt.replace(hour=clock[0], minute=clock[1], tzinfo=tz)
+
+    # Skipped dates belong to the series, so '01-05' means the first Jan 5
+    # on or after its start even when that is next year.
+    exclude = excluded_dates(exclude_tokens, dt.date(), tz) if exclude_tokens else ()
+    series = expand(dt, mode, info, today, tz, max_count, exclude, max_recurrences)
+    first = next(iter(series), None)
+    if first is None:
+        raise ValueError("Recurrence produces no dates.")
+
+    if clock is not None:
+        return first.isoformat(), series.rest()
+    return first.date().isoformat(), series.rest(date_only=True)
+
+class ParsedDate:
+    """One parsed date expression.
+
+    `start` is the ISO date (or datetime, when has_time) of the first
+    entry and `rest` a lazy, re-iterable view of the later occurrences as
+    ISO strings of the same kind. Iterating the result yields every
+    occurrence, start included, and len() counts them without expanding
+    the series."""
+
+    __slots__ = ("text", "start", "has_time", "rest")
+
+    def __init__(self, text, start, has_time, rest):
+        self.text = text
+        self.start = start
+        self.has_time = has_time
+        self.rest = rest
+
+    def __iter__(self):
+        yield self.start
+        yield from self.rest
+
+    def __len__(self):
+        return 1 + len(self.rest)
+
+    def __repr__(self):
+        return f"ParsedDate({self.text!r}, start={self.start!r}, occurrences={len(self)})"
+
+def reference_day(now=None, tz=None):
+    """The calendar day expressions are resolved against: `now` (default:
+    the current time) seen from tz."""
+    if now is None:
+        return datetime.now(tz).date()
+    if tz is not None and now.tzinfo is not None:
+        now = now.astimezone(tz)
+    return now.date()
+
+def parse_many(texts, now=None, tz=None, default_time=None, max_recurrences=MAX_RECURRENCES):
+    """Parse several expressions against a single reference time, so a
+    batch can't straddle midnight and the shared setup happens once.
+
+    Returns a list in input order holding a ParsedDate for each expression,
+    or the ValueError it raised. default_time (a QUICK_ACCESS_TIMES entry)
+    applies to expressions without a time of their own; one that isn't a
+    valid time is ignored, leaving them date-only (the setting is checked
+    once at startup). An expression producing more than max_recurrences
+    entries is a ValueError."""
+    today = reference_day(now, tz)
+    results = []
+    for text in texts:
+        try:
+            start, rest = parse(text, today, tz, default_time, max_recurrences)
+        except ValueError as e:
+            results.append(e)
+            continue
+        has_time = "T" in start
+        results.append(ParsedDate(text, start, has_time, rest.series.rest(date_only=not has_time, iso=True)))
+    return results
+
+def parse_date(text, now=None, tz=None, default_time=None, max_recurrences=MAX_RECURRENCES):
+    """Parse one expression (see parse_many); raises ValueError."""
+    result = parse_many([text], now, tz, default_time, max_recurrences)[0]
+    if isinstance(result, ValueError):
+        raise result
+    return result
@@ -0,0 +1,36 @@
+import threading
+
+class Deferred:
+    """Stand-in for an object that is slow to build (the Notion client and
+    the HTTP stack it imports). The object is built on first attribute
+    access, or ahead of time on a background thread by start(), and every
+    attribute access is forwarded to it."""
+
+    def __init__(self, build):
+        self._build = build
+        self._value = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._value is None:
+            with self._lock:
+                if self._value is None:
+                    self._value = self._build()
+        return self._value
+
+    def start(self):
+        """Build in the background so the first real use doesn't wait."""
+        def warm():
+            try:
+                self.get()
+            except Exception:
+                pass  # raised again on first use
+        threading.Thread(target=warm, name="warm-up", daemon=True).start()
+        return self
+
+    @property
+    def ready(self):
+        return self._value is not None
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
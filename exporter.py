@@ -0,0 +1,151 @@
+import csv
+import importlib.util
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from propvalues import LIST_TYPES, flat_value
+
+FORMATS = ("csv", "jsonl", "parquet")
+EXTENSIONS = {"csv": ".csv", "jsonl": ".jsonl", "parquet": ".parquet"}
+META_COLUMNS = ("id", "url", "created_time", "last_edited_time")
+
+def parquet_available():
+    """Parquet output needs the optional pyarrow package."""
+    return importlib.util.find_spec("pyarrow") is not None
+
+def flatten(page, columns):
+    row = {"id": page["id"], "url": page.get("url"), "created_time": page.get("created_time"),
+           "last_edited_time": page.get("last_edited_time")}
+    props = page.get("properties", {})
+    for name in columns:
+        row[name] = flat_value(props[name]) if name in props else None
+    return row
+
+def result_pages(query, data_source_id, **body):
+    """Yield each page of query results (a list of pages), requesting the
+    next page while the caller works on the current one. Only two pages
+    are ever held, however large the data source is."""
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        future = pool.submit(query, data_source_id, **body)
+        while future is not None:
+            result = future.result()
+            cursor = result.get("next_cursor")
+            future = None
+            if result.get("has_more") and cursor:
+                future = pool.submit(query, data_source_id, **{**body, "start_cursor": cursor})
+            yield result.get("results", [])
+
+class CsvWriter:
+    def __init__(self, f, columns, schema):
+        self.list_columns = {c for c in columns if schema.get(c, {}).get("type") in LIST_TYPES}
+        self.writer = csv.DictWriter(f, fieldnames=[*META_COLUMNS, *columns])
+        self.writer.writeheader()
+
+    def write(self, rows):
+        for row in rows:
+            for col in self.list_columns:
+                if row[col] is not None:
+                    row[col] = ", ".join(row[col])
+            self.writer.writerow(row)
+
+    def close(self):
+        pass
+
+class JsonlWriter:
+    def __init__(self, f, columns, schema):
+        self.f = f
+
+    def write(self, rows):
+        for row in rows:
+            self.f.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+
+    def close(self):
+        pass
+
+class ParquetWriter:
+    """Columnar output through pyarrow, one row group per `row_group_size`
+    rows so memory stays bounded. Notion's schema doesn't say what a
+    formula returns, so formulas (and other untyped columns) are strings."""
+
+    def __init__(self, f, columns, schema, row_group_size=10000):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        types = {"number": pa.float64(), "checkbox": pa.bool_()}
+        fields = [pa.field(c, pa.string()) for c in META_COLUMNS]
+        for c in columns:
+            kind = schema.get(c, {}).get("type")
+            fields.append(pa.field(c, pa.list_(pa.string()) if kind in LIST_TYPES else types.get(kind, pa.string())))
+        self.pa = pa
+        self.schema = pa.schema(fields)
+        self.text_columns = [f.name for f in fields if f.type == pa.string()]
+        self.writer = pq.ParquetWriter(f, self.schema)
+        self.row_group_size = row_group_size
+        self.buffer = []
+
+    def write(self, rows):
+        for row in rows:
+            for col in self.text_columns:
+                if row[col] is not None and not isinstance(row[col], str):
+                    row[col] = str(row[col])  # a number or boolean formula
+            self.buffer.append(row)
+        if len(self.buffer) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if self.buffer:
+            self.writer.write_table(self.pa.Table.from_pylist(self.buffer, schema=self.schema))
+            self.buffer = []
+
+    def close(self):
+        self._flush()
+        self.writer.close()
+
+WRITERS = {"csv": CsvWriter, "jsonl": JsonlWriter, "parquet": ParquetWriter}
+
+class ExportReport:
+    def __init__(self, path):
+        self.path = path
+        self.started = time.monotonic()
+        self.rows = 0
+        self.requests = 0
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+def export(query, data_source_id, schema, path, fmt, columns=None):
+    """Stream every page of a data source into `path`. `columns` projects
+    the export to those properties (and asks Notion for only those); by
+    default every property is written. The file is replaced only once the
+    export is complete. Returns an ExportReport."""
+    if columns is None:
+        columns = list(schema)
+    columns = [c for c in columns if c in schema]
+    body = {"sorts": [{"timestamp": "created_time", "direction": "ascending"}], "page_size": 100}
+    if len(columns) < len(schema):
+        body["filter_properties"] = [schema[c]["id"] for c in columns if schema[c].get("id")]
+
+    report = ExportReport(path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    mode, kwargs = ("wb", {}) if fmt == "parquet" else ("w", {"newline": "", "encoding": "utf-8"})
+    try:
+        with open(tmp, mode, **kwargs) as f:
+            writer = WRITERS[fmt](f, columns, schema)
+            for pages in result_pages(query, data_source_id, **body):
+                report.requests += 1
+                writer.write([flatten(page, columns) for page in pages])
+                report.rows += len(pages)
+            writer.close()
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return report
@@ -0,0 +1,371 @@
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+
+import httpx
+
+# Mirrors the sample databases in .sample_env.
+SAMPLE_SCHEMAS = {
+    "database_1": {
+        "title": "Database 1",
+        "properties": {
+            "Task name": {"type": "title", "title": {}},
+            "Tags": {"type": "multi_select", "multi_select": {"options": [{"name": "School"}, {"name": "Work"}, {"name": "Personal"}]}},
+            "Status": {"type": "status", "status": {
+                "options": [{"id": "s1", "name": "Not started"}, {"id": "s2", "name": "In progress"}, {"id": "s3", "name": "Done"}],
+                "groups": [
+                    {"name": "To-do", "option_ids": ["s1"]},
+                    {"name": "In progress", "option_ids": ["s2"]},
+                    {"name": "Complete", "option_ids": ["s3"]},
+                ],
+            }},
+            "Due date": {"type": "date", "date": {}},
+            "Priority": {"type": "select", "select": {"options": [{"name": "High"}, {"name": "Medium"}, {"name": "Low"}]}},
+            "Series": {"type": "rich_text", "rich_text": {}},
+        },
+    },
+    "database_2": {
+        "title": "Database 2",
+        "properties": {
+            "Category": {"type": "title", "title": {}},
+            "Tags": {"type": "multi_select", "multi_select": {"options": [{"name": "Reading"}, {"name": "Coding"}]}},
+            "Hours spent": {"type": "number", "number": {"format": "number"}},
+            "Date": {"type": "date", "date": {}},
+        },
+    },
+}
+
+SAMPLE_USERS = [
+    {"name": "Ada Lovelace", "email": "ada@example.com"},
+    {"name": "Grace Hopper", "email": "grace@example.com"},
+    {"name": "Alan Turing", "email": "alan@example.com"},
+]
+
+ROUTES = (
+    ("GET", re.compile(r"^databases/([^/]+)$"), "databases.retrieve"),
+    ("GET", re.compile(r"^data_sources/([^/]+)$"), "data_sources.retrieve"),
+    ("POST", re.compile(r"^data_sources/([^/]+)/query$"), "data_sources.query"),
+    ("POST", re.compile(r"^pages$"), "pages.create"),
+    ("PATCH", re.compile(r"^pages/([^/]+)$"), "pages.update"),
+    ("GET", re.compile(r"^users$"), "users.list"),
+)
+
+EMPTY_VALUES = {"title": [], "rich_text": [], "multi_select": [], "people": [], "relation": [], "checkbox": False}
+
+def now_iso():
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+def plain_text(value):
+    if isinstance(value, list):
+        return "".join(part.get("plain_text") or part.get("text", {}).get("content", "") for part in value)
+    if isinstance(value, dict):
+        return value.get("name") or value.get("start") or ""
+    return "" if value is None else str(value)
+
+class FakeNotion:
+    """In-process stand-in for the Notion API, served through an httpx mock
+    transport so a real notion_client.Client can talk to it.
+
+    Implements databases.retrieve, GET /data_sources/{id}, data source
+    queries, pages.create, pages.update and users.list. Every request sleeps `latency` seconds (plus up
+    to `jitter`), and a `rate_limit_rate` / `error_rate` fraction of requests
+    fail with a 429 (with Retry-After) or a 5xx instead. Thread-safe."""
+
+    def __init__(self, schemas=None, users=None, latency=0.0, jitter=0.0, rate_limit_rate=0.0, error_rate=0.0, retry_after=1.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+
+        self.databases = {}
+        self.data_sources = {}
+        self.pages = {}
+        self.users = []
+        self.calls = Counter()
+        self.injected = Counter()
+        self._lock = threading.Lock()
+
+        for database_id, spec in (SAMPLE_SCHEMAS if schemas is None else schemas).items():
+            self.add_database(database_id, spec["properties"], spec.get("title"))
+        for user in SAMPLE_USERS if users is None else users:
+            self.add_user(user["name"], user.get("email"))
+
+    def add_database(self, database_id, properties, title=None):
+        """Seed a database with a single data source; returns its ID."""
+        data_source_id = str(uuid.uuid4())
+        props = {}
+        for name, prop in properties.items():
+            props[name] = {"id": prop.get("id") or uuid.uuid4().hex[:4], "name": name, **json.loads(json.dumps(prop))}
+        title = title or database_id
+        self.databases[database_id] = {
+            "object": "database",
+            "id": database_id,
+            "title": [{"type": "text", "text": {"content": title}, "plain_text": title}],
+            "data_sources": [{"id": data_source_id, "name": title}],
+        }
+        self.data_sources[data_source_id] = {
+            "object": "data_source",
+            "id": data_source_id,
+            "parent": {"type": "database_id", "database_id": database_id},
+            "title": [{"type": "text", "text": {"content": title}, "plain_text": title}],
+            "properties": props,
+            "last_edited_time": now_iso(),
+        }
+        return data_source_id
+
+    def add_user(self, name, email=None, bot=False):
+        user = {"object": "user", "id": str(uuid.uuid4()), "name": name, "type": "bot" if bot else "person"}
+        if bot:
+            user["bot"] = {}
+        else:
+            user["person"] = {"email": email}
+        self.users.append(user)
+        return user["id"]
+
+    def data_source_of(self, database_id):
+        return self.databases[database_id]["data_sources"][0]["id"]
+
+    def transport(self):
+        return httpx.MockTransport(self.handle)
+
+    def http_client(self):
+        """An httpx.Client to pass as `client=` to notion_client.Client."""
+        return httpx.Client(transport=self.transport())
+
+    def handle(self, request):
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+
+        path = request.url.path.split("/v1/", 1)[-1].strip("/")
+        for method, pattern, name in ROUTES:
+            m = pattern.match(path)
+            if m and request.method == method:
+                break
+        else:
+            return self.error(400, "invalid_request_url", "Invalid request URL.")
+
+        with self._lock:
+            self.calls[name] += 1
+            roll = self.random.random()
+            if roll < self.rate_limit_rate:
+                self.injected["429"] += 1
+                return self.error(429, "rate_limited", "Rate limited.", {"Retry-After": str(self.retry_after)})
+            if roll < self.rate_limit_rate + self.error_rate:
+                status = self.random.choice((500, 502, 503))
+                self.injected[str(status)] += 1
+                return self.error(status, "internal_server_error" if status == 500 else "service_unavailable", "Injected server error.")
+
+            body = json.loads(request.content) if request.content else dict(request.url.params)
+            if request.url.params.get_list("filter_properties"):
+                body["filter_properties"] = request.url.params.get_list("filter_properties")
+            return getattr(self, "_" + name.replace(".", "_"))(*m.groups(), body)
+
+    def error(self, status, code, message, headers=None):
+        body = {"object": "error", "status": status, "code": code, "message": message}
+        return httpx.Response(status, json=body, headers=headers)
+
+    def _databases_retrieve(self, database_id, body):
+        if database_id not in self.databases:
+            return self.error(404, "object_not_found", f"Could not find database with ID: {database_id}.")
+        return httpx.Response(200, json=self.databases[database_id])
+
+    def _data_sources_retrieve(self, data_source_id, body):
+        if data_source_id not in self.data_sources:
+            return self.error(404, "object_not_found", f"Could not find data source with ID: {data_source_id}.")
+        return httpx.Response(200, json=self.data_sources[data_source_id])
+
+    def _data_sources_query(self, data_source_id, body):
+        if data_source_id not in self.data_sources:
+            return self.error(404, "object_not_found", f"Could not find data source with ID: {data_source_id}.")
+        pages = [
+            p for p in self.pages.values()
+            if p["parent"]["data_source_id"] == data_source_id and not p["in_trash"]
+            and matches(p, body.get("filter"))
+        ]
+        for sort in reversed(body.get("sorts") or [{"timestamp": "created_time", "direction": "descending"}]):
+            pages.sort(key=lambda p: sort_key(p, sort), reverse=sort.get("direction") == "descending")
+
+        result = paginate(pages, body)
+        if body.get("filter_properties"):
+            wanted = set(body["filter_properties"])
+            result["results"] = [
+                {**p, "properties": {k: v for k, v in p["properties"].items() if v["id"] in wanted}}
+                for p in result["results"]
+            ]
+        return httpx.Response(200, json=result)
+
+    def _users_list(self, body):
+        return httpx.Response(200, json=paginate(self.users, body))
+
+    def _pages_create(self, body):
+        parent = body.get("parent") or {}
+        data_source = self.data_sources.get(parent.get("data_source_id"))
+        if data_source is None:
+            return self.error(404, "object_not_found", "Could not find data source.")
+        schema = data_source["properties"]
+
+        values = body.get("properties") or {}
+        invalid = self.validate(schema, values)
+        if invalid is not None:
+            return invalid
+
+        page_id = str(uuid.uuid4())
+        stamp = now_iso()
+        page = {
+            "object": "page",
+            "id": page_id,
+            "created_time": stamp,
+            "last_edited_time": stamp,
+            "parent": {"type": "data_source_id", "data_source_id": data_source["id"]},
+            "in_trash": False,
+            "url": f"https://www.notion.so/{page_id.replace('-', '')}",
+            "properties": {name: page_property(prop, values.get(name)) for name, prop in schema.items()},
+        }
+        self.pages[page_id] = page
+        return httpx.Response(200, json=page)
+
+    def _pages_update(self, page_id, body):
+        page = self.pages.get(page_id)
+        if page is None:
+            return self.error(404, "object_not_found", f"Could not find page with ID: {page_id}.")
+        schema = self.data_sources[page["parent"]["data_source_id"]]["properties"]
+
+        values = body.get("properties") or {}
+        invalid = self.validate(schema, values)
+        if invalid is not None:
+            return invalid
+
+        for name, value in values.items():
+            page["properties"][name] = page_property(schema[name], value)
+        for flag in ("in_trash", "archived"):
+            if flag in body:
+                page["in_trash"] = bool(body[flag])
+        page["last_edited_time"] = now_iso()
+        return httpx.Response(200, json=page)
+
+    def validate(self, schema, values):
+        """A 400 response for the first property value Notion would reject,
+        or None. New select/multi_select options are added to the schema."""
+        for name, value in values.items():
+            if name not in schema:
+                return self.error(400, "validation_error", f"{name} is not a property that exists.")
+            prop_type = schema[name]["type"]
+            if prop_type not in value:
+                return self.error(400, "validation_error", f"{name} is expected to be {prop_type}.")
+            if prop_type in ("select", "status", "multi_select"):
+                chosen = value[prop_type] if prop_type == "multi_select" else [value[prop_type]]
+                options = schema[name][prop_type].setdefault("options", [])
+                for opt in chosen:
+                    if not opt or any(o["name"] == opt["name"] for o in options):
+                        continue
+                    # Like Notion, unknown select options are created; status options can't be.
+                    if prop_type == "status":
+                        return self.error(400, "validation_error", f"Invalid status option. Status option \"{opt['name']}\" does not exist.")
+                    options.append({"id": uuid.uuid4().hex[:4], "name": opt["name"]})
+        return None
+
+    def stats(self):
+        return {"calls": dict(self.calls), "injected": dict(self.injected), "pages": len(self.pages)}
+
+def paginate(items, body):
+    start = int(body.get("start_cursor") or 0)
+    size = min(int(body.get("page_size") or 100), 100)
+    more = start + size < len(items)
+    return {
+        "object": "list",
+        "results": items[start:start + size],
+        "has_more": more,
+        "next_cursor": str(start + size) if more else None,
+    }
+
+def page_property(prop, value):
+    """Expand a request property value into the shape Notion returns."""
+    prop_type = prop["type"]
+    out = {"id": prop["id"], "type": prop_type}
+    if value is None:
+        out[prop_type] = EMPTY_VALUES.get(prop_type)
+        return out
+    value = value[prop_type]
+    if prop_type in ("title", "rich_text"):
+        value = [{**part, "type": "text", "plain_text": part.get("text", {}).get("content", "")} for part in value]
+    elif prop_type == "date" and value is not None:
+        value = {"start": value["start"], "end": value.get("end"), "time_zone": value.get("time_zone")}
+    out[prop_type] = value
+    return out
+
+def property_text(page, name):
+    prop = page["properties"].get(name)
+    return plain_text(prop[prop["type"]]) if prop else ""
+
+def parse_time(value):
+    return datetime.fromisoformat(value if "T" in value else value + "T00:00:00+00:00")
+
+def compare(actual, condition, kind):
+    """Evaluate one filter condition such as {"equals": "x"} against the
+    plain value of a property or timestamp."""
+    op, expected = next(iter(condition.items()))
+    if op == "is_empty":
+        return not actual
+    if op == "is_not_empty":
+        return bool(actual)
+    if isinstance(actual, list):
+        names = [a.get("name") or a.get("id") for a in actual]
+        return (expected in names) == (op == "contains")
+    if op in ("on_or_after", "after", "on_or_before", "before", "equals") and kind == "date":
+        if not actual:
+            return False
+        a, e = parse_time(actual), parse_time(expected)
+        if a.tzinfo is None:
+            a = a.replace(tzinfo=timezone.utc)
+        return {"on_or_after": a >= e, "after": a > e, "on_or_before": a <= e, "before": a < e, "equals": a == e}[op]
+    if op == "equals":
+        return actual == expected
+    if op == "does_not_equal":
+        return actual != expected
+    if op == "contains":
+        return str(expected).lower() in str(actual).lower()
+    if op == "does_not_contain":
+        return str(expected).lower() not in str(actual).lower()
+    if op == "starts_with":
+        return str(actual).lower().startswith(str(expected).lower())
+    raise ValueError(f"Unsupported filter condition: {op}")
+
+def matches(page, flt):
+    if not flt:
+        return True
+    if "and" in flt:
+        return all(matches(page, f) for f in flt["and"])
+    if "or" in flt:
+        return any(matches(page, f) for f in flt["or"])
+    if "timestamp" in flt:
+        return compare(page[flt["timestamp"]], flt[flt["timestamp"]], "date")
+
+    prop = page["properties"].get(flt["property"])
+    if prop is None:
+        return False
+    prop_type = prop["type"]
+    condition = next(v for k, v in flt.items() if k != "property")
+    raw = prop[prop_type]
+    if prop_type in ("multi_select", "people", "relation"):
+        return compare(raw, condition, prop_type)
+    if prop_type == "date":
+        return compare(raw["start"] if raw else None, condition, "date")
+    if prop_type in ("number", "checkbox"):
+        return compare(raw, condition, prop_type)
+    return compare(plain_text(raw), condition, prop_type)
+
+def sort_key(page, sort):
+    if "timestamp" in sort:
+        return page[sort["timestamp"]]
+    prop = page["properties"].get(sort["property"])
+    if prop and prop["type"] == "number":
+        return prop["number"] if prop["number"] is not None else float("-inf")
+    return property_text(page, sort["property"])
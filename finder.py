@@ -0,0 +1,65 @@
+from bisect import bisect_left
+
+def fuzzy_span(query, text):
+    """Length of the shortest stretch of text containing query's characters
+    in order, or None if they don't all appear."""
+    best = None
+    start = text.find(query[0])
+    while start != -1:
+        pos = start
+        for ch in query[1:]:
+            pos = text.find(ch, pos + 1)
+            if pos == -1:
+                return best
+        span = pos - start + 1
+        if best is None or span < best:
+            best = span
+        start = text.find(query[0], start + 1)
+    return best
+
+class Finder:
+    """Type-to-filter index over (label, value) pairs.
+
+    Built once, so each keystroke's search is a bisect for prefix matches
+    plus one pass for the rest. Results are ranked: text prefix, then word
+    prefix, then substring, then fuzzy (letters in order, tightest first).
+    `text` picks what to search for each item (default: its label)."""
+
+    def __init__(self, items, text=None):
+        text = text or (lambda item: item[0])
+        pairs = sorted(((text(item).lower(), item) for item in items), key=lambda pair: pair[0])
+        self._keys = [key for key, _ in pairs]
+        self.items = [item for _, item in pairs]
+
+    def __len__(self):
+        return len(self.items)
+
+    def search(self, query, limit=10):
+        q = query.strip().lower()
+        if not q:
+            return self.items[:limit]
+
+        lo = bisect_left(self._keys, q)
+        hi = bisect_left(self._keys, q + "￿", lo)
+        ranked = list(range(lo, min(hi, lo + limit)))
+        if len(ranked) >= limit:
+            return [self.items[i] for i in ranked]
+
+        words, substrings, fuzzy = [], [], []
+        for i, key in enumerate(self._keys):
+            if lo <= i < hi:
+                continue
+            pos = key.find(q)
+            if pos == -1:
+                span = fuzzy_span(q, key)
+                if span is not None:
+                    fuzzy.append((span, i))
+                continue
+            while key[pos - 1].isalnum():
+                later = key.find(q, pos + 1)
+                if later == -1:
+                    break
+                pos = later
+            (substrings if key[pos - 1].isalnum() else words).append(i)
+        ranked += words + substrings + [i for _, i in sorted(fuzzy)]
+        return [self.items[i] for i in ranked[:limit]]
@@ -0,0 +1,149 @@
+import csv
+import json
+import os
+import time
+from collections import Counter
+
+import pipeline
+
+def detect_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    return "jsonl" if ext in (".jsonl", ".ndjson", ".json") else "csv"
+
+class RowError(ValueError):
+    """A line that couldn't be read as a row; `raw` is its text."""
+
+    def __init__(self, message, raw):
+        super().__init__(message)
+        self.raw = raw
+
+def read_rows(path, fmt=None):
+    """Yield (line_number, row) pairs one at a time, so the file is never
+    held in memory. A JSONL line that isn't an object is yielded as a
+    RowError carrying the line."""
+    fmt = fmt or detect_format(path)
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if fmt == "jsonl":
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    yield line_no, RowError(str(e), line.rstrip("\r\n"))
+                    continue
+                yield line_no, row if isinstance(row, dict) else RowError("Row is not a JSON object", line.rstrip("\r\n"))
+        else:
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+
+def read_columns(path, fmt=None):
+    """The columns of a file: the CSV header, or every key used by the
+    objects of a JSONL file (in order of first use), so a sparse or broken
+    first line doesn't hide the rest. JSONL files are read once for this
+    and again for the rows."""
+    fmt = fmt or detect_format(path)
+    if fmt != "jsonl":
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            return csv.DictReader(f).fieldnames or []
+    columns = {}
+    for _, row in read_rows(path, fmt):
+        if isinstance(row, dict):
+            columns.update(dict.fromkeys(row))
+    return list(columns)
+
+def map_columns(columns, properties, schema, overrides=None):
+    """Match file columns to the configured properties by (case-insensitive)
+    name. overrides maps column -> property and wins over name matching."""
+    by_name = {p.lower(): p for p in properties if p in schema}
+    mapping = {}
+    for col in columns:
+        target = (overrides or {}).get(col) or by_name.get(col.strip().lower())
+        if target:
+            mapping[col] = target
+    return mapping
+
+class ImportReport:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.rows = 0
+        self.created = 0
+        self.rejected_rows = 0
+        self.failed_pages = 0
+        self.error_counts = Counter()
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def pages_per_second(self):
+        return self.created / self.elapsed if self.elapsed else 0.0
+
+    def record_error(self, error):
+        self.error_counts[f"{type(error).__name__}: {str(error)[:200]}"] += 1
+
+class RejectWriter:
+    """Appends rejected rows to a JSONL side file, opened on first use."""
+
+    def __init__(self, path):
+        self.path = path
+        self._f = None
+
+    def write(self, line_no, row, error, date=None, raw=None):
+        if self._f is None:
+            self._f = open(self.path, "w", encoding="utf-8")
+        record = {"line": line_no, "error": str(error), "row": row}
+        if raw is not None:
+            record["raw"] = raw
+        if date:
+            record["date"] = date
+        self._f.write(json.dumps(record, default=str) + "\n")
+        self._f.flush()
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+
+def import_rows(rows, build_entries, create_page, concurrency, rejects, entry_date=None, on_error=None):
+    """Stream rows through build_entries (row -> iterable of property dicts)
+    and create_page (props -> page) on a bounded pipeline.
+
+    Rows that fail to build are rejected whole; pages that fail to create are
+    rejected one occurrence at a time. Returns an ImportReport."""
+    report = ImportReport()
+
+    def jobs():
+        for line_no, row in rows:
+            report.rows += 1
+            raw = None
+            if isinstance(row, Exception):
+                entries, error = (), row
+                row, raw = None, getattr(error, "raw", None)
+            else:
+                try:
+                    entries, error = build_entries(row), None
+                except (ValueError, KeyError, TypeError) as e:
+                    entries, error = (), e
+            if error is not None:
+                report.rejected_rows += 1
+                report.record_error(error)
+                rejects.write(line_no, row, error, raw=raw)
+                continue
+            for props in entries:
+                yield line_no, row, props
+
+    def submit(job):
+        return create_page(job[2])
+
+    for (line_no, row, props), page, error in pipeline.imap_bounded(submit, jobs(), concurrency):
+        if error is None:
+            report.created += 1
+            continue
+        report.failed_pages += 1
+        report.record_error(error)
+        rejects.write(line_no, row, error, entry_date(props) if entry_date else None)
+        if on_error:
+            on_error(error)
+
+    return report
@@ -1,19 +1,41 @@
 import sys
 import os
-from notion_client import Client
 from dotenv import load_dotenv
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from concurrent.futures import Future
 from zoneinfo import ZoneInfo
 import styling
+import pipeline
+import schema_cache
+import importer
+import dateparse
+import outbox
+import deferred
+import profiling
+import relations
+import notion_ids
+import propvalues
+import people
+import daemon
+import mirror
+import finder
+import exporter
+import tasksync
+import json
+import queue
+import re
+import argparse
+import atexit
+import importlib
 
-import itertools
 import threading
 import time
 
-import signal
-
 os.environ['PYTHONUNBUFFERED'] = '1'
 
+# Imported on first use, as it pulls in the HTTP stack.
+notion_api = deferred.Deferred(lambda: importlib.import_module("notion_api"))
+
 # def spinner(message="Working"):
 #     stop = False
 
@@ -53,6 +75,8 @@ def load_databases_from_env():
         db_id = os.getenv(f"{prefix}_ID")
         props_raw = os.getenv(f"{prefix}_PROPS", "")
         allow_time = os.getenv(f"{prefix}_ALLOW_TIME", "true").lower() == "true"
+        date_prop = os.getenv(f"{prefix}_DATE_PROP")
+        series_prop = os.getenv(f"{prefix}_SERIES_PROP")
 
         if not label or not db_id:
             print(styling.warn(f"Skipping database '{name}' (missing LABEL or ID)"))
@@ -65,22 +89,56 @@ def load_databases_from_env():
             "id": db_id,
             "properties": properties,
             "allow_time": allow_time,
+            "date_prop": date_prop,
+            "series_prop": series_prop,
         }
     
     return databases
 
-def resolve_data_source(database_id):
-    db = notion.databases.retrieve(database_id)
-    data_sources = db.get("data_sources", [])
-    if not data_sources:
-        raise ValueError(f"Database {database_id} has no data sources.")
-    data_source_id = data_sources[0]["id"]
+def resolve_data_source(database_id, refresh=False):
+    with profiling.span("resolve_data_source") as phase:
+        if not refresh:
+            cached = SCHEMA_CACHE.get(database_id)
+            if cached:
+                phase["cached"] = True
+                return cached["data_source_id"], cached["properties"]
+
+        db = notion.databases.retrieve(database_id)
+        data_sources = db.get("data_sources", [])
+        if not data_sources:
+            raise ValueError(f"Database {database_id} has no data sources.")
+        data_source_id = data_sources[0]["id"]
+
+        ds = notion.request(
+            method="GET",
+            path=f"/data_sources/{data_source_id}"
+        )
+        SCHEMA_CACHE.put(database_id, data_source_id, ds["properties"], ds.get("last_edited_time"))
+        return data_source_id, ds["properties"]
 
-    ds = notion.request(
-        method="GET",
-        path=f"/data_sources/{data_source_id}"
-    )
-    return data_source_id, ds["properties"]
+def prefetch_schemas(databases):
+    futures = {key: Future() for key in databases}
+
+    def fetch(key):
+        try:
+            futures[key].set_result(resolve_data_source(databases[key]["id"]))
+        except Exception as e:
+            futures[key].set_exception(e)
+
+    for key in databases:
+        threading.Thread(target=fetch, args=(key,), daemon=True).start()
+    return futures
+
+def series_property(db, schema):
+    """The text property a database stamps series IDs into, if configured
+    and present in the schema."""
+    name = db.get("series_prop")
+    if not name:
+        return None
+    if schema.get(name, {}).get("type") != "rich_text":
+        print(styling.warn(f"{db['label']}: SERIES_PROP '{name}' is not a text property; series IDs won't be stamped."))
+        return None
+    return name
 
 def pick_timezone():
     if not TIMEZONE_CHOICES:
@@ -96,396 +154,110 @@ def pick_timezone():
     print(styling.warn("Invalid choice, using default."))
     return DEFAULT_TZ
 
-def format_date_input(user_input: str, allow_time=True, tz=None):
-    import re
-    import calendar
-
+def format_date_input(user_input: str, allow_time=True, tz=None, now=None):
+    """Prompt-side wrapper around dateparse.parse_date: asks for a
+    quick-access time when the expression has none. `now` is the reference
+    time (default: the current time in tz)."""
     if not user_input.strip():
         return None
 
-    def parse_recurrence(parts):
-        if not parts:
-            return None, None, parts
-
-        last = parts[-1].lower()
-        if last in ("repeat", "r"):
-            return "repeat", 1, parts[:-1]
-
-        m = re.match(r"^(\d+)([dw])$", last)
-        if m:
-            count = int(m.group(1))
-            unit = m.group(2)
-            delta = timedelta(days=1) if unit == "d" else timedelta(weeks=1)
-            return "count", (count, delta), parts[:-1]
-
-        dow_pattern = r"^([mtwrfsu]+)(\d+)w$"
-        m = re.match(dow_pattern, last)
-        if m:
-            dow_str = m.group(1)
-            weeks = int(m.group(2))
-            return "dow", (dow_str, weeks), parts[:-1]
-
-        for idx in range(len(parts) - 1, -1, -1):
-            if parts[idx].lower() in ("d", "w"):
-                unit = parts[idx].lower()
-                end_date_tokens = parts[idx + 1:]
-                parts = parts[:idx]
-                return "until", (timedelta(days=1) if unit == "d" else timedelta(weeks=1), end_date_tokens), parts
-        
-        for idx in range(len(parts) - 1, -1, -1):
-            if re.match(r"^[mtwrfsu]+$", parts[idx].lower()):
-                dow_str = parts[idx].lower()
-                end_date_tokens = parts[idx + 1:]
-                parts = parts[:idx]
-                return "dow_until", (dow_str, end_date_tokens), parts
-
-        return None, None, parts
-
-    def parse_end_date(tokens):
-        if not tokens:
-            return None
-
-        result = format_date_input(" ".join(tokens), allow_time=False, tz=tz)
-        start = result["date"]["start"]
-
-        if "T" in start:
-            return datetime.fromisoformat(start)
-        else:
-            return datetime.fromisoformat(start + "T00:00:00")
-
-    parts = user_input.strip().split()
-    recurrence_mode, recurrence_info, parts = parse_recurrence(parts)
-
-    if not parts:
-        parts = ["today"]
-    
-    date_part = parts[0]
-    time_part = " ".join(parts[1:]) if len(parts) > 1 else None
-
-    now = datetime.now()
-    dt = None
-
-    tokens = [p.lower() for p in parts]
-    weekdays_map = {day.lower(): i for i, day in enumerate(calendar.day_name)}
-    aliases = {
-        "mon": "monday",
-        "tue": "tuesday", "tues": "tuesday",
-        "wed": "wednesday", "weds": "wednesday",
-        "thu": "thursday", "thur": "thursday", "thurs": "thursday",
-        "fri": "friday",
-        "sat": "saturday",
-        "sun": "sunday",
-    }
-
-    def norm_weekday(tok: str):
-        return aliases.get(tok.lower(), tok.lower())
-
-    consumed = 0
-
-    if tokens:
-        if tokens[0] in ("today",):
-            dt = now.replace(hour=0, minute=0, second=0, microsecond=0)
-            consumed = 1
-        elif tokens[0] in ("tomorrow",):
-            dt = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
-            consumed = 1
-        elif tokens[0] in ("yesterday",):
-            dt = (now - timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
-            consumed = 1
-
-        elif tokens[0] in ("this", "next") and len(tokens) >= 2:
-            wd_full = norm_weekday(tokens[1])
-            if wd_full in weekdays_map:
-                target = weekdays_map[wd_full]
-                today = now.weekday()
-
-                if tokens[0] == "this":
-                    start_of_week = now - timedelta(days=today)
-                    candidate = start_of_week + timedelta(days=target)
-                    if candidate.date() < now.date():
-                        candidate += timedelta(weeks=1)
-                    dt = candidate
-
-                else:
-                    start_of_next_week = now - timedelta(days=today) + timedelta(weeks=1)
-                    dt = start_of_next_week + timedelta(days=target)
-
-                dt = dt.replace(hour=0, minute=0, second=0, microsecond=0)
-                consumed = 2
-
-        elif norm_weekday(tokens[0]) in weekdays_map:
-            wd_full = norm_weekday(tokens[0])
-            target = weekdays_map[wd_full]
-            today = now.weekday()
-            days_ahead = (target - today) % 7
-            dt = (now + timedelta(days=days_ahead)).replace(hour=0, minute=0, second=0, microsecond=0)
-            consumed = 1
-
-    if dt is not None:
-        remainder = " ".join(parts[consumed:]).strip()
-        time_part = remainder if remainder else None
-
-    if dt is None and date_part.isdigit():
-        year_explicit = False
-
-        if len(date_part) == 3:
-            month = int(date_part[0])
-            day = int(date_part[1:])
-            year = now.year
-        
-        elif len(date_part) == 4:
-            month = int(date_part[:2])
-            day = int(date_part[2:])
-            year = now.year
-
-        elif len(date_part) == 6:
-            month = int(date_part[:2])
-            day = int(date_part[2:4])
-            yy = int(date_part[4:])
-            year = 2000 + yy if yy <= 69 else 1900 + yy
-            year_explicit = True
-        
-        elif len(date_part) == 8:
-            month = int(date_part[:2])
-            day = int(date_part[2:4])
-            year = int(date_part[4:])
-            year_explicit = True
-        
-        else:
-            month = day = year = None
-        
-        if month and day and year:
-            dt = datetime(year, month, day)
-
-            if not year_explicit and dt.date() < now.date():
-                dt = dt.replace(year = now.year + 1)
-
-    if dt is None:
-        for fmt in ("%Y-%m-%d", "%m-%d"):
-            try:
-                dt = datetime.strptime(date_part, fmt)
-                if fmt == "%m-%d":
-                    dt = dt.replace(year=now.year)
-                    if dt.date() < now.date():
-                        dt = dt.replace(year = now.year + 1)
-                break
-            except ValueError:
-                continue
-
-    if dt is None:
-        raise ValueError("Invalid date. Examples: '2025-08-17', '08-17', '817', '0817', '011726', or '01172026'; also 'today', 'tuesday', 'this fri', 'next wed'.")
-
-    def build_recurrences(dt):
-        if not recurrence_mode:
-            return [dt]
-
-        if recurrence_mode == "repeat":
-            return [dt, dt + timedelta(weeks=1)]
-
-        if recurrence_mode == "count":
-            count, delta = recurrence_info
-            return [dt + i * delta for i in range(count)]
+    now = now or datetime.now(tz)
+    default_time = None
 
-        if recurrence_mode == "dow":
-            dow_str, weeks = recurrence_info
-            dow_map = {"m": 0, "t": 1, "w": 2, "r": 3, "f": 4, "s": 5, "u": 6}
-            
-            target_days = []
-            for c in dow_str:
-                if c in dow_map:
-                    target_days.append(dow_map[c])
-            
-            if not target_days:
-                return [dt]
-            
-            target_days = sorted(set(target_days))
-            
-            dates = []
-            current_date = dt.date()
-            
-            for week_offset in range(weeks):
-                for target_day in target_days:
-                    days_ahead = (target_day - dt.weekday()) % 7
-                    if week_offset == 0 and days_ahead == 0:
-                        days_ahead = 0
-                    candidate_date = current_date + timedelta(days=days_ahead + (week_offset * 7))
-                    
-                    if candidate_date >= current_date:
-                        candidate = datetime.combine(candidate_date, datetime.min.time())
-                        candidate = candidate.replace(hour=dt.hour, minute=dt.minute, second=dt.second, microsecond=dt.microsecond, tzinfo=dt.tzinfo)
-                        dates.append(candidate)
-            
-            return dates
-
-        if recurrence_mode == "dow_until":
-            dow_str, end_tokens = recurrence_info
-            dow_map = {"m": 0, "t": 1, "w": 2, "r": 3, "f": 4, "s": 5, "u": 6}
-            
-            target_days = []
-            for c in dow_str:
-                if c in dow_map:
-                    target_days.append(dow_map[c])
-            
-            if not target_days:
-                return [dt]
-            
-            target_days = sorted(set(target_days))
-            
-            end_dt = parse_end_date(end_tokens)
-            if not end_dt:
-                return [dt]
-            
-            MAX_RECURRENCES = 200
-            dates = []
-            current_date = dt.date()
-            week_offset = 0
-            
-            while True:
-                for target_day in target_days:
-                    days_ahead = (target_day - dt.weekday()) % 7
-                    if week_offset == 0 and days_ahead == 0:
-                        days_ahead = 0
-                    candidate_date = current_date + timedelta(days=days_ahead + (week_offset * 7))
-                    
-                    if candidate_date > end_dt.date():
-                        return dates
-                    
-                    if candidate_date >= current_date:
-                        if len(dates) >= MAX_RECURRENCES:
-                            raise ValueError(f"Recurrence exceeds {MAX_RECURRENCES} entries.")
-                        candidate = datetime.combine(candidate_date, datetime.min.time())
-                        candidate = candidate.replace(hour=dt.hour, minute=dt.minute, second=dt.second, microsecond=dt.microsecond, tzinfo=dt.tzinfo)
-                        dates.append(candidate)
-                
-                week_offset += 1
-                if week_offset > 100:
-                    return dates
-            
-            return dates
-
-        if recurrence_mode == "until":
-            delta, end_tokens = recurrence_info
-            end_dt = parse_end_date(end_tokens)
-
-            if not end_dt:
-                return [dt]
-
-            MAX_RECURRENCES = 200
-            dates = []
-            cur = dt
-            while cur.date() <= end_dt.date():
-                if len(dates) >= MAX_RECURRENCES:
-                    raise ValueError(
-                        f"Recurrence exceeds {MAX_RECURRENCES} entries."
-                    )
-                dates.append(cur)
-                cur += delta
-            return dates
-
-        return [dt]
-
-    had_explicit_time = False
-
-    if time_part:
-        for time_fmt in ("%H:%M", "%I:%M %p"):
-            try:
-                t = datetime.strptime(time_part, time_fmt)
-                dt = dt.replace(hour=t.hour, minute=t.minute, tzinfo=tz)
-                had_explicit_time = True
-
-                dates = build_recurrences(dt)
-                return {
-                    "date": {"start": dates[0].isoformat()},
-                    "_recurrences": dates[1:]
-                }
-            except ValueError:
-                pass
-
-        m = re.match(r"^\s*(\d{1,4})\s*(am|pm|AM|PM)?\s*$", time_part)
-        if m:
-            digits = m.group(1)
-            ampm = (m.group(2) or "").lower()
-
-            if len(digits) in (3, 4):
-                hour = int(digits[:-2])
-                minute = int(digits[-2:])
-            elif len(digits) in (1, 2):
-                hour = int(digits)
-                minute = 0
-            else:
-                raise ValueError("Time too long. Use up to 4 digits, e.g. '232' or '1259'.")
-
-            if not (0 <= minute <= 59):
-                raise ValueError("Minute must be 00–59.")
-            if ampm:
-                if not (1 <= hour <= 12):
-                    raise ValueError("Hour must be 1–12 when using AM/PM.")
-                if ampm == "am":
-                    hour = 0 if hour == 12 else hour
-                else:
-                    hour = 12 if hour == 12 else hour + 12
-            else:
-                if not (0 <= hour <= 23):
-                    raise ValueError("Hour must be 00–23 for 24-hour times.")
-
-            dt = dt.replace(hour=hour, minute=minute, tzinfo=tz)
-            had_explicit_time = True
-            dates = build_recurrences(dt)
-            return {
-                "date": {"start": dates[0].isoformat()},
-                "_recurrences": dates[1:]
-            }
-
-        raise ValueError(
-            "Invalid time. Examples: '14:30', '2:30 PM', '232', '1259', or '232 PM'."
-        )
-
-    if allow_time and QUICK_ACCESS_TIMES:
+    if allow_time and QUICK_ACCESS_TIMES and not dateparse.has_time(user_input, dateparse.reference_day(now, tz)):
         print("\nChoose a hardcoded time or leave blank for no time:")
         for i, t in enumerate(QUICK_ACCESS_TIMES, 1):
             print(f"[{i}] {t}")
         choice = input("Enter number or blank: ").strip()
         if choice.isdigit() and 1 <= int(choice) <= len(QUICK_ACCESS_TIMES):
-            t_str = QUICK_ACCESS_TIMES[int(choice) - 1]
-            for time_fmt in ("%H:%M", "%I:%M %p"):
-                try:
-                    t = datetime.strptime(t_str, time_fmt)
-                    dt = dt.replace(hour=t.hour, minute=t.minute, tzinfo=tz)
-                    dates = build_recurrences(dt)
-                    return {
-                        "date": {"start": dates[0].isoformat()},
-                        "_recurrences": dates[1:]
-                    }
-                except ValueError:
-                    continue
+            default_time = QUICK_ACCESS_TIMES[int(choice) - 1]
 
-        dates = build_recurrences(dt)
-        return {
-            "date": {"start": dates[0].date().isoformat()},
-            "_recurrences": [d.date().isoformat() for d in dates[1:]]
-        }
-    
-    dates = build_recurrences(dt)
+    with profiling.span("format_date_input", local=True):
+        parsed = dateparse.parse_date(user_input, now, tz, default_time, MAX_RECURRENCES)
     return {
-        "date": {"start": dates[0].date().isoformat()},
-        "_recurrences": [d.date().isoformat() for d in dates[1:]]
+        "date": {"start": parsed.start},
+        "_recurrences": parsed.rest
     }
 
-def choose_from_options(options, multi=False):
-    for i, opt in enumerate(options, 1):
-        print(f"[{i}] {opt}")
-    choice = input("Choose: ").strip()
-    if not choice:
-        return [] if multi else None
-    if multi:
-        indices = [int(c.strip()) for c in choice.split(",") if c.strip().isdigit()]
-        return [options[i-1] for i in indices if 1 <= i <= len(options)]
-    else:
-        if choice.isdigit():
-            idx = int(choice)
-            if 1 <= idx <= len(options):
-                return options[idx-1]
-        return None
+# Option lists up to this long are printed in full; longer ones are filtered.
+SHOW_ALL_OPTIONS = 15
+# Seconds to wait without any entry of a batch finishing before leaving the
+# rest to the outbox (another process may hold them).
+WAIT_TIMEOUT = outbox.LEASE
+OPTION_INDEXES = {}
+
+def option_index(prop_info):
+    """Type-to-filter index over a select, multi_select or status
+    property's options. Built once per schema: a refreshed schema gets a
+    new index."""
+    options = prop_info[prop_info["type"]].get("options", [])
+    cached = OPTION_INDEXES.get(id(options))
+    if cached is None or cached[0] is not options or cached[1] != len(options):
+        cached = (options, len(options), finder.Finder([(o["name"], o["name"]) for o in options]))
+        OPTION_INDEXES[id(options)] = cached
+    return cached[2]
+
+def find_option(index, text):
+    """The option a typed name picks: an exact (case-insensitive) match, or
+    the only option it is a prefix of. Returns (name or None, the search
+    hits for `text`)."""
+    hits = index.search(text, 10)
+    exact = [v for label, v in hits if label.lower() == text.lower()]
+    prefixed = [v for label, v in hits if label.lower().startswith(text.lower())]
+    if exact or len(prefixed) == 1:
+        return (exact or prefixed)[0], hits
+    return None, hits
+
+def choose_from_options(prop_info, multi=False):
+    """Pick options by typing their names (or any unique prefix),
+    comma-separated for multi_select. Anything else is searched and the
+    matches listed; numbers pick from the list last shown. '+Name' picks a
+    new select/multi_select option, which Notion creates with the page; the
+    schema itself is left alone. Returns the chosen name (or names, when
+    multi)."""
+    index = option_index(prop_info)
+    can_create = prop_info["type"] != "status"
+    options = prop_info[prop_info["type"]].get("options", [])
+    shown = [(o["name"], o["name"]) for o in options] if len(options) <= SHOW_ALL_OPTIONS else []
+    for i, (name, _) in enumerate(shown, 1):
+        print(f"[{i}] {name}")
+    if not shown:
+        print(styling.dim(f"Type part of a name to filter {len(index)} options{', or +Name to add one' if can_create else ''}."))
+
+    chosen = []
+    while True:
+        text = input("Choose (blank when done): " if chosen else "Choose: ").strip()
+        if not text:
+            return chosen if multi else None
+        picks, results, unmatched = [], [], None
+        for part in split_values(text) if multi else [text]:
+            if part.isdigit() and 1 <= int(part) <= len(shown):
+                picks.append(shown[int(part) - 1][1])
+                continue
+            if can_create and part.startswith("+") and part[1:].strip():
+                name = part[1:].strip()
+                hits = [v for label, v in index.search(name, 1) if label.lower() == name.lower()]
+                picks.append(hits[0] if hits else name)
+                continue
+            name, hits = find_option(index, part)
+            if name is not None:
+                picks.append(name)
+            else:
+                results, unmatched = hits, part
+
+        if picks and not multi:
+            return picks[0]
+        if picks:
+            chosen += [p for p in picks if p not in chosen]
+            print(styling.ok("Selected: " + ", ".join(chosen)))
+        if results:
+            shown = results
+            for i, (name, _) in enumerate(shown, 1):
+                print(f"[{i}] {name}")
+            print(styling.dim("Enter a number, or type more to narrow it down."))
+        elif unmatched is not None:
+            hint = f" Enter +{unmatched} to add it as a new option." if can_create else ""
+            print(styling.warn(f"No options match '{unmatched}'.{hint}"))
 
 def prompt_for_property(prop_name, prop_info, allow_time, tz):
     prop_type = prop_info["type"]
@@ -495,46 +267,49 @@ def prompt_for_property(prop_name, prop_info, allow_time, tz):
         user_input = input(f"{prop_name} (title): ").strip()
         if not user_input:
             return None
-        return {"title": [{"text": {"content": user_input}}]}
+        return build_property_value(prop_info, user_input, tz)
 
     print(f"\n{styling.h(f'{prop_name}')} {styling.dim(f'({prop_type})')}")
 
     if prop_type in ("select", "multi_select", "status"):
-        options = [opt["name"] for opt in prop_info[prop_type].get("options", [])]
-        choice = choose_from_options(options, multi=(prop_type == "multi_select"))
+        choice = choose_from_options(prop_info, multi=(prop_type == "multi_select"))
         if not choice:
             return None
-        if prop_type == "select":
-            return {"select": {"name": choice}}
-        elif prop_type == "multi_select":
-            return {"multi_select": [{"name": v} for v in choice]}
-        elif prop_type == "status":
-            return {"status": {"name": choice}}
+        # New options are validated against a copy, so one picked for an
+        # entry that is then cancelled never reaches the cached schema.
+        options = prop_info[prop_type].get("options", [])
+        known = {o["name"] for o in options}
+        new = [{"name": n} for n in (choice if isinstance(choice, list) else [choice]) if n not in known]
+        if new:
+            prop_info = {**prop_info, prop_type: {**prop_info[prop_type], "options": options + new}}
+        return build_property_value(prop_info, choice, tz)
 
     elif prop_type == "date":
-        print(styling.dim("Enter a date (examples: '2025-08-17 11:59 PM', '08-17', '0817 1159 PM')"))
-        print(styling.dim("Shortcuts: 'today', 'tomorrow', 'this tue', 'next fri'"))
-        print(styling.dim("Recurrence: 'mwf3w' (Mon/Wed/Fri for 3 weeks), 'tr2w' (Tue/Thu for 2 weeks)"))
-        while True:
-            user_input = input("Date: ").strip()
-            if not user_input:
-                return None
-            try:
-                return format_date_input(user_input, allow_time=allow_time, tz=tz)
-            except ValueError as e:
-                print(styling.err(f"{e}. Try again."))
+        return prompt_for_date(prop_info, allow_time, tz)[1]
 
     elif prop_type == "people":
-        user_input = input("Enter Notion user ID: ").strip()
-        if not user_input:
+        USERS.refresh_in_background()
+        note = " (refreshing)" if USERS.refreshing() else ""
+        print(styling.dim(f"Type the start of a name or email to search {len(USERS)} people{note}, or paste a user ID."))
+        chosen = pick_with_search(USERS.search)
+        if not chosen:
             return None
-        return {"people": [{"id": user_input}]}
+        return build_property_value(prop_info, chosen, tz)
 
     elif prop_type == "relation":
-        user_input = input("Enter related page ID: ").strip()
-        if not user_input:
+        target = prop_info["relation"].get("data_source_id")
+        if not target:
+            user_input = input("Enter related page ID: ").strip()
+            if not user_input:
+                return None
+            return build_property_value(prop_info, user_input, tz)
+        index = RELATIONS.index(target)
+        note = " (still syncing)" if RELATIONS.syncing(target) else ""
+        print(styling.dim(f"Type part of a page title to search {len(index)} pages{note}, or paste a page ID."))
+        chosen = pick_with_search(index.search)
+        if not chosen:
             return None
-        return {"relation": [{"id": user_input}]}
+        return build_property_value(prop_info, chosen, tz)
 
     elif prop_type == "number":
         while True:
@@ -542,33 +317,180 @@ def prompt_for_property(prop_name, prop_info, allow_time, tz):
             if not user_input:
                 return None
             try:
-                return {"number": float(user_input)}
-            except ValueError:
-                print(styling.err("Invalid number."))
+                return build_property_value(prop_info, user_input, tz)
+            except ValueError as e:
+                print(styling.err(str(e)))
     else:
         print(styling.warn(f"Skipping unsupported type: {prop_type}"))
         return None
 
+def prompt_for_date(prop_info, allow_time, tz, now=None):
+    """Ask for a date expression until one parses. Returns (text, value),
+    or (None, None) when left blank."""
+    print(styling.dim("Enter a date (examples: '2025-08-17 11:59 PM', '08-17', '0817 1159 PM')"))
+    print(styling.dim("Shortcuts: 'today', 'tomorrow', 'this tue', 'next fri'"))
+    print(styling.dim("Recurrence: 'mwf3w' (Mon/Wed/Fri for 3 weeks), 'tr2w' (Tue/Thu for 2 weeks)"))
+    print(styling.dim("Limits: 'w 12-20 10x' (at most 10 entries), '... except 11-27, 12-25' (skip dates)"))
+    while True:
+        user_input = input("Date: ").strip()
+        if not user_input:
+            return None, None
+        try:
+            return user_input, build_property_value(prop_info, user_input, tz, allow_time=allow_time, now=now)
+        except ValueError as e:
+            print(styling.err(f"{e}. Try again."))
+
+def pick_with_search(search):
+    """Type-to-search picker over a local index; search(text) returns
+    [(label, id)]. Returns the chosen IDs. Pasted Notion IDs are accepted
+    as-is."""
+    chosen = []
+    results = []
+    while True:
+        text = input("Search (blank when done): " if chosen else "Search: ").strip()
+        if not text:
+            return [page_id for _, page_id in chosen]
+        if results and all(c.strip().isdigit() for c in text.split(",") if c.strip()):
+            picks = [results[int(c) - 1] for c in text.split(",") if c.strip().isdigit() and 1 <= int(c) <= len(results)]
+            chosen += [p for p in picks if p not in chosen]
+            print(styling.ok("Selected: " + ", ".join(title for title, _ in chosen)))
+            results = []
+            continue
+        if notion_ids.looks_like_id(text):
+            chosen.append((text, text))
+            continue
+        results = search(text)
+        if not results:
+            print(styling.warn("No matches."))
+            continue
+        for i, (title, _) in enumerate(results, 1):
+            print(f"[{i}] {title}")
+        print(styling.dim("Enter numbers to select (comma-separated), or type to search again."))
+
+def sync_pickers(schema, full=False):
+    """Refresh, in the background, the mirrors of every data source this
+    schema's relation properties point to, and the user directory if it has
+    people properties and is stale (or full is set)."""
+    for prop in schema.values():
+        if prop["type"] == "relation" and prop["relation"].get("data_source_id"):
+            RELATIONS.sync_in_background(prop["relation"]["data_source_id"], full)
+        elif prop["type"] == "people":
+            USERS.refresh_in_background(force=full)
+
+SUPPORTED_TYPES = ("title", "select", "multi_select", "status", "date", "people", "relation", "number")
+
+def split_values(value):
+    if isinstance(value, (list, tuple)):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [v.strip() for v in str(value).split(",") if v.strip()]
+
+def match_option(prop_info, name, abbreviated=False):
+    """The option named `name` (case-insensitively). With abbreviated, a
+    unique prefix picks an option too, as in the interactive picker."""
+    prop_type = prop_info["type"]
+    if abbreviated:
+        picked, hits = find_option(option_index(prop_info), name)
+        if picked is not None:
+            return picked
+        several = [label for label, _ in hits if label.lower().startswith(name.lower())]
+        if several:
+            raise ValueError(f"'{name}' matches several {prop_type} options: {', '.join(several)}")
+    for opt in prop_info[prop_type].get("options", []):
+        if opt["name"].lower() == name.lower():
+            return opt["name"]
+    raise ValueError(f"'{name}' is not a {prop_type} option")
+
+def build_property_value(prop_info, value, tz, allow_time=False, now=None, abbreviated=False):
+    """Turn a user-supplied value (a string, or a list of names for
+    multi_select) into a Notion property payload. Dates are resolved against
+    `now` (default: the current time); with abbreviated, option names may be
+    unique prefixes. Raises ValueError when the value doesn't fit the
+    property."""
+    prop_type = prop_info["type"]
+
+    if prop_type == "title":
+        return {"title": [{"text": {"content": str(value)}}]}
+
+    elif prop_type in ("select", "status"):
+        return {prop_type: {"name": match_option(prop_info, str(value).strip(), abbreviated)}}
+
+    elif prop_type == "multi_select":
+        return {"multi_select": [{"name": match_option(prop_info, v, abbreviated)} for v in split_values(value)]}
+
+    elif prop_type == "date":
+        return format_date_input(str(value), allow_time=allow_time, tz=tz, now=now)
+
+    elif prop_type in ("people", "relation"):
+        return {prop_type: [{"id": v} for v in split_values(value)]}
+
+    elif prop_type == "number":
+        try:
+            return {"number": float(value)}
+        except (TypeError, ValueError):
+            raise ValueError("Invalid number.")
+
+    raise ValueError(f"Unsupported property type: {prop_type}")
+
+def row_properties(row, mapping, schema, tz, now, clear_empty=False):
+    """The Notion payload of one file row (mapping is column -> property)
+    and the recurrence dates of its date, if any. Empty cells are left out,
+    or clear their property with clear_empty. Raises ValueError for a value
+    that doesn't fit its property."""
+    notion_props, recurrences = {}, []
+    for col, prop_name in mapping.items():
+        prop_type = schema[prop_name]["type"]
+        value = row.get(col)
+        if value is None or value == "" or value == []:
+            if clear_empty and prop_type in tasksync.CLEARED:
+                notion_props[prop_name] = tasksync.CLEARED[prop_type]
+            continue
+        if isinstance(value, (dict, list)) and prop_type not in ("multi_select", "people", "relation"):
+            raise ValueError(f"{col} takes a single value")
+        notion_props[prop_name] = build_property_value(schema[prop_name], value, tz, now=now)
+        if "_recurrences" in notion_props[prop_name]:
+            recurrences = notion_props[prop_name].pop("_recurrences")
+    return notion_props, recurrences
+
 def summarize_task(properties):
     print(f"\n{styling.h('Task Summary')}")
     for k, v in properties.items():
-        if "title" in v:
-            print(f"{styling.dim(k)}: {v['title'][0]['text']['content']}")
-        elif "select" in v:
-            print(f"{styling.dim(k)}: {v['select']['name']}")
-        elif "status" in v:
-            print(f"{styling.dim(k)}: {v['status']['name']}")
-        elif "multi_select" in v:
-            vals = [opt["name"] for opt in v["multi_select"]]
-            print(f"{styling.dim(k)}: {', '.join(vals)}")
-        elif "date" in v:
-            print(f"{styling.dim(k)}: {v['date']['start']}")
-        elif "number" in v:
-            print(f"{styling.dim(k)}: {v['number']}")
-        else:
-            print(f"{styling.dim(k)}: [set]")
+        value = propvalues.text_value(v)
+        print(f"{styling.dim(k)}: {value if value is not None else '(empty)'}")
+
+def create_page(data_source_id, props):
+    return notion.pages.create(
+        parent={
+            "type": "data_source_id",
+            "data_source_id": data_source_id
+        },
+        properties=props
+    )
+
+def iter_entry_payloads(notion_props, recurrences):
+    yield notion_props
 
-def interactive_add_task(data_source_id, schema, PROPERTIES, db_label, allow_time, tz):
+    for dt in recurrences:
+        dup_props = {}
+
+        for k, v in notion_props.items():
+            if "date" in v:
+                dup_props[k] = {
+                    "date": {
+                        "start": dt
+                    }
+                }
+            else:
+                dup_props[k] = v
+
+        yield dup_props
+
+def entry_date(props):
+    for v in props.values():
+        if v.get("date"):
+            return v["date"]["start"]
+    return "no date"
+
+def interactive_add_task(data_source_id, schema, PROPERTIES, db_label, allow_time, tz, series_prop=None):
     
     properties = schema
 
@@ -590,58 +512,1182 @@ def interactive_add_task(data_source_id, schema, PROPERTIES, db_label, allow_tim
             break
     
     total = 1 + len(recurrences)
-    print(f"""\n{styling.dim(f"This will create {total} {'entry' if total == 1 else 'entries'}.")}""")
+    with profiling.span("build_payloads", local=True, entries=total):
+        existing = len(OUTBOX.existing_keys(
+            outbox.idempotency_key(data_source_id, props) for props in iter_entry_payloads(notion_props, recurrences)
+        ))
+    print(f"""\n{styling.dim(f"This will create {total - existing} {'entry' if total - existing == 1 else 'entries'}.")}""")
+    if existing:
+        print(styling.warn(f"{existing} of {total} already exist or are queued from an earlier batch and will be skipped (a = create them anyway)."))
     confirm = input("Continue? (y/n): ").strip().lower()
-    if confirm not in ("y", "yes"):
+    if confirm not in ("y", "yes", "a"):
         print(styling.warn("Cancelled."))
-        return
-    
-    pages = []
+        return False
+    skip_existing = confirm != "a"
+    if skip_existing and existing == total:
+        print(styling.warn("Nothing new to create."))
+        return False
+    total = total - existing if skip_existing else total
+    batch_id = outbox.new_batch_id()
+    payloads = iter_entry_payloads(notion_props, recurrences)
+
+    if BACKGROUND_SUBMIT:
+        title = entry_title(notion_props)
+        tracker = outbox.Tracker(
+            OUTBOX_WORKER,
+            on_done=lambda t: NOTICES.put(submission_notice(t, title, db_label, batch_id)),
+        )
+        with profiling.span("enqueue", local=True, entries=total):
+            ids, _ = OUTBOX.enqueue(data_source_id, db_label, payloads, batch_id, skip_existing, series_prop)
+        OUTSTANDING.add(tracker)
+        tracker.track(ids)
+        OUTBOX_WORKER.wake()
+        summarize_task(notion_props)
+        noun = "entry" if total == 1 else "entries"
+        print(f"\n{styling.dim(f'Queued {total} {noun}; a notice will appear here when it finishes.')}")
+        return False
 
     stop_spinner = spinner(f"Creating {'entry' if total == 1 else 'entries'}...")
 
+    tracker = outbox.Tracker(OUTBOX_WORKER)
     try:
-        first_page = notion.pages.create(
-            parent={
-                "type": "data_source_id",
-                "data_source_id": data_source_id
-            },
-            properties=notion_props
-        )
-        pages.append(first_page)
-
-        for dt in recurrences:
-            dup_props = {}
-
-            for k, v in notion_props.items():
-                if "date" in v:
-                    dup_props[k] = {
-                        "date": {
-                            "start": dt.isoformat() if isinstance(dt, datetime) else dt
-                        }
-                    }
-                else:
-                    dup_props[k] = v
-
-            pages.append(
-                notion.pages.create(
-                    parent={
-                        "type": "data_source_id",
-                        "data_source_id": data_source_id
-                    },
-                    properties=dup_props
-                )
-            )
+        with profiling.span("enqueue", local=True, entries=total):
+            ids, _ = OUTBOX.enqueue(data_source_id, db_label, payloads, batch_id, skip_existing, series_prop)
+        tracker.track(ids)
+        OUTBOX_WORKER.wake()
+        queued = wait_for(tracker)
     finally:
+        tracker.close()
         stop_spinner()
 
+    pages, failures, delayed = collect_outcomes(tracker)
+
     summarize_task(notion_props)
 
-    print(f"\n{styling.ok(f'✓ Added {len(pages)} task(s) to {db_label}')}")
+    for i, props, error in failures:
+        print(styling.err(f"✗ Entry {i} ({entry_date(props)}) failed: {error}"))
+
+    schema_stale = any(schema_cache.is_schema_mismatch(error) for _, _, error in failures)
+    if schema_stale:
+        print(styling.warn(f"The schema for {db_label} looks out of date; refreshing it."))
+
+    stats = notion.stats()
+    if stats["retries"]:
+        print(styling.dim(f"Notion API: {notion_api.format_stats(stats)}"))
+
+    if delayed:
+        print(styling.warn(deferred_message(delayed)))
+    if queued:
+        print(styling.warn(queued_message(queued)))
+    if failures or delayed:
+        print(styling.dim(f"Batch {batch_id}: run 'python main.py resume {batch_id}' to create only the missing entries."))
+
+    if pages:
+        print(f"\n{styling.ok(f'✓ Added {len(pages)} task(s) to {db_label}')}")
+    for p in pages:
+        print(p["url"])
+    if len(pages) > 1:
+        print(styling.dim(f"Series {batch_id}: run 'python main.py series show {batch_id}' to move, re-time or cancel it."))
+
+    return schema_stale
+
+def plan_fanout(targets):
+    """Group the configured properties of several databases into prompts,
+    as (prompt label, prop_info, {db key: property name}). A property with
+    the same name and type in several databases is asked once. The title,
+    and the date when each database has exactly one, are matched by type
+    even when their names differ."""
+    by_type = {}
+    for prop_type in ("title", "date"):
+        names = {t["key"]: [p for p in t["properties"] if t["schema"].get(p, {}).get("type") == prop_type] for t in targets}
+        if all(len(n) == 1 for n in names.values()):
+            by_type[prop_type] = {key: n[0] for key, n in names.items()}
+
+    slots = {}
+    for t in targets:
+        for name in t["properties"]:
+            info = t["schema"].get(name)
+            if info is None:
+                print(styling.warn(f"Property '{name}' not found in {t['label']}, skipping."))
+                continue
+            slot = info["type"] if by_type.get(info["type"], {}).get(t["key"]) == name else (name, info["type"])
+            slots.setdefault(slot, (name, info, {}))[2][t["key"]] = name
+
+    labels = {t["key"]: t["label"] for t in targets}
+    schemas = {t["key"]: t["schema"] for t in targets}
+    plan = []
+    for name, info, names in slots.values():
+        prop_type = info["type"]
+        if prop_type in ("select", "multi_select", "status") and len(names) > 1:
+            # Offer every database's options; fit_options keeps each one's own.
+            options = {}
+            for key, prop in names.items():
+                for opt in schemas[key][prop][prop_type].get("options", []):
+                    options.setdefault(opt["name"], opt)
+            info = {**info, prop_type: {**info[prop_type], "options": list(options.values())}}
+        name = " / ".join(dict.fromkeys(names.values()))
+        if len(names) < len(targets):
+            name = f"{name} ({', '.join(labels[key] for key in names)})"
+        plan.append((name, info, names))
+    return plan
+
+def fit_options(value, prop_info, created):
+    """The part of a select, multi_select or status value that a database
+    has options for (or that was just created); None when nothing is left.
+    Other values are returned unchanged."""
+    prop_type = prop_info["type"]
+    if prop_type not in ("select", "multi_select", "status"):
+        return value
+    names = {opt["name"] for opt in prop_info[prop_type].get("options", [])} | created
+    if prop_type == "multi_select":
+        kept = [opt for opt in value["multi_select"] if opt["name"] in names]
+        return {"multi_select": kept} if kept else None
+    return value if value[prop_type]["name"] in names else None
+
+def interactive_add_fanout(targets, tz):
+    """Prompt once and create the entry (and its recurrences) in every
+    target database concurrently. targets are dicts with the database's
+    key, label, properties, allow_time, data_source_id, schema and
+    series_prop. Returns the keys whose schema looks out of date."""
+    labels = " + ".join(t["label"] for t in targets)
+    print(f"\n{styling.h(f'Add a New Entry → {labels}')}")
+
+    allow_times = {t["key"]: t["allow_time"] for t in targets}
+    props = {t["key"]: {} for t in targets}
+    recurrences = {t["key"]: [] for t in targets}
+    schemas = {t["key"]: t["schema"] for t in targets}
+    labels = {t["key"]: t["label"] for t in targets}
+    for prompt, info, names in plan_fanout(targets):
+        has_options = info["type"] in ("select", "multi_select", "status")
+        known = {opt["name"] for opt in info[info["type"]].get("options", [])} if has_options else set()
+        allow_time = any(allow_times[key] for key in names)
+        # Databases with ALLOW_TIME=false get the same date without the
+        # quick-access time, as if it had been entered for them alone.
+        untimed = None
+        if info["type"] == "date" and allow_time and not all(allow_times[key] for key in names):
+            print(f"\n{styling.h(prompt)} {styling.dim('(date)')}")
+            now = datetime.now(tz)
+            text, value = prompt_for_date(info, allow_time, tz, now)
+            if text:
+                untimed = build_property_value(info, text, tz, now=now)
+        else:
+            value = prompt_for_property(prompt, info, allow_time, tz)
+        if not value:
+            continue
+        values = {key: untimed if untimed is not None and not allow_times[key] else value for key in names}
+        for key, v in values.items():
+            if "_recurrences" in v:
+                recurrences[key] = v["_recurrences"]
+        values = {key: {k: x for k, x in v.items() if k != "_recurrences"} for key, v in values.items()}
+        # Options added inline with +Name are new to every database.
+        created = set()
+        if has_options:
+            chosen = value[info["type"]]
+            created = {opt["name"] for opt in (chosen if isinstance(chosen, list) else [chosen])} - known
+        for key, name in names.items():
+            fitted = fit_options(values[key], schemas[key][name], created)
+            if fitted is None:
+                print(styling.dim(f"{labels[key]} has no such {name} option; left empty there."))
+                continue
+            props[key][name] = fitted
+
+    counts = {}
+    for t in targets:
+        keys = [outbox.idempotency_key(t["data_source_id"], p) for p in iter_entry_payloads(props[t["key"]], recurrences[t["key"]])]
+        counts[t["key"]] = (len(keys), len(OUTBOX.existing_keys(keys)))
+    plans = ", ".join(f"{total - existing} in {t['label']}" for t in targets for total, existing in [counts[t["key"]]])
+    print(f"\n{styling.dim(f'This will create {plans}.')}")
+    if any(existing for _, existing in counts.values()):
+        print(styling.warn("Some already exist or are queued from an earlier batch and will be skipped (a = create them anyway)."))
+    confirm = input("Continue? (y/n): ").strip().lower()
+    if confirm not in ("y", "yes", "a"):
+        print(styling.warn("Cancelled."))
+        return []
+    skip_existing = confirm != "a"
+
+    submissions = []
+    for t in targets:
+        if skip_existing and counts[t["key"]][0] == counts[t["key"]][1]:
+            continue
+        batch_id = outbox.new_batch_id()
+        title = entry_title(props[t["key"]])
+        on_done = None
+        if BACKGROUND_SUBMIT:
+            on_done = lambda tracker, title=title, label=t["label"], batch_id=batch_id: NOTICES.put(
+                submission_notice(tracker, title, label, batch_id)
+            )
+        tracker = outbox.Tracker(OUTBOX_WORKER, on_done=on_done)
+        ids, _ = OUTBOX.enqueue(
+            t["data_source_id"], t["label"], iter_entry_payloads(props[t["key"]], recurrences[t["key"]]),
+            batch_id, skip_existing, t["series_prop"],
+        )
+        if BACKGROUND_SUBMIT:
+            OUTSTANDING.add(tracker)
+        tracker.track(ids)
+        submissions.append((t, tracker, batch_id))
+    if not submissions:
+        print(styling.warn("Nothing new to create."))
+        return []
+    OUTBOX_WORKER.wake()
+
+    if BACKGROUND_SUBMIT:
+        print(f"\n{styling.dim('Queued; a notice will appear here for each database when it finishes.')}")
+        return []
+
+    spinner(f"Creating entries in {len(submissions)} databases")
+    stale = []
+    print(f"\n{styling.h('Results')}")
+    for t, tracker, batch_id in submissions:
+        queued = wait_for(tracker)
+        tracker.close()
+        pages, failures, delayed = collect_outcomes(tracker)
+        if pages:
+            print(styling.ok(f"✓ {t['label']}: added {len(pages)} task(s)"))
+        for page in pages:
+            print(f"  {page['url']}")
+        for i, entry, error in failures:
+            print(styling.err(f"✗ {t['label']}: entry {i} ({entry_date(entry)}) failed: {error}"))
+        if delayed:
+            print(styling.warn(f"{t['label']}: {deferred_message(delayed)}"))
+        if queued:
+            print(styling.warn(f"{t['label']}: {queued_message(queued)}"))
+        if failures or delayed:
+            print(styling.dim(f"  Batch {batch_id}: run 'python main.py resume {batch_id}' to create only the missing entries."))
+        if any(schema_cache.is_schema_mismatch(error) for _, _, error in failures):
+            print(styling.warn(f"The schema for {t['label']} looks out of date; refreshing it."))
+            stale.append(t["key"])
+    return stale
+
+def collect_outcomes(tracker):
+    pages = []
+    failures = []
+    delayed = 0
+    for i, entry_id in enumerate(tracker.ordered_ids, 1):
+        if entry_id not in tracker.outcomes:
+            continue
+        page, error, outcome = tracker.outcomes[entry_id]
+        if outcome == "sent":
+            pages.append(page)
+        elif outcome == "deferred":
+            delayed += 1
+        else:
+            props = json.loads(OUTBOX.get(entry_id)["properties"])
+            failures.append((i, props, error))
+    return pages, failures, delayed
+
+def deferred_message(delayed):
+    return f"⧗ {delayed} {'entry' if delayed == 1 else 'entries'} couldn't reach Notion and will be sent automatically. Run 'python main.py status' to check."
+
+def wait_for(tracker):
+    """Wait for a batch's outcomes and return how many entries are still
+    queued once WAIT_TIMEOUT seconds pass without one finishing."""
+    tracker.wait(WAIT_TIMEOUT)
+    return len(tracker.ordered_ids) - len(tracker.outcomes)
+
+def queued_message(queued):
+    return f"⧗ {queued} {'entry is' if queued == 1 else 'entries are'} still queued, maybe being sent by another process. Run 'python main.py status' to check."
+
+def submission_notice(tracker, title, db_label, batch_id):
+    """Runs on the outbox worker thread; only builds text for the prompt
+    loop to print."""
+    OUTSTANDING.discard(tracker)
+    pages, failures, delayed = collect_outcomes(tracker)
+    lines = []
+    if pages:
+        first = f" {pages[0]['url']}" if len(pages) == 1 else ""
+        lines.append(styling.ok(f"✓ '{title}': added {len(pages)} task(s) to {db_label}{first}"))
+    for i, props, error in failures:
+        lines.append(styling.err(f"✗ '{title}' entry {i} ({entry_date(props)}) failed: {error}"))
+    if any(schema_cache.is_schema_mismatch(error) for _, _, error in failures):
+        lines.append(styling.warn(f"The cached schema for {db_label} was out of date and has been cleared; answer 'r' to reload it."))
+    if delayed:
+        lines.append(styling.warn(deferred_message(delayed)))
+    if failures or delayed:
+        lines.append(styling.dim(f"Batch {batch_id}: run 'python main.py resume {batch_id}' to create only the missing entries."))
+    return "\n".join(lines)
+
+def invalidate_stale_schema(entry_id, page, error, outcome):
+    """Outbox listener: clear the cached schema of a database whose entry
+    failed because a property or option it names is gone, whichever command
+    queued the entry."""
+    if outcome == "failed" and schema_cache.is_schema_mismatch(error):
+        SCHEMA_CACHE.invalidate_data_source(OUTBOX.get(entry_id)["data_source_id"])
+
+def show_notices():
+    while True:
+        try:
+            notice = NOTICES.get_nowait()
+        except queue.Empty:
+            return
+        print(f"\n{notice}")
+
+def drain_submissions():
+    show_notices()
+    remaining = sum(len(t.ordered_ids) - len(t.outcomes) for t in list(OUTSTANDING))
+    if remaining:
+        spinner(f"Waiting for {remaining} queued {'entry' if remaining == 1 else 'entries'} (Ctrl+C to stop waiting)")
+        try:
+            queued = sum(wait_for(tracker) for tracker in list(OUTSTANDING))
+            if queued:
+                print(styling.warn(queued_message(queued)))
+        except KeyboardInterrupt:
+            print(styling.warn("\nStopped waiting. Unsent entries are saved in the outbox and will be sent next time."))
+    show_notices()
+
+def quit_session(message="Goodbye!"):
+    drain_submissions()
+    print(styling.ok(message))
+    sys.exit(0)
+
+def column_mapping(text):
+    """argparse type for --map COLUMN=PROPERTY."""
+    column, sep, prop = text.partition("=")
+    if not (sep and column.strip() and prop.strip()):
+        raise argparse.ArgumentTypeError(f"expected COLUMN=PROPERTY, got '{text}'")
+    return column.strip(), prop.strip()
+
+def run_import(args):
+    DATABASES = load_databases_from_env()
+    if args.db not in DATABASES:
+        print(styling.err(f"Unknown database '{args.db}'. Configured: {', '.join(DATABASES) or 'none'}"))
+        return 1
+    db = DATABASES[args.db]
+    tz = ZoneInfo(args.tz or DEFAULT_TZ)
+    data_source_id, schema = resolve_data_source(db["id"])
+
+    fmt = args.format or importer.detect_format(args.file)
+    columns = importer.read_columns(args.file, fmt)
+    if not columns:
+        print(styling.warn("Nothing to import."))
+        return 0
+    unknown = [prop for _, prop in args.map or [] if prop not in schema]
+    if unknown:
+        print(styling.err(f"{db['label']} has no property named {', '.join(repr(p) for p in unknown)}."))
+        return 1
+    mapping = importer.map_columns(columns, db["properties"], schema, dict(args.map or []))
+    skipped = [col for col in mapping if schema[mapping[col]]["type"] not in SUPPORTED_TYPES]
+    for col in skipped:
+        print(styling.warn(f"Skipping column '{col}' (unsupported type: {schema[mapping.pop(col)]['type']})"))
+    if not mapping:
+        print(styling.err(f"No columns match the configured properties: {', '.join(db['properties'])}"))
+        return 1
+    print(styling.dim("Columns: " + ", ".join(f"{c} → {p}" for c, p in mapping.items())))
+
+    # Every row's dates are relative to the same moment, even if the import
+    # runs past midnight.
+    now = datetime.now(tz)
+
+    def build_entries(row):
+        with profiling.span("build_entries", local=True):
+            notion_props, recurrences = row_properties(row, mapping, schema, tz, now)
+            if not notion_props:
+                raise ValueError("Row has no values for the configured properties")
+            return iter_entry_payloads(notion_props, recurrences)
+
+    stale = []
+    def on_error(error):
+        if not stale and schema_cache.is_schema_mismatch(error):
+            stale.append(error)
+            SCHEMA_CACHE.invalidate(db["id"])
+
+    rejects_path = args.rejects or f"{os.path.splitext(args.file)[0]}.rejected.jsonl"
+    rejects = importer.RejectWriter(rejects_path)
+    spinner(f"Importing {args.file} into {db['label']}")
+    try:
+        report = importer.import_rows(
+            importer.read_rows(args.file, fmt),
+            build_entries,
+            lambda props: create_page(data_source_id, props),
+            CREATE_CONCURRENCY,
+            rejects,
+            entry_date=entry_date,
+            on_error=on_error,
+        )
+    finally:
+        rejects.close()
+
+    print(f"\n{styling.h('Import Summary')}")
+    print(f"{styling.dim('Rows read')}: {report.rows}")
+    print(f"{styling.dim('Pages created')}: {report.created}")
+    print(f"{styling.dim('Rejected rows')}: {report.rejected_rows}")
+    print(f"{styling.dim('Failed pages')}: {report.failed_pages}")
+    print(f"{styling.dim('Elapsed')}: {report.elapsed:.1f}s ({report.pages_per_second():.2f} pages/s)")
+    print(f"{styling.dim('Notion API')}: {notion_api.format_stats(notion.stats())}")
+    for message, count in report.error_counts.most_common(5):
+        print(styling.err(f"  {count}× {message}"))
+    if report.rejected_rows or report.failed_pages:
+        print(styling.warn(f"Rejected rows written to {rejects_path}"))
+    if stale:
+        print(styling.warn(f"The cached schema for {db['label']} was out of date and has been cleared."))
+    return 1 if report.rejected_rows or report.failed_pages else 0
+
+def task_entries(rows, key_column, mapping, schema, data_source_id, tz, now):
+    """Build the payload of every occurrence in a tasks file, keyed by
+    stable key, with the hash it is diffed on. Returns (entries, keys of
+    rows that couldn't be built, problems as (line, error)). Empty cells
+    clear their property."""
+    entries, failed_keys, problems = {}, set(), []
+    seen = set()
+    for line_no, row in rows:
+        if isinstance(row, Exception):
+            problems.append((line_no, None, row))
+            continue
+        key = str(row.get(key_column) or "").strip()
+        if not key or "#" in key or key in seen:
+            reason = "has no key" if not key else "key may not contain '#'" if "#" in key else f"repeats key '{key}'"
+            problems.append((line_no, key or None, ValueError(f"Row {reason} ({key_column})")))
+            failed_keys.add(key)
+            continue
+        seen.add(key)
+        try:
+            with profiling.span("build_entries", local=True):
+                notion_props, recurrences = row_properties(row, mapping, schema, tz, now, clear_empty=True)
+                for i, props in enumerate(iter_entry_payloads(notion_props, recurrences)):
+                    entries[tasksync.occurrence_key(key, i)] = (props, outbox.idempotency_key(data_source_id, props))
+        except (ValueError, TypeError) as e:
+            problems.append((line_no, key, e))
+            failed_keys.add(key)
+    return entries, failed_keys, problems
+
+def adopt_pages(data_source_id, key_prop, keys):
+    """{key: page_id} for pages whose key property holds one of `keys`, so a
+    tasks file can take over pages synced from another machine."""
+    found = {}
+    body = {"filter": {"property": key_prop, "rich_text": {"is_not_empty": True}}, "page_size": 100}
+    for page in relations.iter_query(notion.data_sources.query, data_source_id, **body):
+        key = propvalues.text_value(page["properties"].get(key_prop, {}))
+        if key in keys and not (page.get("in_trash") or page.get("archived")):
+            found.setdefault(key, page["id"])
+    return found
+
+def run_sync_tasks(args):
+    DATABASES = load_databases_from_env()
+    if args.db not in DATABASES:
+        print(styling.err(f"Unknown database '{args.db}'. Configured: {', '.join(DATABASES) or 'none'}"))
+        return 1
+    db = DATABASES[args.db]
+    tz = ZoneInfo(args.tz or DEFAULT_TZ)
+    data_source_id, schema = resolve_data_source(db["id"])
+    if args.key_prop and schema.get(args.key_prop, {}).get("type") != "rich_text":
+        print(styling.err(f"--key-prop must name a text property of {db['label']}."))
+        return 1
+
+    fmt = args.format or importer.detect_format(args.file)
+    columns = importer.read_columns(args.file, fmt)
+    if columns and args.key_column not in columns:
+        print(styling.err(f"The file has no '{args.key_column}' column (set one with --key-column)."))
+        return 1
+    unknown = [prop for _, prop in args.map or [] if prop not in schema]
+    if unknown:
+        print(styling.err(f"{db['label']} has no property named {', '.join(repr(p) for p in unknown)}."))
+        return 1
+    columns = [c for c in columns if c != args.key_column]
+    mapping = importer.map_columns(columns, db["properties"], schema, dict(args.map or []))
+    mapping = {col: prop for col, prop in mapping.items() if prop != args.key_prop}
+    skipped = [col for col in mapping if schema[mapping[col]]["type"] not in SUPPORTED_TYPES]
+    for col in skipped:
+        print(styling.warn(f"Skipping column '{col}' (unsupported type: {schema[mapping.pop(col)]['type']})"))
+    if columns and not mapping:
+        print(styling.err(f"No columns match the configured properties: {', '.join(db['properties'])}"))
+        return 1
+
+    # Relative dates ("tomorrow") resolve against this moment, so they hash
+    # differently from one day to the next; absolute dates keep a re-run idle.
+    now = datetime.now(tz)
+    entries, failed_keys, problems = task_entries(
+        importer.read_rows(args.file, fmt), args.key_column, mapping, schema, data_source_id, tz, now
+    )
+    for line_no, key, error in problems:
+        print(styling.err(f"✗ line {line_no}{f' ({key})' if key else ''}: {error}"))
+    # A row whose key couldn't be read might be any of the synced ones, so
+    # nothing is archived until the file reads cleanly.
+    archive_missing = all(key for _, key, _ in problems)
+    if not archive_missing:
+        print(styling.warn("Some rows have no readable key, so no pages will be archived this time."))
+
+    state = tasksync.TaskState(os.path.join(CACHE_DIR, "tasks.db"))
+    scope = f"{data_source_id}:{os.path.splitext(os.path.basename(args.file))[0]}"
+    known = state.load(scope)
+    missing = {key for key in entries if key not in known}
+    if args.key_prop and missing:
+        spinner(f"Looking for existing pages in {db['label']}")
+        for key, page_id in adopt_pages(data_source_id, args.key_prop, missing).items():
+            known[key] = (page_id, None)
+
+    ops, unchanged = tasksync.plan(entries, known, failed_keys, archive_missing)
+    marks = {tasksync.CREATE: styling.ok("+"), tasksync.UPDATE: styling.warn("~"), tasksync.ARCHIVE: styling.err("-")}
+    if args.dry_run or len(ops) <= 20:
+        for kind, key, _, props, _ in ops:
+            detail = f"{entry_title(props)} {styling.dim(entry_date(props))}" if props else ""
+            print(f"{marks[kind]} {key} {detail}")
+    counts = {kind: sum(1 for op in ops if op[0] == kind) for kind in marks}
+    print(styling.dim(
+        f"{counts[tasksync.CREATE]} to create, {counts[tasksync.UPDATE]} to update, "
+        f"{counts[tasksync.ARCHIVE]} to archive, {unchanged} unchanged."
+    ))
+    if args.dry_run or not ops:
+        return 1 if problems else 0
+
+    def with_key(key, props):
+        if not args.key_prop:
+            return props
+        return {**props, args.key_prop: {"rich_text": [{"text": {"content": key}}]}}
+
+    stale = []
+    def on_failure(kind, key, error):
+        print(styling.err(f"✗ {kind} {key}: {error}"))
+        if not stale and schema_cache.is_schema_mismatch(error):
+            stale.append(error)
+            SCHEMA_CACHE.invalidate(db["id"])
+
+    spinner(f"Syncing {args.file} into {db['label']}")
+    report = tasksync.apply(
+        ops, state, scope,
+        lambda key, props: create_page(data_source_id, with_key(key, props)),
+        lambda page_id, key, props: notion.pages.update(page_id, properties=with_key(key, props)),
+        lambda page_id: notion.pages.update(page_id, in_trash=True),
+        CREATE_CONCURRENCY,
+        on_failure,
+    )
+    print(f"\n{styling.h('Sync Summary')}")
+    for kind, label in ((tasksync.CREATE, "Created"), (tasksync.UPDATE, "Updated"), (tasksync.ARCHIVE, "Archived")):
+        print(f"{styling.dim(label)}: {report.done[kind]}")
+    print(f"{styling.dim('Unchanged')}: {unchanged}")
+    print(f"{styling.dim('Failed')}: {len(report.failed)}")
+    print(f"{styling.dim('Elapsed')}: {report.elapsed:.1f}s")
+    if report.failed:
+        print(styling.warn("Failed entries are retried on the next run."))
+    if stale:
+        print(styling.warn(f"The cached schema for {db['label']} was out of date and has been cleared."))
+    return 1 if problems or report.failed else 0
+
+def entry_title(props):
+    for v in props.values():
+        if "title" in v and v["title"]:
+            return v["title"][0]["text"]["content"]
+    return "(untitled)"
+
+def print_outbox_entry(row):
+    props = json.loads(row["properties"])
+    line = f"#{row['id']} {styling.dim(row['db_label'] or '')} {entry_title(props)} {styling.dim(entry_date(props))}"
+    if row["status"] == outbox.SENT:
+        print(f"{styling.ok('✓')} {line} {row['url']}")
+    elif row["status"] == outbox.FAILED:
+        print(f"{styling.err('✗')} {line}\n    {styling.err(row['last_error'])}")
+    else:
+        note = f" (attempts: {row['attempts']}, last error: {row['last_error']})" if row["last_error"] else ""
+        print(f"{styling.warn('⧗')} {line}{styling.dim(note)}")
+
+def run_status(args):
+    if args.retry_failed:
+        n = OUTBOX.retry_failed()
+        print(styling.ok(f"Re-queued {n} failed {'entry' if n == 1 else 'entries'}."))
+
+    counts = OUTBOX.counts()
+    print(f"\n{styling.h('Outbox')}")
+    print(f"{styling.dim('Pending')}: {counts[outbox.PENDING]}")
+    print(f"{styling.dim('Sent')}: {counts[outbox.SENT]}")
+    print(f"{styling.dim('Failed')}: {counts[outbox.FAILED]}")
+
+    for title, statuses in (
+        ("Pending", (outbox.PENDING, outbox.SENDING)),
+        ("Failed", (outbox.FAILED,)),
+        ("Recently sent", (outbox.SENT,)),
+    ):
+        rows = OUTBOX.entries(statuses, limit=args.limit)
+        if rows:
+            print(f"\n{styling.h(title)}")
+            for row in rows:
+                print_outbox_entry(row)
+    return 0
+
+def run_resume(args):
+    if not args.batch:
+        batches = OUTBOX.batches(incomplete_only=True)
+        if not batches:
+            print(styling.ok("Every batch has been fully created."))
+            return 0
+        print(f"\n{styling.h('Incomplete batches')}")
+        for b in batches:
+            props = json.loads(OUTBOX.get(b["first_id"])["properties"])
+            progress = f"{b['sent']}/{b['total']} sent, {b['failed']} failed, {b['pending']} pending"
+            print(f"{b['batch_id']} {styling.dim(b['db_label'] or '')} {entry_title(props)} {styling.dim(progress)}")
+        return 0
+
+    tracker = outbox.Tracker(OUTBOX_WORKER)
+    ids = OUTBOX.requeue_batch(args.batch)
+    if not ids:
+        tracker.close()
+        print(styling.ok(f"Nothing missing in batch {args.batch}."))
+        return 0
+
+    spinner(f"Creating {len(ids)} missing {'entry' if len(ids) == 1 else 'entries'} from batch {args.batch}")
+    tracker.track(ids)
+    OUTBOX_WORKER.start().wake()
+    queued = wait_for(tracker)
+    tracker.close()
+
+    pages, failures, delayed = collect_outcomes(tracker)
+    for i, props, error in failures:
+        print(styling.err(f"✗ {entry_title(props)} ({entry_date(props)}) failed: {error}"))
+    if delayed:
+        print(styling.warn(deferred_message(delayed)))
+    if queued:
+        print(styling.warn(queued_message(queued)))
+    if pages:
+        print(f"\n{styling.ok(f'✓ Added {len(pages)} missing task(s)')}")
     for p in pages:
         print(p["url"])
+    return 1 if failures or delayed or queued else 0
+
+def run_flush(args):
+    before = OUTBOX.counts()
+    pending = before[outbox.PENDING]
+    if not pending:
+        print(styling.ok("Outbox is empty."))
+        return 0
+    spinner(f"Sending {pending} queued {'entry' if pending == 1 else 'entries'}")
+    OUTBOX_WORKER.start().wait_idle()
+    counts = OUTBOX.counts()
+    print(styling.ok(f"✓ Sent {counts[outbox.SENT] - before[outbox.SENT]} of {pending}."))
+    if counts[outbox.PENDING]:
+        print(styling.warn(f"{counts[outbox.PENDING]} still pending (Notion unreachable?)."))
+    if counts[outbox.FAILED]:
+        print(styling.err(f"{counts[outbox.FAILED]} failed. Run 'python main.py status' for details."))
+    return 1 if counts[outbox.PENDING] else 0
+
+def run_sync(args):
+    databases = load_databases_from_env()
+    if args.db and args.db not in databases:
+        print(styling.err(f"Unknown database '{args.db}'. Configured: {', '.join(databases) or 'none'}"))
+        return 1
+    status = 0
+    for key in [args.db] if args.db else list(databases):
+        db = databases[key]
+        started = time.perf_counter()
+        spinner(f"Syncing {db['label']}")
+        try:
+            data_source_id, schema = resolve_data_source(db["id"])
+            date_prop = mirror.date_property(schema, db["date_prop"], db["properties"])
+            fetched, full = MIRROR.sync(key, db["label"], data_source_id, schema, date_prop, full=args.full)
+        except Exception as e:
+            print(styling.err(f"✗ {db['label']}: {e}"))
+            status = 1
+            continue
+        note = f"{'full' if full else 'incremental'}, {time.perf_counter() - started:.1f}s"
+        print(f"{styling.ok('✓')} {db['label']}: {fetched} fetched, {MIRROR.count(key)} mirrored {styling.dim(f'({note})')}")
+        if date_prop is None:
+            print(styling.warn(f"  {db['label']} has no date property, so it won't show in the agenda."))
+    return status
+
+def run_export(args):
+    databases = load_databases_from_env()
+    unknown = [key for key in args.dbs if key not in databases]
+    if unknown:
+        print(styling.err(f"Unknown database '{unknown[0]}'. Configured: {', '.join(databases) or 'none'}"))
+        return 1
+    if args.format == "parquet" and not exporter.parquet_available():
+        print(styling.err("Parquet export needs the optional pyarrow package (pip install pyarrow)."))
+        return 1
+
+    status = 0
+    for key in args.dbs or list(databases):
+        db = databases[key]
+        path = os.path.join(args.out, key + exporter.EXTENSIONS[args.format])
+        spinner(f"Exporting {db['label']}")
+        try:
+            data_source_id, schema = resolve_data_source(db["id"])
+            columns = None if args.all_properties else db["properties"]
+            with profiling.span("export", db=key):
+                report = exporter.export(
+                    lambda data_source_id, **body: notion.data_sources.query(data_source_id, **body),
+                    data_source_id, schema, path, args.format, columns,
+                )
+        except Exception as e:
+            print(styling.err(f"✗ {db['label']}: {e}"))
+            status = 1
+            continue
+        note = f"{report.requests} requests, {report.elapsed:.1f}s, {report.rows_per_second():.0f} rows/s"
+        print(f"{styling.ok('✓')} {db['label']}: {report.rows} rows → {path} {styling.dim(f'({note})')}")
+    return status
+
+def agenda_when(due):
+    """'2026-01-16' -> 'Fri Jan 16'; times are shown in DEFAULT_TIMEZONE."""
+    if len(due) <= 10:
+        return datetime.fromisoformat(due).strftime("%a %b %d")
+    when = datetime.fromisoformat(due.replace("Z", "+00:00"))
+    if when.tzinfo is not None:
+        when = when.astimezone(ZoneInfo(DEFAULT_TZ))
+    return when.strftime("%a %b %d %I:%M %p")
+
+def print_mirrored_page(row, labels):
+    when = agenda_when(row["due"]) if row["due"] else ""
+    status = f" [{row['status']}]" if row["status"] else ""
+    print(f"{when:<22} {row['title'] or '(untitled)'} {styling.dim(labels.get(row['db_key'], row['db_key']) + status)}")
+
+def mirror_age_notice(sources):
+    if not sources:
+        print(styling.warn("Nothing mirrored yet. Run 'python main.py sync' first."))
+        return
+    oldest = min(s["synced_at"] for s in sources.values())
+    hours = (time.time() - oldest) / 3600
+    age = f"{hours * 60:.0f} min" if hours < 1 else f"{hours:.0f} h" if hours < 48 else f"{hours / 24:.0f} days"
+    print(styling.dim(f"Offline view, last synced {age} ago."))
+
+def run_agenda(args):
+    sources = MIRROR.sources()
+    labels = {key: s["label"] or key for key, s in sources.items()}
+    today = datetime.now(ZoneInfo(DEFAULT_TZ)).date()
+    day = lambda n: (today + timedelta(days=n)).isoformat()
+    sections = {
+        "overdue": [("Overdue", None, day(0))],
+        "today": [("Due today", day(0), day(1))],
+        "week": [("Due this week", day(0), day(7))],
+        "all": [("Overdue", None, day(0)), ("Due today", day(0), day(1)), ("Later this week", day(1), day(7))],
+    }[args.view]
+
+    mirror_age_notice(sources)
+    for title, start, end in sections:
+        # Finished pages are never overdue, even with --all.
+        include_done = args.all and start is not None
+        rows = MIRROR.due(start, end, db_key=args.db, include_done=include_done, limit=args.limit)
+        print(f"\n{styling.h(title)}")
+        if not rows:
+            print(styling.dim("Nothing."))
+        for row in rows:
+            print_mirrored_page(row, labels)
+    return 0
+
+def run_search(args):
+    sources = MIRROR.sources()
+    labels = {key: s["label"] or key for key, s in sources.items()}
+    mirror_age_notice(sources)
+    rows = MIRROR.search(" ".join(args.query), db_key=args.db, limit=args.limit)
+    if not rows:
+        print(styling.dim("No matches."))
+        return 1
+    for row in rows:
+        print_mirrored_page(row, labels)
+        if row["url"]:
+            print(f"{'':<22} {styling.dim(row['url'])}")
+    return 0
+
+def entry_date_prop(props):
+    return next((k for k, v in props.items() if "date" in v), None)
+
+def local_date(start, tz):
+    """The calendar day of an ISO date or datetime, in tz."""
+    if "T" not in start:
+        return date.fromisoformat(start)
+    return datetime.fromisoformat(start).astimezone(tz).date()
+
+def parse_offset(text):
+    """'+2d', '-1w', '3' (days) -> timedelta."""
+    m = re.fullmatch(r"([+-]?\d+)\s*([dw]?)", text.strip().lower())
+    if not m:
+        raise ValueError(f"Invalid offset '{text}'. Use days or weeks, e.g. +2d, -1w, 3.")
+    n = int(m.group(1))
+    return timedelta(weeks=n) if m.group(2) == "w" else timedelta(days=n)
+
+def shifted(start, delta, tz):
+    """Move an ISO date or datetime by delta, keeping the wall-clock time in
+    tz across daylight-saving changes."""
+    if "T" not in start:
+        return (date.fromisoformat(start) + delta).isoformat()
+    return (datetime.fromisoformat(start).astimezone(tz) + delta).isoformat()
+
+def retimed(start, clock, tz):
+    """Give an ISO date or datetime a new time of day in tz (clock None
+    makes it an all-day date)."""
+    day = local_date(start, tz)
+    if clock is None:
+        return day.isoformat()
+    return datetime(day.year, day.month, day.day, clock[0], clock[1], tzinfo=tz).isoformat()
+
+def schema_for_data_source(data_source_id):
+    for db in load_databases_from_env().values():
+        ds, schema = resolve_data_source(db["id"])
+        if ds == data_source_id:
+            return schema
+    raise ValueError("The database this series belongs to is no longer configured.")
+
+def series_rows(args, tz):
+    rows = OUTBOX.series(args.series)
+    if args.since:
+        since = local_date(dateparse.parse_date(args.since, tz=tz).start, tz)
+        rows = [r for r in rows if entry_date(json.loads(r["properties"])) == "no date"
+                or local_date(entry_date(json.loads(r["properties"])), tz) >= since]
+    return rows
+
+def series_change(args, tz):
+    """Return (description, change) where change(props) gives the
+    pages.update arguments for one entry and its properties afterwards
+    (None once archived). Raises ValueError for bad input."""
+    if args.series_command == "shift":
+        delta = parse_offset(args.offset)
+
+        def change(props):
+            prop = entry_date_prop(props)
+            if prop is None:
+                raise ValueError("Entry has no date.")
+            new = {**props, prop: {"date": {"start": shifted(props[prop]["date"]["start"], delta, tz)}}}
+            return {"properties": {prop: new[prop]}}, new
+        return f"move by {args.offset}", change
+
+    if args.series_command == "retime":
+        clock = None if args.time.strip().lower() in ("none", "all-day") else dateparse.parse_clock(args.time.strip())
+
+        def change(props):
+            prop = entry_date_prop(props)
+            if prop is None:
+                raise ValueError("Entry has no date.")
+            new = {**props, prop: {"date": {"start": retimed(props[prop]["date"]["start"], clock, tz)}}}
+            return {"properties": {prop: new[prop]}}, new
+        return f"set the time to {args.time}", change
+
+    if args.series_command == "status":
+        rows = OUTBOX.series(args.series)
+        schema = schema_for_data_source(rows[0]["data_source_id"]) if rows else {}
+        if args.prop:
+            prop = match_property(args.prop, schema)
+        else:
+            prop = next((p for p, info in schema.items() if info["type"] == "status"), None)
+            if prop is None:
+                raise ValueError("This database has no status property; name one with --prop.")
+        value = build_property_value(schema[prop], args.value, tz)
+
+        def change(props):
+            return {"properties": {prop: value}}, {**props, prop: value}
+        return f"set {prop} to {args.value}", change
+
+    def change(props):
+        return {"in_trash": True}, None
+    return "move to the trash", change
+
+def run_series(args):
+    tz = ZoneInfo(getattr(args, "tz", None) or DEFAULT_TZ)
+    if args.series_command in (None, "list"):
+        batches = [b for b in OUTBOX.batches(incomplete_only=False, limit=getattr(args, "limit", 20)) if b["sent"]]
+        if not batches:
+            print(styling.dim("No series yet."))
+        for b in batches:
+            rows = OUTBOX.series(b["batch_id"])
+            if not rows:
+                continue
+            dates = sorted(entry_date(json.loads(r["properties"])) for r in rows)
+            span = f"{len(rows)} {'entry' if len(rows) == 1 else 'entries'}, {dates[0][:10]} → {dates[-1][:10]}"
+            print(f"{b['batch_id']} {styling.dim(b['db_label'] or '')} {entry_title(json.loads(rows[0]['properties']))} {styling.dim(span)}")
+        return 0
+
+    try:
+        rows = series_rows(args, tz)
+        if not rows:
+            print(styling.warn(f"No created entries in series {args.series}{' from that date' if args.since else ''}."))
+            return 1
+        if args.series_command == "show":
+            for row in rows:
+                props = json.loads(row["properties"])
+                print(f"{entry_date(props):<30} {entry_title(props)} {styling.dim(row['url'] or '')}")
+            return 0
+        description, change = series_change(args, tz)
+        plans = [(row, *change(json.loads(row["properties"]))) for row in rows]
+    except ValueError as e:
+        print(styling.err(str(e)))
+        return 1
+
+    noun = "entry" if len(plans) == 1 else "entries"
+    print(f"\n{styling.dim(f'{len(plans)} {noun} of series {args.series} will be changed: {description}.')}")
+    if not args.yes and input("Continue? (y/n): ").strip().lower() not in ("y", "yes"):
+        print(styling.warn("Cancelled."))
+        return 1
+
+    def send(plan):
+        row, update, _ = plan
+        return notion.pages.update(row["page_id"], **update)
+
+    updated, failures = 0, []
+    progress = sys.stdout.isatty()
+    for (row, _, props), page, error in pipeline.imap_bounded(send, plans, CREATE_CONCURRENCY):
+        if error is None:
+            if props is None:
+                OUTBOX.mark_archived(row["id"])
+            else:
+                OUTBOX.record_update(row["id"], props)
+            updated += 1
+        else:
+            failures.append(row)
+            props = json.loads(row["properties"])
+            print(("\r" if progress else "") + styling.err(f"✗ {entry_title(props)} ({entry_date(props)}): {error}"))
+        if progress:
+            print(f"\r{styling.dim(f'{updated + len(failures)}/{len(plans)}')}", end="", flush=True)
+    if progress:
+        print("\r", end="")
+
+    if failures:
+        print(styling.err(f"{len(failures)} failed and were left unchanged."))
+    stats = notion.stats()
+    if stats["retries"]:
+        print(styling.dim(f"Notion API: {notion_api.format_stats(stats)}"))
+    print(styling.ok(f"✓ Updated {updated} of {len(plans)}."))
+    return 1 if failures else 0
+
+def split_add_arguments(words):
+    """'Essay 2' due='next fri' tags=English -> ('Essay 2', {'due': ..., 'tags': ...})."""
+    title = []
+    fields = {}
+    for word in words:
+        name, sep, value = word.partition("=")
+        if sep and name.strip():
+            fields[name.strip()] = value
+        else:
+            title.append(word)
+    return " ".join(title), fields
+
+def match_property(name, schema):
+    """The property a command-line field refers to: its exact name, or a
+    unique prefix of the name or of one of its words (case-insensitive).
+    'title' always means the title property."""
+    lowered = name.strip().lower()
+    if lowered == "title":
+        return next(p for p, info in schema.items() if info["type"] == "title")
+    for prop in schema:
+        if prop.lower() == lowered:
+            return prop
+    matches = [p for p in schema if p.lower().startswith(lowered)]
+    matches = matches or [p for p in schema if any(w.startswith(lowered) for w in p.lower().split())]
+    if len(matches) == 1:
+        return matches[0]
+    if not matches:
+        raise ValueError(f"No property matches '{name}'. Properties: {', '.join(schema)}")
+    raise ValueError(f"'{name}' could be any of: {', '.join(matches)}")
+
+def ids_by_name(value, search, noun):
+    """Turn comma-separated names (or IDs) into IDs using a local index."""
+    ids = []
+    for name in split_values(value):
+        if notion_ids.looks_like_id(name):
+            ids.append(name)
+            continue
+        lowered = name.lower()
+        hits = [(label, id_) for label, id_ in search(name, 10)
+                if label.lower().startswith(lowered) or f"<{lowered}" in label.lower()]
+        exact = [hit for hit in hits if hit[0].lower() == lowered]
+        if len(exact) == 1 or len(hits) == 1:
+            ids.append((exact or hits)[0][1])
+        elif not hits:
+            raise ValueError(f"No {noun} matches '{name}'.")
+        else:
+            raise ValueError(f"'{name}' matches several {noun}s: {', '.join(label for label, _ in hits[:5])}")
+    return ids
+
+def quick_add(db_key, title, fields, tz_name=None, allow_duplicate=False):
+    """Create one entry (and its recurrences) from command-line fields
+    without any prompts, and wait for the outcome. Occurrences that already
+    exist or are queued are skipped unless allow_duplicate. Used by 'add'
+    and by the daemon; returns a JSON-friendly result. Raises ValueError for
+    bad input."""
+    started = time.perf_counter()
+    databases = load_databases_from_env()
+    if db_key not in databases:
+        raise ValueError(f"Unknown database '{db_key}'. Configured: {', '.join(databases) or 'none'}")
+    db = databases[db_key]
+    tz = ZoneInfo(tz_name or DEFAULT_TZ)
+    data_source_id, schema = resolve_data_source(db["id"])
+
+    if title:
+        fields = {"title": title, **fields}
+    now = datetime.now(tz)
+    notion_props = {}
+    for name, value in fields.items():
+        prop_name = match_property(name, schema)
+        prop_info = schema[prop_name]
+        if prop_info["type"] == "people":
+            if not len(USERS):
+                USERS.refresh()
+            value = ids_by_name(value, USERS.search, "person")
+        elif prop_info["type"] == "relation" and prop_info["relation"].get("data_source_id"):
+            target = prop_info["relation"]["data_source_id"]
+            if not len(RELATIONS.index(target)):
+                RELATIONS.sync(target)
+            value = ids_by_name(value, RELATIONS.index(target).search, "page")
+        notion_props[prop_name] = build_property_value(prop_info, value, tz, now=now, abbreviated=True)
+    if not notion_props:
+        raise ValueError("Nothing to add; give a title and/or PROPERTY=VALUE fields.")
+
+    recurrences = []
+    for v in notion_props.values():
+        if "_recurrences" in v:
+            recurrences = v.pop("_recurrences")
+
+    batch_id = outbox.new_batch_id()
+    tracker = outbox.Tracker(OUTBOX_WORKER)
+    try:
+        ids, skipped = OUTBOX.enqueue(
+            data_source_id, db["label"], iter_entry_payloads(notion_props, recurrences), batch_id,
+            skip_existing=not allow_duplicate, series_prop=series_property(db, schema),
+        )
+        tracker.track(ids)
+        OUTBOX_WORKER.wake()
+        queued = wait_for(tracker)
+    finally:
+        tracker.close()
+
+    pages, failures, delayed = collect_outcomes(tracker)
+    return {
+        "ok": bool(ids) and not failures and not delayed and not queued,
+        "db": db["label"],
+        "title": entry_title(notion_props),
+        "batch_id": batch_id,
+        "urls": [p["url"] for p in pages],
+        "failed": [[entry_date(props), str(error)] for _, props, error in failures],
+        "deferred": delayed,
+        "queued": queued,
+        "skipped": skipped,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000),
+    }
+
+def daemon_alive():
+    """Whether a daemon still answers on DAEMON_SOCKET or its process still
+    exists, even if it is too busy to take a request."""
+    try:
+        if daemon.request(DAEMON_SOCKET, {"command": "ping"}, timeout=2) is not None:
+            return True
+    except daemon.DaemonError:
+        pass
+    pid = daemon.read_pid(DAEMON_SOCKET)
+    return pid is not None and outbox.pid_alive(pid)
+
+def run_add(args):
+    title, fields = split_add_arguments(args.fields)
+    message = {"command": "add", "db": args.db, "title": title, "fields": fields, "tz": args.tz, "allow_duplicate": args.allow_duplicate}
+    reply = None
+    if not args.no_daemon:
+        try:
+            reply = daemon.request(DAEMON_SOCKET, message)
+        except daemon.DaemonError as e:
+            if daemon_alive():
+                print(styling.warn(f"{e}. It is still running and may yet add the entry, so it wasn't added again."))
+                print(styling.dim("Run 'python main.py status' to check."))
+                return 1
+            # The daemon is gone. Whatever it queued is put back in the
+            # queue, and an identical entry is skipped, unless --allow-duplicate.
+            print(styling.warn(f"{e}; adding without it."))
+            OUTBOX.recover()
+    if reply is None:
+        OUTBOX_WORKER.start()
+        try:
+            reply = quick_add(args.db, title, fields, args.tz, args.allow_duplicate)
+        except ValueError as e:
+            reply = {"ok": False, "error": str(e)}
+
+    if "error" in reply:
+        print(styling.err(reply["error"]))
+        return 1
+    for when, error in reply["failed"]:
+        print(styling.err(f"✗ {reply['title']} ({when}) failed: {error}"))
+    if reply["deferred"]:
+        print(styling.warn(deferred_message(reply["deferred"])))
+    if reply["queued"]:
+        print(styling.warn(queued_message(reply["queued"])))
+    if reply["skipped"]:
+        print(styling.warn(f"Skipped {reply['skipped']} that already exist or are queued (--allow-duplicate to add them anyway)."))
+    if reply["urls"]:
+        print(styling.ok(f"✓ Added {len(reply['urls'])} task(s) to {reply['db']} in {reply['elapsed_ms']} ms"))
+    for url in reply["urls"]:
+        print(url)
+    return 0 if reply["ok"] else 1
+
+def run_daemon(args):
+    if args.stop:
+        try:
+            reply = daemon.request(DAEMON_SOCKET, {"command": "stop"}, timeout=5)
+        except daemon.DaemonError as e:
+            print(styling.err(str(e)))
+            return 1
+        print(styling.ok("Daemon stopped.") if reply else styling.warn("No daemon is running."))
+        return 0
+
+    DATABASES = load_databases_from_env()
+    def handle_add(message):
+        try:
+            return quick_add(
+                message["db"], message.get("title"), message.get("fields") or {}, message.get("tz"), message.get("allow_duplicate", False)
+            )
+        except ValueError as e:
+            return {"ok": False, "error": str(e)}
+
+    try:
+        server = daemon.Daemon(DAEMON_SOCKET, {"add": handle_add})
+    except RuntimeError as e:
+        print(styling.err(str(e)))
+        return 1
+
+    spinner("Warming up the Notion client and schemas")
+    notion.get()
+    OUTBOX_WORKER.start()
+    for key, future in prefetch_schemas(DATABASES).items():
+        try:
+            future.result()
+        except Exception as e:
+            print(styling.warn(f"Could not load {DATABASES[key]['label']}: {e}"))
+    print(styling.ok(f"Listening on {DAEMON_SOCKET} (Ctrl+C or 'python main.py daemon --stop' to stop)"))
+    try:
+        server.serve()
+    except KeyboardInterrupt:
+        pass
+    print(styling.ok("Daemon stopped."))
+    return 0
+
+def load_schema(key, db, schemas):
+    """(data_source_id, schema) for a database, None when it can't be
+    loaded. Waits for the background prefetch in `schemas`, then reads
+    through the schema cache so refreshes made since are seen. A failed
+    prefetch is retried and, once that works, replaced in `schemas`."""
+    future = schemas[key]
+    if not future.done():
+        spinner(f"Loading schema for {db['label']}")
+    error = future.exception()
+    if error is not None:
+        print(styling.warn(f"Background schema fetch for {db['label']} failed ({error}). Retrying..."))
+    try:
+        result = resolve_data_source(db["id"])
+    except Exception as e:
+        print(styling.err(f"Could not load {db['label']}: {e}"))
+        return None
+    if error is not None:
+        schemas[key] = Future()
+        schemas[key].set_result(result)
+    return result
+
+def fanout_target(key, db, data_source_id, schema):
+    return {
+        "key": key,
+        "id": db["id"],
+        "label": db["label"],
+        "properties": db["properties"],
+        "allow_time": db["allow_time"],
+        "data_source_id": data_source_id,
+        "schema": schema,
+        "series_prop": series_property(db, schema),
+    }
+
+def refresh_target(target):
+    target["data_source_id"], target["schema"] = resolve_data_source(target["id"], refresh=True)
 
 def main():
+    DATABASES = load_databases_from_env()
+    if not DATABASES:
+        print(styling.err("No databases configured. Check your .env file."))
+        sys.exit(1)
+
+    notion.start()
+    schemas = prefetch_schemas(DATABASES)
+
+    queued = OUTBOX.counts()[outbox.PENDING]
+    OUTBOX_WORKER.start()
+    if queued:
+        print(styling.dim(f"Sending {queued} queued {'entry' if queued == 1 else 'entries'} from an earlier session in the background."))
+
     while True:
         try:
             tz = ZoneInfo(pick_timezone())
@@ -659,72 +1705,329 @@ def main():
             else:
                 print(styling.ok("Resuming..."))
 
-    DATABASES = load_databases_from_env()
-    if not DATABASES:
-        print(styling.err("No databases configured. Check your .env file."))
-        sys.exit(1)
-
     DATABASE_ID = None
     PROPERTIES = None
     db_label = None
+    targets = None  # several databases, when adding to each at once
 
     while True:
         try:
-            if DATABASE_ID is None:
+            if DATABASE_ID is None and targets is None:
                 keys = list(DATABASES.keys())
 
                 print(f"\n{styling.h('Choose a database')}")
                 for i, key in enumerate(keys, 1):
-                    print(f"[{i}] {DATABASES[key]['label']}")
+                    future = schemas[key]
+                    failed = future.done() and future.exception() is not None
+                    note = f" {styling.warn('(schema fetch failed)')}" if failed else ""
+                    print(f"[{i}] {DATABASES[key]['label']}{note}")
 
-                choice = input("Enter number: ").strip()
+                choice = input("Enter number (or several, e.g. 1,2, to add to each): ").strip()
+                picks = [c.strip() for c in choice.split(",") if c.strip()]
 
-                if not choice.isdigit() or not (1 <= int(choice) <= len(keys)):
+                if not picks or not all(c.isdigit() and 1 <= int(c) <= len(keys) for c in picks):
                     print(styling.err("Invalid choice."))
                     continue
 
-                selected = DATABASES[keys[int(choice) - 1]]
-                DATABASE_ID = selected["id"]
-                PROPERTIES = selected["properties"]
-                db_label = selected["label"]
-                ALLOW_TIME = selected["allow_time"]
-                data_source_id, schema = resolve_data_source(DATABASE_ID)
-
-            interactive_add_task(data_source_id, schema, PROPERTIES, db_label, selected["allow_time"], tz)
+                picked = list(dict.fromkeys(keys[int(c) - 1] for c in picks))
+                loaded = {}
+                for key in picked:
+                    result = load_schema(key, DATABASES[key], schemas)
+                    if result is None:
+                        break
+                    loaded[key] = result
+                if len(loaded) < len(picked):
+                    continue
 
+                if len(picked) > 1:
+                    targets = [fanout_target(key, DATABASES[key], *loaded[key]) for key in picked]
+                    for t in targets:
+                        sync_pickers(t["schema"])
+                else:
+                    selected = DATABASES[picked[0]]
+                    data_source_id, schema = loaded[picked[0]]
+                    DATABASE_ID = selected["id"]
+                    PROPERTIES = selected["properties"]
+                    db_label = selected["label"]
+                    sync_pickers(schema)
+
+            show_notices()
+            if targets:
+                for key in interactive_add_fanout(targets, tz):
+                    refresh_target(next(t for t in targets if t["key"] == key))
+            elif interactive_add_task(data_source_id, schema, PROPERTIES, db_label, selected["allow_time"], tz, series_property(selected, schema)):
+                data_source_id, schema = resolve_data_source(DATABASE_ID, refresh=True)
+
+            show_notices()
             again = input(
-                "\nAdd another entry? (y = same DB / s = switch DB / n = quit): "
+                "\nAdd another entry? (y = same DB / s = switch DB / r = refresh schema / n = quit): "
             ).strip().lower()
 
             if again in ("y", "yes"):
                 continue
+            elif again in ("r", "refresh"):
+                if targets:
+                    for t in targets:
+                        refresh_target(t)
+                        sync_pickers(t["schema"], full=True)
+                    print(styling.ok(f"Refreshed schemas for {', '.join(t['label'] for t in targets)}."))
+                else:
+                    data_source_id, schema = resolve_data_source(DATABASE_ID, refresh=True)
+                    sync_pickers(schema, full=True)
+                    print(styling.ok(f"Refreshed schema for {db_label}."))
             elif again in ("s", "switch"):
                 DATABASE_ID = None
                 PROPERTIES = None
                 db_label = None
+                targets = None
             else:
-                print(styling.ok("Done adding entries."))
-                break
+                quit_session("Done adding entries.")
         except KeyboardInterrupt:
             try:
                 confirm = input("\nAre you sure you want to quit? (y/n): ").strip().lower()
             except KeyboardInterrupt:
+                if OUTSTANDING:
+                    print(styling.warn("\nUnsent entries are saved in the outbox and will be sent next time."))
                 print(styling.ok("\nGoodbye!"))
                 sys.exit(0)
             if confirm in ("y", "yes"):
-                print(styling.ok("Goodbye!"))
-                sys.exit(0)
+                quit_session()
             else:
                 print(styling.ok("Resuming..."))
 
-if __name__ == "__main__":
-    load_dotenv()
+def finish_profile(args):
+    profiler = profiling.PROFILER
+    profiler.print_summary()
+    if args.profile:
+        profiler.write(args.profile, args.profile_format)
+        print(styling.dim(f"Profile written to {args.profile}"))
+    if args.cprofile:
+        profiler.dump_cprofile(args.cprofile)
+        print(styling.dim(f"cProfile stats written to {args.cprofile} (python -m pstats {args.cprofile})"))
+
+def build_notion_client(args, client=None):
+    """Build the rate-limited Notion client on the tuned, pooled httpx
+    client (or on `client`). Called on first use; see configure()."""
+    import transport
+
+    timeout = connections = None
+    if client is None:
+        http2 = args.http2 or os.getenv("HTTP2", "false").lower() == "true"
+        if http2 and not transport.http2_available():
+            print(styling.warn("HTTP/2 needs the h2 package (pip install 'httpx[http2]'); using HTTP/1.1."))
+            http2 = False
+        client, connections = transport.build_http_client(
+            max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", CREATE_CONCURRENCY)),
+            http2=http2,
+            connect_timeout=args.connect_timeout or float(os.getenv("HTTP_CONNECT_TIMEOUT", "5")),
+            read_timeout=args.read_timeout or float(os.getenv("HTTP_READ_TIMEOUT", "60")),
+            keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30")),
+        )
+        timeout = client.timeout
+
+    return notion_api.NotionClient(
+        auth=NOTION_TOKEN,
+        client=client,
+        timeout=timeout,
+        connections=connections,
+        limiter=notion_api.RateLimiter(
+            rate=float(os.getenv("NOTION_RATE_LIMIT", notion_api.NOTION_RATE_LIMIT)),
+            max_concurrency=CREATE_CONCURRENCY,
+        ),
+        max_retries=int(os.getenv("NOTION_MAX_RETRIES", "5")),
+    )
+
+def is_retryable(error):
+    """Whether the outbox should send a failed create again later. A create
+    that timed out after it was sent may already exist, so it is failed
+    rather than repeated (and the client has already retried the rest)."""
+    return notion_api.is_retryable(error, repeatable=False)
+
+def configure(args, client=None):
+    """Set up the module-wide settings, caches, Notion client and outbox
+    from the environment. `client` is an optional httpx.Client for the
+    Notion client to use instead of the tuned, pooled one built from the
+    HTTP_* settings (the benchmarks pass one wired to fake_notion)."""
+    global NOTION_TOKEN, DEFAULT_TZ, TIMEZONE_CHOICES, QUICK_ACCESS_TIMES, CREATE_CONCURRENCY
+    global BACKGROUND_SUBMIT, NOTICES, OUTSTANDING, CACHE_DIR, SCHEMA_CACHE, notion, OUTBOX, OUTBOX_WORKER, RELATIONS, USERS
+    global DAEMON_SOCKET, MIRROR, MAX_RECURRENCES
     NOTION_TOKEN = os.getenv("NOTION_SECRET")
 
     DEFAULT_TZ = os.getenv("DEFAULT_TIMEZONE", "UTC")
     TIMEZONE_CHOICES = [t.strip() for t in os.getenv("TIMEZONE_CHOICES", "").split(",") if t.strip()]
-    QUICK_ACCESS_TIMES = [t.strip() for t in os.getenv("QUICK_ACCESS_TIMES", "").split(",") if t.strip()]   
+    QUICK_ACCESS_TIMES = []
+    for t in (t.strip() for t in os.getenv("QUICK_ACCESS_TIMES", "").split(",")):
+        if t and dateparse.parse_quick_time(t) is None:
+            print(styling.warn(f"Ignoring QUICK_ACCESS_TIMES entry '{t}'; use e.g. '11:59 PM' or '23:59'."))
+        elif t:
+            QUICK_ACCESS_TIMES.append(t)
+    CREATE_CONCURRENCY = int(os.getenv("CREATE_CONCURRENCY", "3"))
+    MAX_RECURRENCES = int(os.getenv("MAX_RECURRENCES", dateparse.MAX_RECURRENCES))
+    BACKGROUND_SUBMIT = args.background or os.getenv("BACKGROUND_SUBMIT", "false").lower() == "true"
+    NOTICES = queue.Queue()
+    OUTSTANDING = set()
+
+    CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+    SCHEMA_CACHE = schema_cache.SchemaCache(
+        os.path.join(CACHE_DIR, "schemas.json"),
+        ttl=int(os.getenv("SCHEMA_CACHE_TTL", "86400")),
+    )
+    if args.refresh_schemas:
+        SCHEMA_CACHE.clear()
+    DAEMON_SOCKET = os.getenv("DAEMON_SOCKET", os.path.join(CACHE_DIR, "daemon.sock"))
 
-    notion = Client(auth=NOTION_TOKEN)  
+    # Importing the HTTP stack and building the client is the slowest part of
+    # startup, and nothing needs it before the first Notion call.
+    notion = deferred.Deferred(lambda: build_notion_client(args, client))
 
-    main()
\ No newline at end of file
+    OUTBOX = outbox.Outbox(
+        os.path.join(CACHE_DIR, "outbox.db"),
+        retention=float(os.getenv("OUTBOX_RETENTION_DAYS", "90")) * 86400,
+    )
+    OUTBOX_WORKER = outbox.OutboxWorker(OUTBOX, create_page, is_retryable, concurrency=CREATE_CONCURRENCY)
+    OUTBOX_WORKER.listeners.append(invalidate_stale_schema)
+    RELATIONS = relations.RelationMirror(
+        os.path.join(CACHE_DIR, "relations"),
+        lambda data_source_id, **body: notion.data_sources.query(data_source_id, **body),
+    )
+    USERS = people.UserDirectory(
+        os.path.join(CACHE_DIR, "users.json"),
+        lambda **kwargs: notion.users.list(**kwargs),
+        ttl=int(os.getenv("USER_CACHE_TTL", "86400")),
+    )
+    MIRROR = mirror.Mirror(
+        os.path.join(CACHE_DIR, "mirror.db"),
+        lambda data_source_id, **body: notion.data_sources.query(data_source_id, **body),
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Quickly add entries to Notion databases.")
+    parser.add_argument("--refresh-schemas", action="store_true", help="ignore cached database schemas and fetch them again")
+    parser.add_argument("--background", action="store_true", help="return to the prompt right away and create pages in the background")
+    parser.add_argument("--http2", action="store_true", help="talk to Notion over HTTP/2 (needs the h2 package)")
+    parser.add_argument("--connect-timeout", type=float, help="seconds to wait for a connection (default: HTTP_CONNECT_TIMEOUT or 5)")
+    parser.add_argument("--read-timeout", type=float, help="seconds to wait for a response (default: HTTP_READ_TIMEOUT or 60)")
+    parser.add_argument("--profile", metavar="FILE", help="time every Notion call and local phase, write them to FILE and print a summary at exit")
+    parser.add_argument("--profile-format", choices=("json", "chrome"), default="json", help="FILE format: plain JSON or a Chrome trace (default: json)")
+    parser.add_argument("--cprofile", metavar="FILE", help="also write cProfile stats for the local phases to FILE")
+    commands = parser.add_subparsers(dest="command")
+
+    import_parser = commands.add_parser("import", help="create entries from a CSV or JSONL file")
+    import_parser.add_argument("file", help="CSV file with a header row, or JSONL with one object per line")
+    import_parser.add_argument("--db", required=True, help="database key from DATABASES")
+    import_parser.add_argument("--format", choices=("csv", "jsonl"), help="file format (default: from the extension)")
+    import_parser.add_argument("--map", action="append", type=column_mapping, metavar="COLUMN=PROPERTY", help="map a column to a property whose name differs")
+    import_parser.add_argument("--tz", help="timezone for dates with times (default: DEFAULT_TIMEZONE)")
+    import_parser.add_argument("--rejects", help="where to write rejected rows (default: <file>.rejected.jsonl)")
+
+    tasks_parser = commands.add_parser("sync-tasks", help="make a database match a tasks file, writing only what changed")
+    tasks_parser.add_argument("file", help="CSV or JSONL tasks file with a key column")
+    tasks_parser.add_argument("--db", required=True, help="database key from DATABASES")
+    tasks_parser.add_argument("--format", choices=("csv", "jsonl"), help="file format (default: from the extension)")
+    tasks_parser.add_argument("--map", action="append", type=column_mapping, metavar="COLUMN=PROPERTY", help="map a column to a property whose name differs")
+    tasks_parser.add_argument("--key-column", default="key", help="column holding each entry's stable key (default: key)")
+    tasks_parser.add_argument("--key-prop", metavar="PROPERTY", help="text property to store the key in, so existing pages can be matched")
+    tasks_parser.add_argument("--tz", help="timezone for dates with times (default: DEFAULT_TIMEZONE)")
+    tasks_parser.add_argument("--dry-run", action="store_true", help="show what would change without writing anything")
+
+    status_parser = commands.add_parser("status", help="show pending, sent and failed entries in the outbox")
+    status_parser.add_argument("--limit", type=int, default=20, help="entries to list per section (default: 20)")
+    status_parser.add_argument("--retry-failed", action="store_true", help="queue failed entries to be sent again")
+
+    commands.add_parser("flush", help="send queued entries now and wait for them")
+
+    resume_parser = commands.add_parser("resume", help="create the missing entries of a partially failed batch")
+    resume_parser.add_argument("batch", nargs="?", help="batch ID (omit to list incomplete batches)")
+
+    add_parser = commands.add_parser("add", help="add one entry without prompts, e.g. add hw \"Essay 2\" due=\"next fri 1159 pm\"")
+    add_parser.add_argument("db", help="database key from DATABASES")
+    add_parser.add_argument("fields", nargs="*", metavar="TITLE | PROPERTY=VALUE", help="title words and property values; property names may be abbreviated")
+    add_parser.add_argument("--tz", help="timezone for dates with times (default: DEFAULT_TIMEZONE)")
+    add_parser.add_argument("--no-daemon", action="store_true", help="don't hand the entry to a running daemon")
+    add_parser.add_argument("--allow-duplicate", action="store_true", help="add occurrences even if an identical one already exists or is queued")
+
+    sync_parser = commands.add_parser("sync", help="mirror the configured databases locally for 'agenda' and 'search'")
+    sync_parser.add_argument("--db", help="only this database key (default: all)")
+    sync_parser.add_argument("--full", action="store_true", help="list every page again instead of only the edited ones")
+
+    export_parser = commands.add_parser("export", help="write the pages of configured databases to CSV, JSONL or Parquet files")
+    export_parser.add_argument("dbs", nargs="*", metavar="DB", help="database keys to export (default: all)")
+    export_parser.add_argument("--format", choices=exporter.FORMATS, default="csv", help="file format (default: csv; parquet needs pyarrow)")
+    export_parser.add_argument("--out", default="exports", help="directory for the files, one per database (default: exports)")
+    export_parser.add_argument("--all-properties", action="store_true", help="export every property, not just DB_<KEY>_PROPS")
+
+    agenda_parser = commands.add_parser("agenda", help="show what is overdue or due soon, from the local mirror")
+    agenda_parser.add_argument("view", nargs="?", choices=("all", "overdue", "today", "week"), default="all", help="which pages to show (default: all)")
+    agenda_parser.add_argument("--db", help="only this database key")
+    agenda_parser.add_argument("--all", action="store_true", help="include finished pages")
+    agenda_parser.add_argument("--limit", type=int, default=50, help="pages to list per section (default: 50)")
+
+    search_parser = commands.add_parser("search", help="full-text search of the local mirror")
+    search_parser.add_argument("query", nargs="+", help="words to look for; each matches as a prefix")
+    search_parser.add_argument("--db", help="only this database key")
+    search_parser.add_argument("--limit", type=int, default=20, help="matches to list (default: 20)")
+
+    series_parser = commands.add_parser("series", help="list, move, re-time, update or cancel a recurring series")
+    series_commands = series_parser.add_subparsers(dest="series_command")
+    series_list = series_commands.add_parser("list", help="recent series (the default)")
+    series_list.add_argument("--limit", type=int, default=20, help="series to list (default: 20)")
+    for name, help_text in (
+        ("show", "list the entries of a series"),
+        ("shift", "move every entry by an offset, e.g. +2d or -1w"),
+        ("retime", "give every entry a new time of day ('none' for all-day)"),
+        ("status", "set the status (or another select property) of every entry"),
+        ("archive", "move every entry to the trash"),
+    ):
+        p = series_commands.add_parser(name, help=help_text)
+        p.add_argument("series", help="series (batch) ID")
+        if name == "shift":
+            p.add_argument("offset", help="days or weeks, e.g. +2d, -1w, 3")
+        elif name == "retime":
+            p.add_argument("time", help="time of day, e.g. 14:30 or '1159 pm'")
+        elif name == "status":
+            p.add_argument("value", help="option to set")
+            p.add_argument("--prop", help="property to set (default: the status property)")
+        p.add_argument("--from", dest="since", metavar="DATE", help="only entries on or after DATE (any date the prompt accepts)")
+        p.add_argument("--tz", help="timezone for times and --from (default: DEFAULT_TIMEZONE)")
+        if name != "show":
+            p.add_argument("-y", "--yes", action="store_true", help="don't ask for confirmation")
+
+    daemon_parser = commands.add_parser("daemon", help="keep a warm process that 'add' hands entries to")
+    daemon_parser.add_argument("--stop", action="store_true", help="stop the running daemon")
+
+    args = parser.parse_args()
+
+    if args.profile or args.cprofile:
+        profiling.PROFILER.enable(cprofile=bool(args.cprofile))
+        atexit.register(finish_profile, args)
+
+    with profiling.span("load_env", local=True):
+        load_dotenv()
+        configure(args)
+
+    if args.command == "import":
+        sys.exit(run_import(args))
+    elif args.command == "sync-tasks":
+        sys.exit(run_sync_tasks(args))
+    elif args.command == "status":
+        sys.exit(run_status(args))
+    elif args.command == "flush":
+        sys.exit(run_flush(args))
+    elif args.command == "resume":
+        sys.exit(run_resume(args))
+    elif args.command == "add":
+        sys.exit(run_add(args))
+    elif args.command == "sync":
+        sys.exit(run_sync(args))
+    elif args.command == "export":
+        sys.exit(run_export(args))
+    elif args.command == "agenda":
+        sys.exit(run_agenda(args))
+    elif args.command == "search":
+        sys.exit(run_search(args))
+    elif args.command == "series":
+        sys.exit(run_series(args))
+    elif args.command == "daemon":
+        sys.exit(run_daemon(args))
+
+    main()
@@ -0,0 +1,239 @@
+import os
+import sqlite3
+import threading
+import time
+
+from propvalues import text_value
+from relations import FULL_SYNC_AFTER, iter_query
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    db_key TEXT NOT NULL,
+    title TEXT NOT NULL DEFAULT '',
+    due TEXT,
+    due_date TEXT,
+    status TEXT,
+    done INTEGER NOT NULL DEFAULT 0,
+    url TEXT,
+    text TEXT NOT NULL DEFAULT '',
+    last_edited_time TEXT,
+    seen_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_title ON pages (db_key, title COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS pages_due ON pages (due_date, db_key);
+CREATE TABLE IF NOT EXISTS sources (
+    db_key TEXT PRIMARY KEY,
+    label TEXT,
+    data_source_id TEXT NOT NULL,
+    date_prop TEXT,
+    cursor TEXT,
+    full_synced_at REAL NOT NULL DEFAULT 0,
+    synced_at REAL NOT NULL DEFAULT 0
+);
+"""
+
+# Full-text index over titles and property values, kept in step with the
+# pages table by triggers. Skipped when SQLite was built without FTS5.
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(title, text, content='pages', content_rowid='rowid');
+CREATE TRIGGER IF NOT EXISTS pages_ai AFTER INSERT ON pages BEGIN
+    INSERT INTO pages_fts (rowid, title, text) VALUES (new.rowid, new.title, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS pages_ad AFTER DELETE ON pages BEGIN
+    INSERT INTO pages_fts (pages_fts, rowid, title, text) VALUES ('delete', old.rowid, old.title, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS pages_au AFTER UPDATE ON pages BEGIN
+    INSERT INTO pages_fts (pages_fts, rowid, title, text) VALUES ('delete', old.rowid, old.title, old.text);
+    INSERT INTO pages_fts (rowid, title, text) VALUES (new.rowid, new.title, new.text);
+END;
+"""
+
+DONE_STATUSES = {"done", "complete", "completed"}
+
+def date_property(schema, preferred=None, configured=()):
+    """The property the agenda is keyed on: `preferred` if it is a date,
+    else the first date among the configured properties, else any date."""
+    dates = [name for name, info in schema.items() if info.get("type") == "date"]
+    if preferred in dates:
+        return preferred
+    return next((name for name in configured if name in dates), dates[0] if dates else None)
+
+def done_statuses(schema):
+    """Lower-cased status names that count as finished: the options in a
+    status property's Complete group, or the usual names without groups."""
+    names = set()
+    for info in schema.values():
+        if info.get("type") != "status":
+            continue
+        status = info.get("status", {})
+        options = {o.get("id"): o["name"] for o in status.get("options", [])}
+        for group in status.get("groups", []):
+            if group.get("name", "").lower() == "complete":
+                names.update(options.get(i, "").lower() for i in group.get("option_ids", []))
+    return names or DONE_STATUSES
+
+def page_row(page, date_prop, finished):
+    title, status, due, text = "", None, None, []
+    for name, prop in page.get("properties", {}).items():
+        value = text_value(prop)
+        if prop.get("type") == "title":
+            title = value or ""
+        elif value:
+            text.append(value)
+        if prop.get("type") == "status":
+            status = value
+        if name == date_prop:
+            due = value
+    return {
+        "id": page["id"],
+        "title": title,
+        "due": due,
+        "due_date": due[:10] if due else None,
+        "status": status,
+        "done": int(bool(status) and status.lower() in finished),
+        "url": page.get("url"),
+        "text": " ".join(text),
+        "last_edited_time": page.get("last_edited_time"),
+    }
+
+class Mirror:
+    """Local SQLite copy of the configured data sources, for agenda views
+    and search that work offline.
+
+    `query(data_source_id, **body)` runs one data source query (normally
+    notion.data_sources.query). Like the relation mirror, syncs only ask
+    for pages edited since the last one, with a full listing every
+    full_sync_after seconds so deleted pages drop out."""
+
+    def __init__(self, path, query, full_sync_after=FULL_SYNC_AFTER):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.query = query
+        self.full_sync_after = full_sync_after
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        try:
+            self._db.executescript(FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            self.fts = False
+
+    def sources(self):
+        with self._lock:
+            return {row["db_key"]: row for row in self._db.execute("SELECT * FROM sources ORDER BY db_key")}
+
+    def sync(self, db_key, label, data_source_id, schema, date_prop=None, full=False):
+        """Bring one database up to date and return (pages fetched, whether
+        it was a full sync). Pages are written as each batch of results
+        arrives, so a large first sync doesn't sit in memory."""
+        source = self.sources().get(db_key)
+        full = (
+            full or source is None or source["cursor"] is None
+            or source["data_source_id"] != data_source_id or source["date_prop"] != date_prop
+            or time.time() - source["full_synced_at"] > self.full_sync_after
+        )
+        cursor = None if full else source["cursor"]
+        body = {"sorts": [{"timestamp": "last_edited_time", "direction": "ascending"}], "page_size": 100}
+        if not full:
+            body["filter"] = {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": cursor}}
+
+        finished = done_statuses(schema)
+        started = time.time()
+        fetched = 0
+        batch = []
+        for page in iter_query(self.query, data_source_id, **body):
+            batch.append(page)
+            fetched += 1
+            edited = page.get("last_edited_time")
+            if edited and (cursor is None or edited > cursor):
+                cursor = edited
+            if len(batch) == 100:
+                self._apply(db_key, batch, date_prop, finished, started)
+                batch = []
+        self._apply(db_key, batch, date_prop, finished, started)
+
+        with self._lock, self._db:
+            if full:
+                self._db.execute("DELETE FROM pages WHERE db_key = ? AND seen_at < ?", (db_key, started))
+            self._db.execute(
+                "INSERT OR REPLACE INTO sources (db_key, label, data_source_id, date_prop, cursor, full_synced_at, synced_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (db_key, label, data_source_id, date_prop, cursor,
+                 started if full else source["full_synced_at"], time.time()),
+            )
+        return fetched, full
+
+    def _apply(self, db_key, pages, date_prop, finished, seen_at):
+        with self._lock, self._db:
+            for page in pages:
+                if page.get("in_trash") or page.get("archived"):
+                    self._db.execute("DELETE FROM pages WHERE id = ?", (page["id"],))
+                    continue
+                row = page_row(page, date_prop, finished)
+                self._db.execute(
+                    "INSERT INTO pages (id, db_key, title, due, due_date, status, done, url, text, last_edited_time, seen_at)"
+                    " VALUES (:id, :db_key, :title, :due, :due_date, :status, :done, :url, :text, :last_edited_time, :seen_at)"
+                    " ON CONFLICT (id) DO UPDATE SET db_key = excluded.db_key, title = excluded.title, due = excluded.due,"
+                    " due_date = excluded.due_date, status = excluded.status, done = excluded.done, url = excluded.url,"
+                    " text = excluded.text, last_edited_time = excluded.last_edited_time, seen_at = excluded.seen_at",
+                    {**row, "db_key": db_key, "seen_at": seen_at},
+                )
+
+    def count(self, db_key=None):
+        with self._lock:
+            if db_key is None:
+                return self._db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            return self._db.execute("SELECT COUNT(*) FROM pages WHERE db_key = ?", (db_key,)).fetchone()[0]
+
+    def due(self, start=None, end=None, db_key=None, include_done=False, limit=200):
+        """Pages whose date falls in [start, end) (ISO dates; either bound
+        may be left open), earliest first."""
+        where, params = ["due_date IS NOT NULL"], []
+        if start:
+            where.append("due_date >= ?")
+            params.append(start)
+        if end:
+            where.append("due_date < ?")
+            params.append(end)
+        if db_key:
+            where.append("db_key = ?")
+            params.append(db_key)
+        if not include_done:
+            where.append("done = 0")
+        sql = f"SELECT * FROM pages WHERE {' AND '.join(where)} ORDER BY due_date, due, title LIMIT ?"
+        with self._lock:
+            return self._db.execute(sql, (*params, limit)).fetchall()
+
+    def search(self, query, db_key=None, limit=20):
+        """Pages matching every word of query (as a prefix) in their title
+        or property values, best matches first."""
+        words = query.split()
+        if not words:
+            return []
+        if self.fts:
+            match = " ".join('"' + w.replace('"', '""') + '"*' for w in words)
+            sql = ("SELECT pages.* FROM pages_fts JOIN pages ON pages.rowid = pages_fts.rowid"
+                   " WHERE pages_fts MATCH ?")
+            params = [match]
+            if db_key:
+                sql += " AND pages.db_key = ?"
+                params.append(db_key)
+            sql += " ORDER BY bm25(pages_fts, 5.0, 1.0) LIMIT ?"
+        else:
+            sql = "SELECT * FROM pages WHERE " + " AND ".join("(title || ' ' || text) LIKE ?" for _ in words)
+            params = [f"%{w}%" for w in words]
+            if db_key:
+                sql += " AND db_key = ?"
+                params.append(db_key)
+            sql += " ORDER BY title LIMIT ?"
+        with self._lock:
+            return self._db.execute(sql, (*params, limit)).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
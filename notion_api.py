@@ -0,0 +1,205 @@
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+import httpx
+from notion_client import Client
+from notion_client.errors import HTTPResponseError, RequestTimeoutError
+
+import profiling
+
+# Notion allows an average of 3 requests per second per integration.
+NOTION_RATE_LIMIT = 3.0
+
+RETRYABLE_STATUSES = (500, 502, 503, 504)
+
+class RateLimiter:
+    """Token bucket shared by every request, plus an AIMD cap on how many
+    requests may be in flight at once. A 429 halves the cap and pauses the
+    bucket for Retry-After; each success grows the cap back by 1/cap."""
+
+    def __init__(self, rate=NOTION_RATE_LIMIT, burst=None, max_concurrency=3):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, self.rate))
+        self.max_concurrency = max(1, int(max_concurrency))
+
+        self._cond = threading.Condition()
+        self._tokens = self.burst
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._limit = float(self.max_concurrency)
+        self._in_flight = 0
+
+        self._started = time.monotonic()
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+        self.throttled_seconds = 0.0
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    @contextmanager
+    def slot(self):
+        waited_from = time.monotonic()
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._paused_until:
+                    self._cond.wait(self._paused_until - now)
+                elif self._in_flight >= int(self._limit):
+                    self._cond.wait()
+                elif self._tokens < 1:
+                    self._cond.wait((1 - self._tokens) / self.rate)
+                else:
+                    break
+            self._tokens -= 1
+            self._in_flight += 1
+            self.requests += 1
+            self.throttled_seconds += time.monotonic() - waited_from
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify_all()
+
+    def on_success(self):
+        with self._cond:
+            self._limit = min(self.max_concurrency, self._limit + 1 / self._limit)
+            self._cond.notify_all()
+
+    def on_rate_limited(self, retry_after):
+        with self._cond:
+            self.throttled += 1
+            self._limit = max(1.0, self._limit / 2)
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+
+    def record_retry(self, delay):
+        with self._cond:
+            self.retries += 1
+            self.throttled_seconds += delay
+
+    @property
+    def concurrency(self):
+        return int(self._limit)
+
+    def stats(self):
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "rate_limited": self.throttled,
+            "throttled_seconds": round(self.throttled_seconds, 3),
+            "requests_per_second": round(self.requests / elapsed, 3),
+            "concurrency": self.concurrency,
+        }
+
+# Requests that change nothing, so a timeout or dropped connection after
+# they were sent can safely be sent again. Anything else (creating a page)
+# might have gone through, and is only repeated when it never left.
+READ_ONLY_POSTS = ("search",)
+
+def is_repeatable(method, path):
+    path = path.strip("/")
+    return method == "GET" or (method == "POST" and (path.endswith("/query") or path in READ_ONLY_POSTS))
+
+class NotionClient(Client):
+    """notion_client.Client whose every request goes through a shared
+    RateLimiter and is retried on 429, 5xx and connection failures, and on
+    timeouts or dropped connections only when it is safe to send it again.
+
+    notion_client replaces the httpx client's timeout with a single total,
+    so a separate connect/read `timeout` (httpx.Timeout) is applied after it.
+    `connections` is the transport.ConnectionStats of that client, if any."""
+
+    def __init__(self, *args, limiter=None, max_retries=5, backoff_base=0.5, backoff_cap=30.0,
+                 timeout=None, connections=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if timeout is not None:
+            self.client.timeout = timeout
+        self.connections = connections
+        self.limiter = limiter or RateLimiter()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._last_status = threading.local()
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def _parse_response(self, response):
+        self._last_status.code = response.status_code
+        return super()._parse_response(response)
+
+    def request(self, path, method, query=None, body=None, form_data=None, auth=None):
+        with profiling.span(profiling.call_name(method, path)) as call:
+            if profiling.PROFILER.enabled:
+                call["request_bytes"] = len(json.dumps(body)) if body else 0
+            attempt = 0
+            while True:
+                try:
+                    with self.limiter.slot():
+                        result = super().request(path, method, query, body, form_data, auth)
+                    self.limiter.on_success()
+                    call.update(status=self._last_status.code, retries=attempt)
+                    if profiling.PROFILER.enabled:
+                        call["response_bytes"] = len(json.dumps(result))
+                    return result
+                except (HTTPResponseError, RequestTimeoutError, httpx.TransportError) as e:
+                    if attempt >= self.max_retries or not is_retryable(e, is_repeatable(method, path)):
+                        call.update(status=getattr(e, "status", None) or type(e).__name__, retries=attempt)
+                        raise
+                    if getattr(e, "status", None) == 429:
+                        delay = retry_after_seconds(e.headers) or self._backoff(attempt)
+                        self.limiter.on_rate_limited(delay)
+                    else:
+                        delay = self._backoff(attempt)
+
+                self.limiter.record_retry(delay)
+                time.sleep(delay)
+                attempt += 1
+
+    def stats(self):
+        stats = self.limiter.stats()
+        if self.connections is not None:
+            stats.update(self.connections.stats())
+        return stats
+
+def is_retryable(error, repeatable=True):
+    """Throttling and server errors are worth retrying, as are connectivity
+    problems: any of them for a `repeatable` request, otherwise only those
+    that happened before the request was sent. Anything else (validation,
+    permissions) is not."""
+    if isinstance(error, HTTPResponseError):
+        return error.status == 429 or error.status in RETRYABLE_STATUSES
+    if isinstance(error, (RequestTimeoutError, httpx.TransportError)):
+        return repeatable or never_sent(error)
+    return False
+
+def never_sent(error):
+    """Whether a timeout or transport error happened while connecting, so
+    Notion can't have seen the request. notion_client turns httpx timeouts
+    into RequestTimeoutError, leaving the original as its context."""
+    cause = error.__context__ if isinstance(error, RequestTimeoutError) else error
+    return isinstance(cause, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+
+def retry_after_seconds(headers):
+    value = headers.get("Retry-After") if headers else None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+def format_stats(stats):
+    return (
+        f"{stats['requests']} requests, {stats['retries']} retries "
+        f"({stats['rate_limited']} rate limited), {stats['throttled_seconds']:.1f}s throttled, "
+        f"{stats['requests_per_second']:.2f} req/s"
+        + (f", {stats['connections_opened']} new / {stats['connections_reused']} reused connections"
+           if "connections_opened" in stats else "")
+    )
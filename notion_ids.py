@@ -0,0 +1,8 @@
+import re
+
+# A Notion ID (page, data source, user...) with or without its dashes.
+ID_PATTERN = r"[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}"
+ID_RE = re.compile(f"^{ID_PATTERN}$", re.I)
+
+def looks_like_id(text):
+    return bool(ID_RE.match(text.strip()))
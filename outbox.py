@@ -0,0 +1,444 @@
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+import pipeline
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    data_source_id TEXT NOT NULL,
+    db_label TEXT,
+    properties TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    page_id TEXT,
+    url TEXT,
+    batch_id TEXT,
+    idempotency_key TEXT,
+    series_prop TEXT,
+    archived_at REAL,
+    owner TEXT,
+    lease_until REAL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_status ON entries (status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS entries_batch ON entries (batch_id);
+CREATE INDEX IF NOT EXISTS entries_key ON entries (idempotency_key);
+"""
+
+# How long sent entries are kept for duplicate checks and series commands.
+RETENTION = 90 * 86400
+
+# How long a process may hold entries it is sending without renewing its
+# claim; after that they are taken to be abandoned and are sent again.
+LEASE = 120.0
+
+PENDING, SENDING, SENT, FAILED = "pending", "sending", "sent", "failed"
+
+def idempotency_key(data_source_id, props):
+    """Stable hash of where an entry goes and exactly what it contains
+    (its date included), so the same occurrence always gets the same key."""
+    canonical = json.dumps(props, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(f"{data_source_id}\n{canonical}".encode()).hexdigest()
+
+def new_batch_id():
+    return uuid.uuid4().hex[:8]
+
+def pid_alive(pid):
+    """Whether a process with this ID exists on this machine. Where that
+    can't be checked safely (Windows) it is assumed to."""
+    if os.name == "nt":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def owner_alive(owner):
+    """Whether the process that claimed an entry (host:pid) may still be
+    sending it. Processes on other hosts are trusted until their lease runs
+    out."""
+    host, _, pid = (owner or "").rpartition(":")
+    if host != socket.gethostname():
+        return True
+    return pid.isdigit() and pid_alive(int(pid))
+
+class Outbox:
+    """SQLite journal of pages to create. Entries are written here before
+    any request is made, so nothing typed is lost if the network drops.
+
+    Sent entries are dropped once their whole batch is older than
+    `retention` seconds (<= 0 keeps them forever); pending and failed ones
+    are always kept.
+
+    Several processes may share the file. Entries are claimed in a single
+    statement, tagged with the claiming process and a lease it renews
+    while it runs, so each is sent by one process at a time."""
+
+    def __init__(self, path, retention=RETENTION, lease=LEASE):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.lease = lease
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self.recover()
+        if retention > 0:
+            self.prune(time.time() - retention)
+
+    def recover(self):
+        """Put back in the queue the entries left mid-send by a process that
+        has exited or stopped renewing its lease; entries a live process is
+        sending are left to it. Returns the number put back."""
+        now = time.time()
+        with self._lock:
+            owners = [row[0] for row in self._db.execute(
+                "SELECT DISTINCT owner FROM entries WHERE status = ? AND lease_until >= ?", (SENDING, now)
+            )]
+            gone = [owner for owner in owners if not owner_alive(owner)]
+            marks = ",".join("?" * len(gone))
+            with self._db:
+                return self._db.execute(
+                    f"""UPDATE entries SET status = ?, owner = NULL, lease_until = NULL
+                        WHERE status = ? AND (lease_until IS NULL OR lease_until < ? OR owner IN ({marks}))""",
+                    (PENDING, SENDING, now, *gone),
+                ).rowcount
+
+    def prune(self, before):
+        """Delete sent entries last updated before `before`, unless another
+        entry of their batch is newer, so series are dropped whole. Returns
+        the number deleted."""
+        with self._lock, self._db:
+            return self._db.execute(
+                """DELETE FROM entries WHERE status = ? AND updated_at < ? AND (batch_id IS NULL OR batch_id NOT IN
+                       (SELECT batch_id FROM entries WHERE batch_id IS NOT NULL AND (updated_at >= ? OR status != ?)))""",
+                (SENT, before, before, SENT),
+            ).rowcount
+
+    def existing_keys(self, keys):
+        """Return the keys that already belong to a sent or queued entry."""
+        keys = list(keys)
+        found = set()
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                found.update(row[0] for row in self._db.execute(
+                    f"SELECT idempotency_key FROM entries WHERE status != ? AND archived_at IS NULL AND idempotency_key IN ({marks})",
+                    (FAILED, *chunk),
+                ))
+        return found
+
+    def enqueue(self, data_source_id, db_label, payloads, batch_id=None, skip_existing=True, series_prop=None):
+        """Write every payload in one transaction and return (row IDs in
+        order, number skipped). With skip_existing, payloads whose
+        idempotency key already belongs to a sent or queued entry are left
+        out. series_prop names a text property that the batch ID is written
+        to when each page is created."""
+        now = time.time()
+        ids = []
+        skipped = 0
+        with self._lock, self._db:
+            for props in payloads:
+                key = idempotency_key(data_source_id, props)
+                if skip_existing and self._db.execute(
+                    "SELECT 1 FROM entries WHERE idempotency_key = ? AND status != ? AND archived_at IS NULL LIMIT 1",
+                    (key, FAILED),
+                ).fetchone():
+                    skipped += 1
+                    continue
+                cur = self._db.execute(
+                    "INSERT INTO entries (data_source_id, db_label, properties, batch_id, idempotency_key, series_prop, created_at, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (data_source_id, db_label, json.dumps(props), batch_id, key, series_prop, now, now),
+                )
+                ids.append(cur.lastrowid)
+        return ids, skipped
+
+    def claim(self, limit):
+        """Mark up to `limit` due entries (and any whose sender's lease ran
+        out) as sent by this process and return them. One UPDATE does it, so
+        no other process can claim the same entries."""
+        now = time.time()
+        with self._lock, self._db:
+            rows = self._db.execute(
+                """UPDATE entries SET status = ?, attempts = attempts + 1, owner = ?, lease_until = ?
+                   WHERE id IN (SELECT id FROM entries
+                                WHERE (status = ? AND next_attempt_at <= ?) OR (status = ? AND lease_until < ?)
+                                ORDER BY id LIMIT ?)
+                   RETURNING *""",
+                (SENDING, self.owner, now + self.lease, PENDING, now, SENDING, now, limit),
+            ).fetchall()
+        return sorted(rows, key=lambda row: row["id"])
+
+    def renew(self):
+        """Extend the lease on the entries this process is sending."""
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE entries SET lease_until = ? WHERE status = ? AND owner = ?",
+                (time.time() + self.lease, SENDING, self.owner),
+            )
+
+    def mark_sent(self, entry_id, page):
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE entries SET status = ?, page_id = ?, url = ?, last_error = NULL, updated_at = ? WHERE id = ?",
+                (SENT, page.get("id"), page.get("url"), time.time(), entry_id),
+            )
+
+    def mark_failed(self, entry_id, error, retry_at=None):
+        """Record an error. With retry_at the entry stays pending until then;
+        without it the entry is failed for good."""
+        status = PENDING if retry_at is not None else FAILED
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE entries SET status = ?, last_error = ?, next_attempt_at = ?, updated_at = ? WHERE id = ?",
+                (status, str(error), retry_at or 0, time.time(), entry_id),
+            )
+
+    def retry_failed(self):
+        with self._lock, self._db:
+            return self._db.execute(
+                "UPDATE entries SET status = ?, next_attempt_at = 0 WHERE status = ?", (PENDING, FAILED)
+            ).rowcount
+
+    def requeue_batch(self, batch_id):
+        """Queue the batch's failed and deferred entries to be sent now and
+        return their IDs; sent entries are left alone."""
+        with self._lock, self._db:
+            # An occurrence created since by another batch counts as done here too.
+            self._db.execute(
+                """UPDATE entries SET status = ?, page_id = dup.page_id, url = dup.url, updated_at = ?
+                   FROM (SELECT idempotency_key, page_id, url FROM entries WHERE status = ?) AS dup
+                   WHERE entries.batch_id = ? AND entries.status = ? AND entries.idempotency_key = dup.idempotency_key""",
+                (SENT, time.time(), SENT, batch_id, FAILED),
+            )
+            self._db.execute(
+                "UPDATE entries SET status = ?, next_attempt_at = 0 WHERE batch_id = ? AND status IN (?, ?)",
+                (PENDING, batch_id, PENDING, FAILED),
+            )
+            return [row[0] for row in self._db.execute(
+                "SELECT id FROM entries WHERE batch_id = ? AND status IN (?, ?) ORDER BY id",
+                (batch_id, PENDING, SENDING),
+            )]
+
+    def batches(self, incomplete_only=True, limit=20):
+        having = "HAVING sent < total" if incomplete_only else ""
+        with self._lock:
+            return self._db.execute(
+                f"""SELECT batch_id, db_label, MIN(id) AS first_id, COUNT(*) AS total,
+                       SUM(status = 'sent') AS sent, SUM(status = 'failed') AS failed,
+                       SUM(status IN ('pending', 'sending')) AS pending
+                    FROM entries WHERE batch_id IS NOT NULL
+                    GROUP BY batch_id {having} ORDER BY first_id DESC LIMIT ?""",
+                (limit,),
+            ).fetchall()
+
+    def series(self, batch_id):
+        """The created, not archived entries of a batch, in creation order."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT * FROM entries WHERE batch_id = ? AND status = ? AND archived_at IS NULL ORDER BY id",
+                (batch_id, SENT),
+            ).fetchall()
+
+    def record_update(self, entry_id, props):
+        """Keep an entry in step with its page after the page was edited, so
+        later series commands and duplicate checks see the new values."""
+        with self._lock, self._db:
+            row = self._db.execute("SELECT data_source_id FROM entries WHERE id = ?", (entry_id,)).fetchone()
+            self._db.execute(
+                "UPDATE entries SET properties = ?, idempotency_key = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(props), idempotency_key(row["data_source_id"], props), time.time(), entry_id),
+            )
+
+    def mark_archived(self, entry_id):
+        with self._lock, self._db:
+            self._db.execute("UPDATE entries SET archived_at = ? WHERE id = ?", (time.time(), entry_id))
+
+    def counts(self):
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM entries GROUP BY status").fetchall()
+        counts = {PENDING: 0, SENT: 0, FAILED: 0}
+        for status, n in rows:
+            counts[PENDING if status == SENDING else status] += n
+        return counts
+
+    def entries(self, statuses, limit=50):
+        marks = ",".join("?" * len(statuses))
+        with self._lock:
+            return self._db.execute(
+                f"SELECT * FROM entries WHERE status IN ({marks}) ORDER BY id DESC LIMIT ?",
+                (*statuses, limit),
+            ).fetchall()
+
+    def get(self, entry_id):
+        with self._lock:
+            return self._db.execute("SELECT * FROM entries WHERE id = ?", (entry_id,)).fetchone()
+
+    def next_due_in(self):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT MIN(due) FROM (SELECT MIN(next_attempt_at) AS due FROM entries WHERE status = ?"
+                " UNION ALL SELECT MIN(lease_until) FROM entries WHERE status = ? AND owner != ?)",
+                (PENDING, SENDING, self.owner),
+            ).fetchone()
+        if row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+
+class OutboxWorker:
+    """Background thread that flushes the outbox to Notion in batches.
+
+    Errors that look like connectivity or throttling problems leave the entry
+    pending with exponential backoff, so queued entries go out on their own
+    once Notion is reachable again. Other errors fail the entry. A second
+    thread renews the lease on claimed entries while they are sent. Every
+    outcome is passed to the listeners as (entry_id, page, error, outcome),
+    where outcome is 'sent', 'failed' or 'deferred'."""
+
+    def __init__(self, outbox, create_page, is_retryable, concurrency=3, batch_size=25, max_backoff=300.0):
+        self.outbox = outbox
+        self.create_page = create_page
+        self.is_retryable = is_retryable
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.max_backoff = max_backoff
+        self.listeners = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._idle = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="outbox", daemon=True)
+            self._thread.start()
+            threading.Thread(target=self._heartbeat, name="outbox-lease", daemon=True).start()
+        return self
+
+    def _heartbeat(self):
+        while not self._stop.wait(self.outbox.lease / 3):
+            self.outbox.renew()
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _notify(self, *outcome):
+        for listener in list(self.listeners):
+            listener(*outcome)
+
+    def _send(self, row):
+        props = json.loads(row["properties"])
+        if row["series_prop"] and row["batch_id"]:
+            props[row["series_prop"]] = {"rich_text": [{"text": {"content": row["batch_id"]}}]}
+        return self.create_page(row["data_source_id"], props)
+
+    def _run(self):
+        while not self._stop.is_set():
+            rows = self.outbox.claim(self.batch_size)
+            if not rows:
+                self._idle.set()
+                wait = self.outbox.next_due_in()
+                self._wake.wait(timeout=min(wait, 60.0) if wait is not None else None)
+                self._wake.clear()
+                continue
+            self._idle.clear()
+            for row, page, error in pipeline.imap_bounded(self._send, rows, self.concurrency):
+                if error is None:
+                    self.outbox.mark_sent(row["id"], page)
+                    self._notify(row["id"], page, None, "sent")
+                elif self.is_retryable(error):
+                    delay = min(self.max_backoff, 2.0 ** row["attempts"])
+                    self.outbox.mark_failed(row["id"], error, retry_at=time.time() + delay)
+                    self._notify(row["id"], None, error, "deferred")
+                else:
+                    self.outbox.mark_failed(row["id"], error)
+                    self._notify(row["id"], None, error, "failed")
+
+    def wait_idle(self, timeout=None):
+        """Block until nothing is due (pending entries may remain deferred)."""
+        self._idle.clear()
+        self.wake()
+        return self._idle.wait(timeout)
+
+class Tracker:
+    """Collects the first outcome of each of a set of outbox entries.
+    Create it before enqueueing so no outcome can slip past, then call
+    track() with the new IDs. on_done(tracker) is called once, from the
+    worker thread, when every entry has an outcome."""
+
+    def __init__(self, worker, on_done=None):
+        self.worker = worker
+        self.on_done = on_done
+        self.ids = None
+        self.ordered_ids = []
+        self.outcomes = {}
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        worker.listeners.append(self._on_outcome)
+
+    def track(self, ids):
+        with self._lock:
+            self.ordered_ids = list(ids)
+            self.ids = set(self.ordered_ids)
+            self.outcomes = {k: v for k, v in self.outcomes.items() if k in self.ids}
+            finished = self._check()
+        if finished:
+            self._finish()
+
+    def _check(self):
+        if self.ids is not None and len(self.outcomes) >= len(self.ids) and not self._done.is_set():
+            self._done.set()
+            return True
+        return False
+
+    def _finish(self):
+        self.close()
+        if self.on_done:
+            self.on_done(self)
+
+    def _on_outcome(self, entry_id, page, error, outcome):
+        with self._lock:
+            if (self.ids is not None and entry_id not in self.ids) or entry_id in self.outcomes:
+                return
+            self.outcomes[entry_id] = (page, error, outcome)
+            finished = self._check()
+        if finished:
+            self._finish()
+
+    def wait(self, timeout=None):
+        """Block until every entry has an outcome, or until `timeout`
+        seconds pass without a new one (say, because another process is
+        sending them). Returns whether every entry has one."""
+        while True:
+            seen = len(self.outcomes)
+            if self._done.wait(timeout):
+                return True
+            if len(self.outcomes) == seen:
+                return False
+
+    def close(self):
+        try:
+            self.worker.listeners.remove(self._on_outcome)
+        except ValueError:
+            pass
@@ -0,0 +1,102 @@
+import json
+import os
+import threading
+import time
+
+from finder import Finder
+
+class UserDirectory:
+    """Workspace members, listed once through the paginated users endpoint
+    and cached on disk for `ttl` seconds (ttl <= 0 disables expiry).
+
+    `list_users(**kwargs)` is normally notion.users.list. Searches run
+    against the cached list only; a stale list is refreshed on a background
+    thread while the old one keeps answering."""
+
+    def __init__(self, path, list_users, ttl=86400):
+        self.path = path
+        self.list_users = list_users
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._thread = None
+        self._finder = None
+        data = self._load()
+        self.users = data.get("users", [])
+        self.fetched_at = data.get("fetched_at", 0)
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"users": self.users, "fetched_at": self.fetched_at}, f)
+        os.replace(tmp, self.path)
+
+    def stale(self):
+        return not self.fetched_at or (self.ttl > 0 and time.time() - self.fetched_at > self.ttl)
+
+    def refresh(self):
+        """List every person in the workspace (bots can't be assigned)."""
+        users = []
+        cursor = None
+        while True:
+            kwargs = {"page_size": 100}
+            if cursor:
+                kwargs["start_cursor"] = cursor
+            result = self.list_users(**kwargs)
+            for user in result.get("results", []):
+                if user.get("type") == "person":
+                    users.append({
+                        "id": user["id"],
+                        "name": user.get("name") or "",
+                        "email": (user.get("person") or {}).get("email") or "",
+                    })
+            cursor = result.get("next_cursor")
+            if not result.get("has_more") or not cursor:
+                break
+        with self._lock:
+            self.users = users
+            self.fetched_at = time.time()
+            self._finder = None
+            self._save()
+        return len(users)
+
+    def refresh_in_background(self, force=False):
+        if not force and not self.stale():
+            return None
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self._thread
+            self._thread = threading.Thread(target=self._refresh_quietly, daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def _refresh_quietly(self):
+        # A failed refresh keeps the cached list; pasting a user ID still works.
+        try:
+            self.refresh()
+        except Exception:
+            pass
+
+    def refreshing(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def __len__(self):
+        return len(self.users)
+
+    def search(self, query, limit=10):
+        """Return [(label, user_id)] whose name or email starts with (or
+        fuzzily matches) query."""
+        with self._lock:
+            if self._finder is None:
+                self._finder = Finder(
+                    [(f"{u['name']} <{u['email']}>" if u["email"] else u["name"], u["id"]) for u in self.users],
+                )
+            finder = self._finder
+        return finder.search(query, limit)
@@ -0,0 +1,29 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+def imap_bounded(func, items, concurrency):
+    """Apply func to each item on a thread pool, yielding (item, result, error)
+    tuples in input order. Items are pulled lazily so at most a small window
+    is in flight at once, regardless of how long the input is."""
+    concurrency = max(1, int(concurrency))
+    window = concurrency * 2
+
+    pool = ThreadPoolExecutor(max_workers=concurrency)
+    pending = deque()
+    try:
+        for item in items:
+            pending.append((item, pool.submit(func, item)))
+            if len(pending) >= window:
+                yield _outcome(*pending.popleft())
+        while pending:
+            yield _outcome(*pending.popleft())
+    finally:
+        for _, future in pending:
+            future.cancel()
+        pool.shutdown(wait=True)
+
+def _outcome(item, future):
+    try:
+        return item, future.result(), None
+    except Exception as e:
+        return item, None, e
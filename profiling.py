@@ -0,0 +1,149 @@
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+import styling
+from notion_ids import ID_PATTERN
+
+ID_RE = re.compile(ID_PATTERN, re.I)
+
+class Profiler:
+    """Records timed spans (Notion calls and local phases) for --profile.
+
+    Disabled by default, in which case span() only yields an empty dict.
+    Attributes set on the yielded dict (status, retries, sizes) are kept
+    with the span. Spans marked local=True also run under cProfile when a
+    cProfile dump was requested."""
+
+    def __init__(self):
+        self.enabled = False
+        self.spans = []
+        self.origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._cprofile = None
+        self._local_depth = 0
+
+    def enable(self, cprofile=False):
+        self.enabled = True
+        self.origin = time.perf_counter()
+        if cprofile:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+
+    @contextmanager
+    def span(self, name, local=False, **attrs):
+        if not self.enabled:
+            yield attrs
+            return
+        profile = self._cprofile if local and threading.current_thread() is threading.main_thread() else None
+        if profile is not None:
+            self._local_depth += 1
+            if self._local_depth == 1:
+                profile.enable()
+        start = time.perf_counter()
+        try:
+            yield attrs
+        finally:
+            duration = time.perf_counter() - start
+            if profile is not None:
+                self._local_depth -= 1
+                if self._local_depth == 0:
+                    profile.disable()
+            with self._lock:
+                self.spans.append({
+                    "name": name,
+                    "start": start - self.origin,
+                    "duration": duration,
+                    "thread": threading.current_thread().name,
+                    **attrs,
+                })
+
+    def summary(self):
+        """Per-span-name totals: calls, total/mean/p50/p99/max seconds, and
+        for Notion calls the status codes, retries and bytes sent/received."""
+        groups = {}
+        for span in self.spans:
+            groups.setdefault(span["name"], []).append(span)
+        rows = []
+        for name, spans in groups.items():
+            durations = sorted(s["duration"] for s in spans)
+            row = {
+                "name": name,
+                "calls": len(spans),
+                "total": sum(durations),
+                "mean": sum(durations) / len(durations),
+                "p50": percentile(durations, 50),
+                "p99": percentile(durations, 99),
+                "max": durations[-1],
+            }
+            statuses = {}
+            for s in spans:
+                if "status" in s:
+                    statuses[str(s["status"])] = statuses.get(str(s["status"]), 0) + 1
+            if statuses:
+                row["statuses"] = statuses
+                row["retries"] = sum(s.get("retries", 0) for s in spans)
+                row["request_bytes"] = sum(s.get("request_bytes", 0) for s in spans)
+                row["response_bytes"] = sum(s.get("response_bytes", 0) for s in spans)
+            rows.append(row)
+        return sorted(rows, key=lambda r: r["total"], reverse=True)
+
+    def write(self, path, fmt="json"):
+        """Write the spans as plain JSON, or as a Chrome trace
+        (chrome://tracing, Perfetto) when fmt is 'chrome'."""
+        if fmt == "chrome":
+            threads = {}
+            events = []
+            for s in self.spans:
+                tid = threads.setdefault(s["thread"], len(threads) + 1)
+                args = {k: v for k, v in s.items() if k not in ("name", "start", "duration", "thread")}
+                events.append({
+                    "name": s["name"], "cat": "notion" if "status" in s else "local", "ph": "X",
+                    "ts": round(s["start"] * 1e6), "dur": round(s["duration"] * 1e6),
+                    "pid": os.getpid(), "tid": tid, "args": args,
+                })
+            for thread, tid in threads.items():
+                events.append({"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": thread}})
+            data = {"traceEvents": events, "displayTimeUnit": "ms"}
+        else:
+            data = {"spans": self.spans, "summary": self.summary()}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1, default=str)
+
+    def dump_cprofile(self, path):
+        if self._cprofile is not None:
+            self._cprofile.dump_stats(path)
+
+    def print_summary(self):
+        rows = self.summary()
+        print(f"\n{styling.h('Profile')}")
+        print(styling.dim(f"{'span':<40} {'calls':>6} {'total ms':>10} {'mean':>8} {'p50':>8} {'p99':>8} {'max':>8}"))
+        for r in rows:
+            print(
+                f"{r['name'][:40]:<40} {r['calls']:>6} {r['total'] * 1e3:>10.1f} {r['mean'] * 1e3:>8.1f}"
+                f" {r['p50'] * 1e3:>8.1f} {r['p99'] * 1e3:>8.1f} {r['max'] * 1e3:>8.1f}"
+            )
+            if "statuses" in r:
+                statuses = ", ".join(f"{k}×{v}" for k, v in sorted(r["statuses"].items()))
+                print(styling.dim(
+                    f"{'':<4}status {statuses}; {r['retries']} retries; "
+                    f"{r['request_bytes']} B sent, {r['response_bytes']} B received"
+                ))
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of `samples` (0.0 when there are none)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+def call_name(method, path):
+    """'GET /data_sources/<uuid>' -> 'GET /data_sources/{id}', so calls
+    group by endpoint."""
+    return f"{method} /{ID_RE.sub('{id}', path.strip('/'))}"
+
+PROFILER = Profiler()
+span = PROFILER.span
@@ -0,0 +1,48 @@
+import json
+
+LIST_TYPES = ("multi_select", "people", "relation")
+SCALAR_TYPES = ("number", "checkbox", "url", "email", "phone_number", "string", "boolean")
+KNOWN_TYPES = ("title", "rich_text", "select", "status", "date", "formula", *LIST_TYPES, *SCALAR_TYPES)
+
+def property_type(prop):
+    """A property's type, from its 'type' key (pages Notion returns) or
+    its only value key (payloads built for a request)."""
+    return prop.get("type") or next((k for k in prop if k in KNOWN_TYPES), None)
+
+def flat_value(prop):
+    """A property value as a plain value: text for title, rich_text,
+    select, status and date (its start), numbers and booleans as they are,
+    and a list of names or IDs for multi_select, people and relation. Other
+    types come back as JSON. None when empty. Works on pages from Notion
+    and on the payloads built here alike."""
+    kind = property_type(prop)
+    value = prop.get(kind)
+    if value is None:
+        return None
+    if kind in ("title", "rich_text"):
+        return "".join(part.get("plain_text") or part.get("text", {}).get("content", "") for part in value) or None
+    if kind in ("select", "status"):
+        return value.get("name")
+    if kind == "multi_select":
+        return [opt["name"] for opt in value]
+    if kind == "date":
+        return value.get("start")
+    if kind == "people":
+        return [p.get("name") or p["id"] for p in value]
+    if kind == "relation":
+        return [r["id"] for r in value]
+    if kind == "formula":
+        return flat_value(value)
+    if kind in SCALAR_TYPES:
+        return value
+    return json.dumps(value, default=str)
+
+def text_value(prop):
+    """flat_value as text, with lists joined by commas. None when empty or
+    of a type without a plain value."""
+    if property_type(prop) not in KNOWN_TYPES:
+        return None
+    value = flat_value(prop)
+    if isinstance(value, list):
+        return ", ".join(value) or None
+    return None if value is None else str(value)
@@ -0,0 +1,115 @@
+import itertools
+from datetime import datetime, timedelta
+
+class Series:
+    """Occurrences of a recurring entry, computed on demand.
+
+    Either every `step_days` days from start, or on each of `weekdays`
+    (0 = Monday) on or after start. The series is bounded by `count` and/or
+    `until` (a date), whichever ends it first; `exclude` dates are then
+    removed without freeing up their slot in `count`, as with RFC 5545
+    COUNT/EXDATE. Occurrences keep start's time of day and tzinfo."""
+
+    def __init__(self, start, step_days=None, weekdays=None, count=None, until=None, exclude=()):
+        if count is None and until is None:
+            raise ValueError("A recurrence needs a count or an end date.")
+        self.start = start
+        self.step_days = step_days or 1
+        self.count = count
+        self.until = until
+        self.exclude = frozenset(exclude)
+
+        first_day = start.weekday()
+        self.offsets = sorted({(wd - first_day) % 7 for wd in weekdays}) if weekdays else None
+
+    def _days(self):
+        start = self.start.date()
+        if self.offsets is not None:
+            for week in itertools.count():
+                base = start + timedelta(weeks=week)
+                for offset in self.offsets:
+                    yield base + timedelta(days=offset)
+        else:
+            step = timedelta(days=self.step_days)
+            day = start
+            while True:
+                yield day
+                day += step
+
+    def __iter__(self):
+        for index, day in enumerate(self._days()):
+            if self.count is not None and index >= self.count:
+                return
+            if self.until is not None and day > self.until:
+                return
+            if day not in self.exclude:
+                yield self._at(day)
+
+    def _at(self, day):
+        s = self.start
+        return datetime.combine(day, datetime.min.time()).replace(
+            hour=s.hour, minute=s.minute, second=s.second, microsecond=s.microsecond, tzinfo=s.tzinfo
+        )
+
+    def _bounded_length(self):
+        n = None
+        if self.until is not None:
+            span = (self.until - self.start.date()).days
+            if span < 0:
+                n = 0
+            elif self.offsets is not None:
+                n = (span // 7) * len(self.offsets) + sum(1 for o in self.offsets if o <= span % 7)
+            else:
+                n = span // self.step_days + 1
+        if self.count is not None:
+            n = self.count if n is None else min(n, self.count)
+        return n
+
+    def _index_of(self, day):
+        delta = (day - self.start.date()).days
+        if delta < 0:
+            return None
+        if self.offsets is not None:
+            if delta % 7 not in self.offsets:
+                return None
+            return (delta // 7) * len(self.offsets) + self.offsets.index(delta % 7)
+        if delta % self.step_days:
+            return None
+        return delta // self.step_days
+
+    def __len__(self):
+        n = self._bounded_length()
+        skipped = 0
+        for day in self.exclude:
+            index = self._index_of(day)
+            if index is not None and index < n:
+                skipped += 1
+        return n - skipped
+
+    def rest(self, date_only=False, iso=False):
+        return Rest(self, date_only, iso)
+
+class Rest:
+    """Every occurrence of a series after the first, as datetimes, ISO
+    datetime strings (iso) or ISO date strings (date_only). Iterable more
+    than once; len() doesn't iterate."""
+
+    def __init__(self, series, date_only=False, iso=False):
+        self.series = series
+        self.date_only = date_only
+        self.iso = iso
+
+    def __iter__(self):
+        occurrences = iter(self.series)
+        next(occurrences, None)
+        for dt in occurrences:
+            if self.date_only:
+                yield dt.date().isoformat()
+            else:
+                yield dt.isoformat() if self.iso else dt
+
+    def __len__(self):
+        return max(0, len(self.series) - 1)
+
+    def __bool__(self):
+        return len(self) > 0
@@ -0,0 +1,149 @@
+import json
+import os
+import threading
+import time
+
+from finder import Finder
+
+# Incremental syncs can't see pages that were deleted, so every so often the
+# whole data source is listed again.
+FULL_SYNC_AFTER = 7 * 86400
+
+def page_title(page):
+    for prop in page.get("properties", {}).values():
+        if prop.get("type") == "title":
+            return "".join(part.get("plain_text", "") for part in prop["title"]) or "(untitled)"
+    return "(untitled)"
+
+def iter_query(query, data_source_id, **body):
+    """Yield every page a data source query returns, following next_cursor
+    until the last page of results."""
+    cursor = None
+    while True:
+        if cursor:
+            body["start_cursor"] = cursor
+        result = query(data_source_id, **body)
+        yield from result.get("results", [])
+        cursor = result.get("next_cursor")
+        if not result.get("has_more") or not cursor:
+            break
+
+class PageIndex:
+    """Titles of one data source's pages, mirrored to a JSON file.
+
+    `cursor` is the latest last_edited_time seen; the next sync only asks
+    Notion for pages edited on or after it."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._finder = None
+        data = self._load()
+        self.pages = data.get("pages", {})
+        self.cursor = data.get("cursor")
+        self.full_synced_at = data.get("full_synced_at", 0)
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._lock:
+            data = {"pages": self.pages, "cursor": self.cursor, "full_synced_at": self.full_synced_at}
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+
+    def apply(self, pages, replace=False):
+        """Add or update pages (trashed ones are dropped). With replace, the
+        index becomes exactly these pages."""
+        with self._lock:
+            if replace:
+                self.pages = {}
+            for page in pages:
+                if page.get("in_trash") or page.get("archived"):
+                    self.pages.pop(page["id"], None)
+                    continue
+                self.pages[page["id"]] = page_title(page)
+                edited = page.get("last_edited_time")
+                if edited and (self.cursor is None or edited > self.cursor):
+                    self.cursor = edited
+            self._finder = None
+
+    def __len__(self):
+        return len(self.pages)
+
+    def search(self, query, limit=10):
+        """Return [(title, page_id)] best matching query, without touching
+        the network."""
+        with self._lock:
+            if self._finder is None:
+                self._finder = Finder([(title, page_id) for page_id, title in self.pages.items()])
+            finder = self._finder
+        return finder.search(query, limit)
+
+class RelationMirror:
+    """Local mirrors of the data sources that relation properties point to.
+
+    `query(data_source_id, **body)` runs one data source query (normally
+    notion.data_sources.query). Syncs are incremental, using a
+    last_edited_time filter and cursor pagination, and can run on a
+    background thread so the prompt never waits on them."""
+
+    def __init__(self, cache_dir, query, full_sync_after=FULL_SYNC_AFTER):
+        self.cache_dir = cache_dir
+        self.query = query
+        self.full_sync_after = full_sync_after
+        self._indexes = {}
+        self._threads = {}
+        self._lock = threading.Lock()
+
+    def index(self, data_source_id):
+        with self._lock:
+            if data_source_id not in self._indexes:
+                path = os.path.join(self.cache_dir, f"{data_source_id}.json")
+                self._indexes[data_source_id] = PageIndex(path)
+            return self._indexes[data_source_id]
+
+    def sync(self, data_source_id, full=False):
+        """Fetch pages edited since the last sync (or every page, when full
+        or when a full sync is due) and return how many came back."""
+        index = self.index(data_source_id)
+        full = full or index.cursor is None or time.time() - index.full_synced_at > self.full_sync_after
+        body = {"sorts": [{"timestamp": "last_edited_time", "direction": "ascending"}], "page_size": 100}
+        if not full:
+            body["filter"] = {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": index.cursor}}
+
+        fetched = list(iter_query(self.query, data_source_id, **body))
+        index.apply(fetched, replace=full)
+        if full:
+            index.full_synced_at = time.time()
+        index.save()
+        return len(fetched)
+
+    def sync_in_background(self, data_source_id, full=False):
+        with self._lock:
+            thread = self._threads.get(data_source_id)
+            if thread is not None and thread.is_alive():
+                return thread
+            thread = threading.Thread(target=self._sync_quietly, args=(data_source_id, full), daemon=True)
+            self._threads[data_source_id] = thread
+        thread.start()
+        return thread
+
+    def _sync_quietly(self, data_source_id, full):
+        # The mirror only speeds up the picker; a failed sync leaves the old
+        # index in place and pasting an ID still works.
+        try:
+            self.sync(data_source_id, full)
+        except Exception:
+            pass
+
+    def syncing(self, data_source_id):
+        thread = self._threads.get(data_source_id)
+        return thread is not None and thread.is_alive()
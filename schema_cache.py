@@ -0,0 +1,89 @@
+import json
+import os
+import re
+import threading
+import time
+
+# Notion's messages for a property or option that was renamed or removed.
+# Other validation errors (a wrong value type, a disallowed status change)
+# say nothing about the cached schema.
+SCHEMA_MISMATCH = re.compile(
+    r"is not a property that exists|(select|status) option .* (not found|does not exist)", re.IGNORECASE
+)
+
+class SchemaCache:
+    """On-disk cache of resolved data sources, keyed by database ID.
+
+    Each entry stores the data source ID, its property schema, Notion's
+    last_edited_time and when it was fetched. Entries older than ttl seconds
+    are treated as missing (ttl <= 0 disables expiry)."""
+
+    def __init__(self, path, ttl=86400):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp, self.path)
+
+    def get(self, database_id):
+        with self._lock:
+            entry = self._entries.get(database_id)
+        if not entry:
+            return None
+        if self.ttl > 0 and time.time() - entry["fetched_at"] > self.ttl:
+            return None
+        return entry
+
+    def put(self, database_id, data_source_id, properties, last_edited_time=None):
+        entry = {
+            "data_source_id": data_source_id,
+            "properties": properties,
+            "last_edited_time": last_edited_time,
+            "fetched_at": time.time(),
+        }
+        with self._lock:
+            self._entries[database_id] = entry
+            self._save()
+        return entry
+
+    def invalidate(self, database_id):
+        with self._lock:
+            if self._entries.pop(database_id, None) is not None:
+                self._save()
+
+    def invalidate_data_source(self, data_source_id):
+        """Drop the entry of whichever database resolved to this data source."""
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if entry["data_source_id"] == data_source_id]
+            for key in stale:
+                del self._entries[key]
+            if stale:
+                self._save()
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._save()
+
+def is_schema_mismatch(error):
+    """True for validation errors caused by a property or option that the
+    cached schema knows about but Notion no longer does."""
+    from notion_client.errors import APIResponseError
+    return (
+        isinstance(error, APIResponseError)
+        and error.code == "validation_error"
+        and bool(SCHEMA_MISMATCH.search(str(error)))
+    )
@@ -0,0 +1,123 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+import pipeline
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS synced (
+    scope TEXT NOT NULL,
+    key TEXT NOT NULL,
+    page_id TEXT NOT NULL,
+    hash TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (scope, key)
+);
+"""
+
+CREATE, UPDATE, ARCHIVE = "create", "update", "archive"
+
+# What an empty cell sets a property to, so clearing a value in the file
+# clears it on the page. Status can't be emptied and is left alone.
+CLEARED = {"title": {"title": []}, "select": {"select": None}, "multi_select": {"multi_select": []},
+           "date": {"date": None}, "people": {"people": []}, "relation": {"relation": []}, "number": {"number": None}}
+
+def occurrence_key(key, index):
+    """The first occurrence of an entry is its key; later ones of a
+    recurrence are key#2, key#3, ..."""
+    return key if index == 0 else f"{key}#{index + 1}"
+
+def belongs_to(occurrence, keys):
+    return occurrence.split("#", 1)[0] in keys
+
+class TaskState:
+    """SQLite record of the page each tasks-file key was synced to and the
+    hash of the payload last written there. `scope` keeps separate files
+    (and databases) apart."""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+
+    def load(self, scope):
+        """{key: (page_id, hash)} for a scope."""
+        with self._lock:
+            rows = self._db.execute("SELECT key, page_id, hash FROM synced WHERE scope = ?", (scope,))
+            return {key: (page_id, digest) for key, page_id, digest in rows}
+
+    def record(self, scope, key, page_id, digest):
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO synced (scope, key, page_id, hash, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (scope, key, page_id, digest, time.time()),
+            )
+
+    def forget(self, scope, key):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM synced WHERE scope = ? AND key = ?", (scope, key))
+
+def plan(entries, known, protected=(), archive_missing=True):
+    """Work out the writes that bring the pages in line with `entries`
+    ({key: (props, hash)}) given what was synced before (`known`,
+    {key: (page_id, hash)}). Keys no longer in the file are archived,
+    except those of `protected` entries (rows that couldn't be read this
+    time) or all of them when archive_missing is off. Returns (operations,
+    unchanged count)."""
+    ops = []
+    unchanged = 0
+    for key, (props, digest) in entries.items():
+        if key not in known:
+            ops.append((CREATE, key, None, props, digest))
+        elif known[key][1] != digest:
+            ops.append((UPDATE, key, known[key][0], props, digest))
+        else:
+            unchanged += 1
+    for key, (page_id, _) in known.items():
+        if archive_missing and key not in entries and not belongs_to(key, protected):
+            ops.append((ARCHIVE, key, page_id, None, None))
+    return ops, unchanged
+
+class SyncReport:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.done = Counter()
+        self.failed = []
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+def apply(ops, state, scope, create, update, archive, concurrency, on_failure=None):
+    """Run the operations on a bounded pipeline and record each success in
+    the state as soon as it lands, so an interrupted sync picks up where
+    it stopped. create(key, props) returns the new page; update(page_id,
+    key, props) and archive(page_id) return nothing useful."""
+    report = SyncReport()
+
+    def run(op):
+        kind, key, page_id, props, _ = op
+        if kind == CREATE:
+            return create(key, props)
+        if kind == UPDATE:
+            return update(page_id, key, props)
+        return archive(page_id)
+
+    for (kind, key, page_id, props, digest), page, error in pipeline.imap_bounded(run, ops, concurrency):
+        if error is not None:
+            report.failed.append((kind, key, error))
+            if on_failure:
+                on_failure(kind, key, error)
+            continue
+        if kind == CREATE:
+            state.record(scope, key, page["id"], digest)
+        elif kind == UPDATE:
+            state.record(scope, key, page_id, digest)
+        else:
+            state.forget(scope, key)
+        report.done[kind] += 1
+    return report
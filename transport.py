@@ -0,0 +1,59 @@
+import importlib.util
+import threading
+
+import httpx
+
+def http2_available():
+    """HTTP/2 needs the optional h2 package (pip install "httpx[http2]")."""
+    return importlib.util.find_spec("h2") is not None
+
+class ConnectionStats:
+    """Counts requests, new TCP connections and TLS handshakes through
+    httpcore's trace extension, so it's visible whether keep-alive is
+    actually reusing connections."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.tls_handshakes = 0
+
+    def _trace(self, event, info):
+        if event == "connection.connect_tcp.complete":
+            with self._lock:
+                self.connections += 1
+        elif event == "connection.start_tls.complete":
+            with self._lock:
+                self.tls_handshakes += 1
+        elif event in ("http11.send_request_headers.started", "http2.send_request_headers.started"):
+            with self._lock:
+                self.requests += 1
+
+    def install(self, request):
+        request.extensions["trace"] = self._trace
+
+    def stats(self):
+        with self._lock:
+            return {
+                "connections_opened": self.connections,
+                "connections_reused": max(0, self.requests - self.connections),
+                "tls_handshakes": self.tls_handshakes,
+            }
+
+def build_http_client(max_connections=3, http2=False, connect_timeout=5.0, read_timeout=60.0, keepalive_expiry=30.0):
+    """Return (httpx.Client, ConnectionStats) for the Notion client to share.
+
+    The pool holds as many keep-alive connections as requests may run at
+    once, so a batch reuses them instead of reconnecting for every page."""
+    stats = ConnectionStats()
+    client = httpx.Client(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+        event_hooks={"request": [stats.install]},
+    )
+    return client, stats